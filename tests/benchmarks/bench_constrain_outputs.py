@@ -0,0 +1,105 @@
+"""
+Benchmark for matching completions to constrain_outputs with a large label set.
+
+Compares the previous approach, an alternation regex built from all labels for every completion followed by two
+SequenceMatcher passes over all labels when there is no exact match, against the LabelMatcher compiled once per label
+set (a trie for exact matches and an n-gram index for the fuzzy nearest-label lookup).
+
+Usage:
+    python tests/benchmarks/bench_constrain_outputs.py [--num-labels 5000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from collections.abc import Callable
+from difflib import SequenceMatcher
+
+# Add the project directory to Python path BEFORE importing tlm modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from tlm.utils.label_matcher_utils import get_label_matcher
+
+WORDS = ["home", "kitchen", "garden", "outdoor", "sports", "toys", "audio", "video", "office", "pet", "baby", "tools"]
+NUM_MESSAGES = 50
+
+
+def build_labels(num_labels: int) -> list[str]:
+    rng = random.Random(0)
+    labels: set[str] = set()
+    while len(labels) < num_labels:
+        labels.add(" ".join(rng.sample(WORDS, 3)) + f" {rng.randint(0, 999)}")
+    return sorted(labels)
+
+
+def build_messages(labels: list[str]) -> list[str]:
+    """Half of the messages mention a label, the other half are close misspellings that need a fuzzy lookup."""
+    rng = random.Random(1)
+    messages = []
+    for idx in range(NUM_MESSAGES):
+        label = rng.choice(labels)
+        if idx % 2 == 0:
+            messages.append(f"Response: {label}")
+        else:
+            messages.append(label.replace(" ", "-")[:-1])
+    return messages
+
+
+def regex_match(message: str, labels: list[str]) -> str:
+    """Previous implementation of constrain_output."""
+    pattern = "(" + "|".join(re.escape(label) for label in labels) + ")"
+    exact_matches = re.findall(pattern, message, re.IGNORECASE)
+    if exact_matches:
+        return next(label for label in labels if label.lower() == exact_matches[-1].lower())
+    best_match = max(labels, key=lambda label: SequenceMatcher(None, message, label).ratio())
+    SequenceMatcher(None, message, best_match).ratio()
+    return best_match
+
+
+def compiled_match(message: str, labels: list[str]) -> str:
+    label_matcher = get_label_matcher(tuple(labels))
+    matched_value = label_matcher.find_last_exact_match(message)
+    if matched_value is not None:
+        return matched_value
+    return label_matcher.find_closest_match(message)[0]
+
+
+def measure(match: Callable[[str, list[str]], str], messages: list[str], labels: list[str]) -> tuple[float, list[str]]:
+    """Returns the mean time (seconds) per message and the matched labels."""
+    start = time.perf_counter()
+    matches = [match(message, labels) for message in messages]
+    return (time.perf_counter() - start) / len(messages), matches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-labels", type=int, default=5000)
+    args = parser.parse_args()
+
+    labels = build_labels(args.num_labels)
+    messages = build_messages(labels)
+
+    compile_start = time.perf_counter()
+    get_label_matcher(tuple(labels))
+    compile_time = time.perf_counter() - compile_start
+
+    baseline_time, baseline_matches = measure(regex_match, messages, labels)
+    current_time, current_matches = measure(compiled_match, messages, labels)
+    agreement = sum(a == b for a, b in zip(baseline_matches, current_matches, strict=True)) / len(messages)
+
+    print(f"Labels: {len(labels)}, messages: {len(messages)} (half exact mentions, half fuzzy)")
+    print("=" * 60)
+    print(f"{'':<20}{'time per message (ms)':>24}")
+    print(f"{'regex + difflib':<20}{baseline_time * 1000:>24.2f}")
+    print(f"{'LabelMatcher':<20}{current_time * 1000:>24.2f}")
+    print("=" * 60)
+    print(f"One-off compile time: {compile_time * 1000:.1f} ms")
+    print(f"Speedup: {baseline_time / current_time:.1f}x")
+    print(f"Same label: {agreement:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark for constructing LiteLLM parameters from long multi-turn conversations.
+
+Compares the current copy-on-write `_build_litellm_params` against the previous implementation, which
+deep-copied the full completion params for every LLM call.
+
+Usage:
+    python tests/benchmarks/bench_litellm_params.py
+"""
+
+import copy
+import os
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+# Add the project directory to Python path BEFORE importing tlm modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from tlm.config.presets import ReasoningEffort
+from tlm.templates import ReferenceCompletionTemplate
+from tlm.types import CompletionParams, CompletionTemplate
+from tlm.utils.completion_utils import _build_litellm_params
+
+NUM_TURNS = 50
+CONVERSATION_BYTES = 100_000
+# roughly the number of LLM calls made for a single BEST preset request
+NUM_CALLS = 40
+NUM_REPEATS = 5
+
+
+def build_conversation(num_turns: int, total_bytes: int) -> list[dict[str, str]]:
+    message_size = total_bytes // (2 * num_turns + 1)
+    filler = "lorem ipsum dolor sit amet " * (message_size // 27 + 1)
+    messages = [{"role": "system", "content": filler[:message_size]}]
+    for turn in range(num_turns):
+        messages.append({"role": "user", "content": f"Question {turn}: {filler[:message_size]}"})
+        messages.append({"role": "assistant", "content": f"Answer {turn}: {filler[:message_size]}"})
+    messages.append({"role": "user", "content": "What is the final answer?"})
+    return messages
+
+
+def deepcopy_build_litellm_params(
+    template: CompletionTemplate,
+    completion_params: CompletionParams,
+    template_kwargs: dict[str, Any],
+) -> CompletionParams:
+    """Previous implementation: deep copy everything, then format a copy of the messages."""
+    litellm_params = copy.deepcopy(completion_params)
+    litellm_params["messages"] = template.format_messages(messages=litellm_params["messages"], **template_kwargs)
+    return litellm_params
+
+
+def measure(
+    build: Callable[[CompletionTemplate, CompletionParams, dict[str, Any]], CompletionParams],
+    template: CompletionTemplate,
+    completion_params: CompletionParams,
+    template_kwargs: dict[str, Any],
+) -> tuple[float, int]:
+    """Returns the best wall time (seconds) and peak traced allocation (bytes) for NUM_CALLS builds."""
+    best_time = float("inf")
+    for _ in range(NUM_REPEATS):
+        start = time.perf_counter()
+        for _ in range(NUM_CALLS):
+            build(template, completion_params, template_kwargs)
+        best_time = min(best_time, time.perf_counter() - start)
+
+    tracemalloc.start()
+    results = [build(template, completion_params, template_kwargs) for _ in range(NUM_CALLS)]
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+
+    return best_time, peak_bytes
+
+
+def main() -> None:
+    messages = build_conversation(NUM_TURNS, CONVERSATION_BYTES)
+    completion_params: CompletionParams = {"model": "gpt-4.1-mini", "messages": messages}
+    template = ReferenceCompletionTemplate.create(reasoning_effort=ReasoningEffort.NONE)
+    template_kwargs = {"prompt": messages[-1]["content"], "max_explanation_words": 0}
+
+    conversation_size = sum(len(message["content"]) for message in messages)
+    print(f"Conversation: {len(messages)} messages, {conversation_size / 1000:.0f}KB, {NUM_CALLS} calls per request")
+    print("=" * 60)
+
+    baseline_time, baseline_peak = measure(deepcopy_build_litellm_params, template, completion_params, template_kwargs)
+    current_time, current_peak = measure(
+        lambda t, p, k: _build_litellm_params(t, p, k), template, completion_params, template_kwargs
+    )
+
+    print(f"{'':<16}{'time (ms)':>12}{'peak alloc (KB)':>20}")
+    print(f"{'deepcopy':<16}{baseline_time * 1000:>12.2f}{baseline_peak / 1000:>20.1f}")
+    print(f"{'copy-on-write':<16}{current_time * 1000:>12.2f}{current_peak / 1000:>20.1f}")
+    print("=" * 60)
+    print(f"CPU speedup: {baseline_time / current_time:.1f}x")
+    print(f"Allocation reduction: {baseline_peak / max(current_peak, 1):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark for logprob-fast mode on a classification task.
+
+Scores the same prompts with the full pipeline and with logprob-fast mode (one reference completion, scored from the
+label distribution of its top logprobs), and compares latency, number of LLM calls and agreement: how often both
+modes pick the same label, the correlation of their trustworthiness scores and their mean absolute difference.
+
+Requires an OpenAI API key (OPENAI_API_KEY) since it makes real LLM calls.
+
+Usage:
+    python tests/benchmarks/bench_logprob_fast_mode.py [--model gpt-4.1-mini] [--quality-preset medium]
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Any
+
+import numpy as np
+
+# Add the project directory to Python path BEFORE importing tlm modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from tlm.api import TLM
+from tlm.config.presets import QualityPreset
+from tlm.config.schema import Config
+from tlm.utils.explainability_utils import get_response_text
+
+LABELS = ["positive", "negative", "neutral"]
+TEXTS = [
+    "I absolutely loved this phone, the battery lasts for days.",
+    "The delivery was late and the box was crushed.",
+    "The package arrived on Tuesday.",
+    "Not bad, but I expected more for the price.",
+    "Best purchase I have made all year!",
+    "It works, I guess.",
+    "The screen cracked after one week, very disappointed.",
+    "I can't decide whether I like the new design or not.",
+    "Customer support solved my issue in minutes, thank you!",
+    "The manual is 40 pages long.",
+    "Honestly it's fine, nothing special, nothing terrible.",
+    "Worst hotel stay ever, the room smelled of smoke.",
+]
+
+
+def build_messages(text: str) -> list[dict[str, str]]:
+    return [
+        {
+            "role": "user",
+            "content": f"Classify the sentiment of the following text as positive, negative or neutral.\n\nText: {text}",
+        }
+    ]
+
+
+def get_label(result: dict[str, Any]) -> str | None:
+    response_text = get_response_text(result["response"]).lower()
+    return next((label for label in LABELS if label in response_text), None)
+
+
+def run(tlm: TLM, model: str) -> tuple[list[dict[str, Any]], float]:
+    """Returns the results for all TEXTS and the mean latency (seconds) per request."""
+    start = time.perf_counter()
+    results = [tlm.create(model=model, messages=build_messages(text)) for text in TEXTS]
+    return results, (time.perf_counter() - start) / len(TEXTS)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="gpt-4.1-mini")
+    parser.add_argument(
+        "--quality-preset", default=QualityPreset.MEDIUM.value, choices=[p.value for p in QualityPreset]
+    )
+    args = parser.parse_args()
+
+    quality_preset = QualityPreset(args.quality_preset)
+    full_tlm = TLM(config=Config(quality_preset=quality_preset, constrain_outputs=LABELS))
+    fast_tlm = TLM(config=Config(quality_preset=quality_preset, constrain_outputs=LABELS, use_logprob_fast_mode=True))
+
+    full_results, full_latency = run(full_tlm, args.model)
+    fast_results, fast_latency = run(fast_tlm, args.model)
+
+    full_calls = full_tlm.get_usage_totals()["total"]["num_calls"] / len(TEXTS)
+    fast_calls = fast_tlm.get_usage_totals()["total"]["num_calls"] / len(TEXTS)
+
+    same_label = np.mean(
+        [get_label(full) == get_label(fast) for full, fast in zip(full_results, fast_results, strict=True)],
+        dtype=np.float64,
+    )
+    full_scores = np.array([result["trustworthiness_score"] for result in full_results], dtype=np.float64)
+    fast_scores = np.array([result["trustworthiness_score"] for result in fast_results], dtype=np.float64)
+    valid = ~(np.isnan(full_scores) | np.isnan(fast_scores))
+
+    print(f"Model: {args.model}, quality preset: {quality_preset.value}, {len(TEXTS)} prompts")
+    print("=" * 60)
+    print(f"{'':<16}{'latency (s)':>14}{'LLM calls':>14}")
+    print(f"{'full pipeline':<16}{full_latency:>14.2f}{full_calls:>14.1f}")
+    print(f"{'logprob-fast':<16}{fast_latency:>14.2f}{fast_calls:>14.1f}")
+    print("=" * 60)
+    print(f"Speedup: {full_latency / fast_latency:.1f}x")
+    print(f"Same label: {same_label:.0%}")
+    if valid.sum() > 1:
+        print(f"Score correlation: {np.corrcoef(full_scores[valid], fast_scores[valid])[0, 1]:.3f}")
+        print(f"Mean absolute score difference: {np.mean(np.abs(full_scores[valid] - fast_scores[valid])):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark for the consistency similarity of structured outputs.
+
+Compares the JACCARD similarity measure (words of the flattened strings, minus the JSON keys, one pair at a time)
+against the STRUCTURED similarity measure (JSON parsed once per answer, compared leaf by leaf across all pairs at
+once) on large JSON responses.
+
+Usage:
+    python tests/benchmarks/bench_structured_similarity.py [--num-fields 200] [--num-references 3] [--num-comparisons 8]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+# Add the project directory to Python path BEFORE importing tlm modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from tlm.utils.scoring.consistency_scoring_utils import _compute_jaccard_similarity_scores
+from tlm.utils.scoring.structured_similarity_utils import compute_structured_similarity_scores
+
+WORDS = ["invoice", "total", "paid", "pending", "customer", "order", "shipped", "returned", "express", "standard"]
+NUM_REPEATS = 5
+
+
+def build_answers(num_answers: int, num_fields: int, seed: int) -> list[str]:
+    """JSON answers with the same schema, where each value is changed with probability 0.2."""
+    rng = random.Random(0)
+    base = {}
+    for idx in range(num_fields):
+        kind = idx % 4
+        if kind == 0:
+            base[f"field_{idx}"] = " ".join(rng.choices(WORDS, k=8))
+        elif kind == 1:
+            base[f"field_{idx}"] = round(rng.uniform(0, 1000), 2)
+        elif kind == 2:
+            base[f"field_{idx}"] = rng.sample(WORDS, 3)
+        else:
+            base[f"field_{idx}"] = {
+                "status": rng.choice(WORDS),
+                "count": rng.randint(0, 10),
+                "flag": rng.random() > 0.5,
+            }
+
+    rng = random.Random(seed)
+    answers = []
+    for _ in range(num_answers):
+        answer = {
+            key: (json.loads(json.dumps(value)) if rng.random() > 0.2 else rng.choice(WORDS))
+            for key, value in base.items()
+        }
+        answers.append(json.dumps(answer))
+    return answers
+
+
+def measure(
+    compute: Callable[[list[str], list[str]], np.ndarray], references: list[str], comparisons: list[str]
+) -> float:
+    """Returns the best wall time (seconds) to score all pairs."""
+    best_time = float("inf")
+    for _ in range(NUM_REPEATS):
+        start = time.perf_counter()
+        compute(references, comparisons)
+        best_time = min(best_time, time.perf_counter() - start)
+    return best_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-fields", type=int, default=200)
+    parser.add_argument("--num-references", type=int, default=3)
+    parser.add_argument("--num-comparisons", type=int, default=8)
+    args = parser.parse_args()
+
+    references = build_answers(args.num_references, args.num_fields, seed=1)
+    comparisons = build_answers(args.num_comparisons, args.num_fields, seed=2)
+
+    jaccard_time = measure(
+        lambda refs, comps: _compute_jaccard_similarity_scores(refs, comps, structured_outputs=True),
+        references,
+        comparisons,
+    )
+    structured_time = measure(
+        lambda refs, comps: compute_structured_similarity_scores(refs, comps)[0], references, comparisons
+    )
+
+    print(
+        f"{args.num_references} x {args.num_comparisons} pairs of JSON responses with {args.num_fields} fields "
+        f"({len(references[0]) / 1000:.1f} KB each)"
+    )
+    print("=" * 60)
+    print(f"{'':<16}{'time (ms)':>12}")
+    print(f"{'jaccard':<16}{jaccard_time * 1000:>12.2f}")
+    print(f"{'structured':<16}{structured_time * 1000:>12.2f}")
+    print("=" * 60)
+    print(f"Speedup: {jaccard_time / structured_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark for storing the logprobs of a completion.
+
+Compares the previous approach, a Pydantic round trip of the provider logprobs into ChoiceLogprobs followed by Python
+loops over the token objects, against the columnar TokenLogprobs with vectorized NumPy lookups, for a 512-token
+completion with top-5 logprobs.
+
+Usage:
+    python tests/benchmarks/bench_token_logprobs.py
+"""
+
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+from litellm.types.utils import ChatCompletionTokenLogprob, ChoiceLogprobs, TopLogprob
+
+# Add the project directory to Python path BEFORE importing tlm modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from tlm.types import TokenLogprobs
+
+NUM_TOKENS = 512
+TOP_K = 5
+NUM_REPEATS = 20
+VOCAB = [" the", " answer", " is", " Paris", ".", " Yes", " No", "\n", " because", " of"]
+
+
+def build_provider_logprobs() -> ChoiceLogprobs:
+    rng = random.Random(0)
+    content = []
+    for _ in range(NUM_TOKENS):
+        token = rng.choice(VOCAB)
+        logprob = math.log(rng.uniform(0.3, 1.0))
+        top_logprobs = [TopLogprob(token=token, logprob=logprob, bytes=list(token.encode()))]
+        top_logprobs += [
+            TopLogprob(token=alternative, logprob=logprob - rng.uniform(1, 5), bytes=list(alternative.encode()))
+            for alternative in rng.sample(VOCAB, TOP_K - 1)
+        ]
+        content.append(
+            ChatCompletionTokenLogprob(
+                token=token, logprob=logprob, bytes=list(token.encode()), top_logprobs=top_logprobs
+            )
+        )
+    return ChoiceLogprobs(content=content)
+
+
+def pydantic_round_trip(provider_logprobs: ChoiceLogprobs) -> tuple[ChoiceLogprobs, float]:
+    """Previous implementation: validate a dump of the provider logprobs, then loop over the tokens."""
+    logprobs = ChoiceLogprobs.model_validate(provider_logprobs.model_dump())
+    assert logprobs.content is not None
+    probabilities = []
+    for token_logprob in logprobs.content:
+        probability = math.exp(token_logprob.logprob)
+        for top_logprob in token_logprob.top_logprobs:
+            if top_logprob.token.strip().lower() == token_logprob.token.strip().lower() and (
+                top_logprob.token != token_logprob.token
+            ):
+                probability += math.exp(top_logprob.logprob)
+        probabilities.append(min(probability, 1.0))
+    return logprobs, sum(probabilities) / len(probabilities)
+
+
+def columnar(provider_logprobs: ChoiceLogprobs) -> tuple[TokenLogprobs | None, float]:
+    logprobs = TokenLogprobs.from_provider(provider_logprobs)
+    assert logprobs is not None
+    tokens = np.array([token.strip().lower() for token in logprobs.tokens], dtype=object)
+    top_tokens = np.array([[token.strip().lower() for token in row] for row in logprobs.top_tokens], dtype=object)
+    same_token = (top_tokens == tokens[:, None]) & (
+        logprobs.top_tokens != np.array(logprobs.tokens, dtype=object)[:, None]
+    )
+    probabilities = np.exp(logprobs.logprobs) + np.where(same_token, np.exp(logprobs.top_logprobs), 0).sum(axis=1)
+    return logprobs, float(np.minimum(probabilities, 1.0).mean())
+
+
+def measure(
+    convert: Callable[[ChoiceLogprobs], tuple[Any, float]], provider_logprobs: ChoiceLogprobs
+) -> tuple[float, int]:
+    """Returns the best wall time (seconds) and the traced allocation (bytes) of the stored logprobs."""
+    best_time = float("inf")
+    for _ in range(NUM_REPEATS):
+        start = time.perf_counter()
+        convert(provider_logprobs)
+        best_time = min(best_time, time.perf_counter() - start)
+
+    tracemalloc.start()
+    stored, _ = convert(provider_logprobs)
+    stored_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del stored
+
+    return best_time, stored_bytes
+
+
+def main() -> None:
+    provider_logprobs = build_provider_logprobs()
+
+    print(f"Completion: {NUM_TOKENS} tokens, top-{TOP_K} logprobs")
+    print("=" * 60)
+
+    baseline_time, baseline_bytes = measure(pydantic_round_trip, provider_logprobs)
+    current_time, current_bytes = measure(columnar, provider_logprobs)
+
+    print(f"{'':<20}{'time (ms)':>12}{'stored (KB)':>16}")
+    print(f"{'pydantic':<20}{baseline_time * 1000:>12.2f}{baseline_bytes / 1000:>16.1f}")
+    print(f"{'columnar':<20}{current_time * 1000:>12.2f}{current_bytes / 1000:>16.1f}")
+    print("=" * 60)
+    print(f"CPU speedup: {baseline_time / current_time:.1f}x")
+    print(f"Memory reduction: {baseline_bytes / max(current_bytes, 1):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
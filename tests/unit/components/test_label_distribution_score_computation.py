@@ -0,0 +1,92 @@
+import math
+
+import numpy as np
+import pytest
+from litellm.types.utils import ChatCompletionTokenLogprob, ChoiceLogprobs, TopLogprob
+
+from tlm.components.scores.label_distribution_score_computation import LabelDistributionScoreComputation
+from tlm.config.presets import ReasoningEffort
+from tlm.types import Completion, ExtractedResponseField
+from tlm.utils.scoring.label_distribution_scoring_utils import get_calibrated_label_score, get_label_distribution
+
+LABELS = ["positive", "negative", "neutral"]
+
+
+def _token_logprob(token: str, probability: float, top: dict[str, float] | None = None) -> ChatCompletionTokenLogprob:
+    top_logprobs = [TopLogprob(token=t, logprob=math.log(p), bytes=None) for t, p in (top or {}).items()]
+    return ChatCompletionTokenLogprob(token=token, logprob=math.log(probability), bytes=None, top_logprobs=top_logprobs)
+
+
+def _label_completion(answer: str, token_logprobs: list[ChatCompletionTokenLogprob]) -> Completion:
+    completion = Completion(
+        message="".join(token_logprob.token for token_logprob in token_logprobs),
+        logprobs=ChoiceLogprobs(content=token_logprobs),
+        original_response={},
+        template=None,
+    )
+    completion.add_response_field(ExtractedResponseField.ANSWER, answer)
+    return completion
+
+
+def test_label_distribution_from_top_logprobs() -> None:
+    completion = _label_completion(
+        "positive",
+        [
+            _token_logprob("Response", 1.0),
+            _token_logprob(":", 1.0),
+            _token_logprob(" positive", 0.7, top={" positive": 0.7, " neutral": 0.2, " Negative": 0.05, " I": 0.05}),
+        ],
+    )
+
+    label_distribution = get_label_distribution(completion, LABELS)
+
+    assert label_distribution is not None
+    np.testing.assert_allclose(label_distribution, [0.7, 0.05, 0.2])
+    # 5% of the probability mass did not fall on a label, so the score is shrunk towards the uniform distribution
+    assert get_calibrated_label_score(label_distribution, 0) == pytest.approx(0.95 * 0.7 / 0.95 + 0.05 / 3)
+
+
+def test_label_distribution_splits_shared_first_token() -> None:
+    labels = ["very positive", "very negative", "neutral"]
+    completion = _label_completion(
+        "very positive",
+        [
+            _token_logprob("very", 0.8, top={"very": 0.8, "neutral": 0.2}),
+            _token_logprob(" positive", 0.75),
+        ],
+    )
+
+    label_distribution = get_label_distribution(completion, labels)
+
+    assert label_distribution is not None
+    np.testing.assert_allclose(label_distribution, [0.6, 0.2, 0.2])
+
+
+def test_label_distribution_requires_top_logprobs() -> None:
+    completion = _label_completion("positive", [_token_logprob("positive", 0.9)])
+
+    assert get_label_distribution(completion, LABELS) is None
+
+
+@pytest.mark.asyncio
+async def test_scores_reference_answers_from_label_distribution() -> None:
+    completion = _label_completion(
+        "negative",
+        [_token_logprob("negative", 0.6, top={"negative": 0.6, "positive": 0.4})],
+    )
+    component = LabelDistributionScoreComputation(
+        completion_params={"model": "gpt-4.1-mini", "messages": [{"role": "user", "content": "Classify: meh"}]},
+        constrain_outputs=LABELS,
+        reasoning_effort=ReasoningEffort.NONE,
+        generate_label_completion=False,
+    )
+    component.execution_context.add("reference_completions", [completion])
+    component.execution_context.add("reference_answers", ["negative", "Positive", "unknown"])
+
+    await component.execute()
+
+    np.testing.assert_allclose(
+        component.execution_context.get("trustworthiness_scores"), [0.6, 0.4, 0.0], rtol=0, atol=2e-3
+    )
+    label_distribution = component.execution_context.get("label_distribution")
+    assert max(label_distribution, key=label_distribution.get) == "negative"
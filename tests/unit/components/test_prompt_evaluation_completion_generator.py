@@ -0,0 +1,37 @@
+from typing import Any
+
+import pytest
+
+from tlm.components.completions import prompt_evaluation_completion_generator
+from tlm.components.completions.prompt_evaluation_completion_generator import PromptEvaluationCompletionGenerator
+from tlm.config.presets import PromptLayout
+from tlm.types import Completion, CompletionTemplate
+from tlm.utils.cache_utils import LRUCache
+
+
+@pytest.mark.asyncio
+async def test_prompt_cache_is_keyed_on_prompt_layout(monkeypatch: pytest.MonkeyPatch) -> None:
+    templates_run: list[CompletionTemplate] = []
+
+    async def fake_generate_completion(template: CompletionTemplate, **_kwargs: Any) -> Completion:
+        templates_run.append(template)
+        return Completion(message="Yes", original_response={}, template=template)
+
+    monkeypatch.setattr(prompt_evaluation_completion_generator, "generate_completion", fake_generate_completion)
+    prompt_cache: LRUCache[str, Any] = LRUCache(max_size=10)
+
+    cached: list[bool] = []
+    for prompt_layout in (PromptLayout.DEFAULT, PromptLayout.PREFIX_CACHE, PromptLayout.DEFAULT):
+        component = PromptEvaluationCompletionGenerator(
+            prompt="What is the capital of France?",
+            temperature=0.0,
+            prompt_cache=prompt_cache,
+            prompt_layout=prompt_layout,
+        )
+        await component.execute()
+        cached.append(component.execution_context.get("prompt_evaluation_completions_cached"))
+
+    # a completion generated with one layout is not reused for the other
+    assert cached == [False, False, True]
+    assert len(templates_run) == 2
+    assert templates_run[0] is not templates_run[1]
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from tlm.components.response_assembly import ResponseAssembly
+from tlm.types import Completion, ExtractedResponseField, InferenceType
+
+
+def _reflection_completion(score: float) -> Completion:
+    completion = Completion(message=str(score), original_response={}, template=None)
+    completion.add_response_field(ExtractedResponseField.MAPPED_SCORE, score)
+    return completion
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("explain_best_response", "expected_explanation"),
+    [
+        (True, "Did not find a reason to doubt trustworthiness."),
+        # the mean score of both candidates and their mixed self reflections call for an explanation
+        (False, "Cannot verify that this response is correct."),
+    ],
+)
+async def test_best_response_is_explained_by_its_own_score(
+    explain_best_response: bool, expected_explanation: str
+) -> None:
+    component = ResponseAssembly(
+        model="gpt-4.1-mini",
+        response_type="completion",
+        inference_type=InferenceType.SCORE,
+        explain_best_response=explain_best_response,
+    )
+    component.execution_context.add("trustworthiness_scores", np.array([0.95, 0.2]))
+    component.execution_context.add("reference_answers", ["Paris", "Lyon"])
+    component.execution_context.add(
+        "reference_completions",
+        [Completion(message=answer, original_response={}, template=None) for answer in ("Paris", "Lyon")],
+    )
+    component.execution_context.add(
+        "self_reflection_completions",
+        [[_reflection_completion(1.0)], [_reflection_completion(0.0)]],
+    )
+
+    await component.execute()
+
+    assert component.execution_context.get("best_answer_idx") == 0
+    assert component.execution_context.get("explanation") == expected_explanation
@@ -0,0 +1,130 @@
+import json
+from typing import Any
+
+import pytest
+
+from tlm.components.completions import self_reflection_completion_generator
+from tlm.components.completions.self_reflection_completion_generator import SelfReflectionCompletionGenerator
+from tlm.config.presets import ReasoningEffort, WorkflowType
+from tlm.templates.reflection_completion_templates import SELF_REFLECTION_TEMPLATES_BY_WORKFLOW
+from tlm.types import Completion, CompletionTemplate, ExtractedResponseField, FieldMetadata, SOReflectionScoreConfigType
+from tlm.utils.math_utils import harmonic_mean
+
+
+def _patch_generate_completion(monkeypatch: pytest.MonkeyPatch, score: float) -> list[CompletionTemplate]:
+    templates_run: list[CompletionTemplate] = []
+
+    async def fake_generate_completion(template: CompletionTemplate, **kwargs: Any) -> Completion:
+        templates_run.append(template)
+        completion = Completion(message=str(score), original_response={}, template=template)
+        completion.add_response_field(ExtractedResponseField.MAPPED_SCORE, score)
+        return completion
+
+    monkeypatch.setattr(self_reflection_completion_generator, "generate_completion", fake_generate_completion)
+    return templates_run
+
+
+def _create_generator(staged: bool) -> SelfReflectionCompletionGenerator:
+    component = SelfReflectionCompletionGenerator(
+        prompt="What is the capital of France?",
+        reasoning_effort=ReasoningEffort.NONE,
+        workflow_type=WorkflowType.QA,
+        num_completions=-1,
+        staged=staged,
+        agreement_margin=0.1,
+    )
+    component.execution_context.add("reference_answers", ["Paris"])
+    return component
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("score", [0.0, 1.0])
+async def test_staged_self_reflection_stops_when_first_templates_agree(
+    monkeypatch: pytest.MonkeyPatch, score: float
+) -> None:
+    templates_run = _patch_generate_completion(monkeypatch, score)
+    component = _create_generator(staged=True)
+
+    await component.execute()
+
+    expected_templates = SELF_REFLECTION_TEMPLATES_BY_WORKFLOW[WorkflowType.QA][:2]
+    assert len(templates_run) == 2
+    assert component.execution_context.get("self_reflection_templates") == [expected_templates]
+    assert len(component.execution_context.get("self_reflection_completions")[0]) == 2
+
+
+@pytest.mark.asyncio
+async def test_staged_self_reflection_runs_all_templates_without_agreement(monkeypatch: pytest.MonkeyPatch) -> None:
+    templates_run = _patch_generate_completion(monkeypatch, 0.5)
+    component = _create_generator(staged=True)
+
+    await component.execute()
+
+    all_templates = SELF_REFLECTION_TEMPLATES_BY_WORKFLOW[WorkflowType.QA]
+    assert len(templates_run) == len(all_templates)
+    assert component.execution_context.get("self_reflection_templates") == [all_templates]
+    assert len(component.execution_context.get("self_reflection_completions")[0]) == len(all_templates)
+
+
+@pytest.mark.asyncio
+async def test_self_reflection_runs_all_templates_when_not_staged(monkeypatch: pytest.MonkeyPatch) -> None:
+    templates_run = _patch_generate_completion(monkeypatch, 1.0)
+    component = _create_generator(staged=False)
+
+    await component.execute()
+
+    assert len(templates_run) == len(SELF_REFLECTION_TEMPLATES_BY_WORKFLOW[WorkflowType.QA])
+
+
+@pytest.mark.asyncio
+async def test_per_field_self_reflection_runs_on_field_chunks(monkeypatch: pytest.MonkeyPatch) -> None:
+    answer = json.dumps({f"field_{idx}": idx for idx in range(5)})
+    answers_judged: list[str] = []
+
+    async def fake_generate_completion(template: CompletionTemplate, **kwargs: Any) -> Completion:
+        answers_judged.append(kwargs["template_kwargs"]["answer"])
+        completion = Completion(message="{}", original_response={}, template=template)
+        if template.so_reflection_score_config_type is None:
+            completion.add_response_field(ExtractedResponseField.MAPPED_SCORE, 1.0)
+            return completion
+
+        completion.per_field_metadata = {
+            field_name: FieldMetadata(score=0.5 if field_name == "field_3" else 1.0)
+            for field_name in json.loads(kwargs["reference_answer"])
+        }
+        completion.add_response_field(ExtractedResponseField.MAPPED_SCORE, 0.9)
+        return completion
+
+    monkeypatch.setattr(self_reflection_completion_generator, "generate_completion", fake_generate_completion)
+    component = SelfReflectionCompletionGenerator(
+        prompt="Extract the fields",
+        reasoning_effort=ReasoningEffort.LOW,
+        workflow_type=WorkflowType.STRUCTURED_OUTPUT_SCORING,
+        num_completions=-1,
+        field_chunk_size=2,
+    )
+    component.execution_context.add("reference_answers", [answer])
+
+    await component.execute()
+
+    completions = component.execution_context.get("self_reflection_completions")[0]
+    assert len(completions) == len(SELF_REFLECTION_TEMPLATES_BY_WORKFLOW[WorkflowType.STRUCTURED_OUTPUT_SCORING])
+    num_field_templates = sum(
+        completion.template.so_reflection_score_config_type is not None for completion in completions
+    )
+    assert num_field_templates > 0
+    assert len(answers_judged) == len(completions) + 2 * num_field_templates
+    assert json.dumps({"field_4": 4}) in answers_judged
+
+    for completion in completions:
+        config_type = completion.template.so_reflection_score_config_type
+        if config_type == SOReflectionScoreConfigType.PER_FIELD:
+            assert set(completion.per_field_metadata) == {f"field_{idx}" for idx in range(5)}
+            assert completion.response_fields[ExtractedResponseField.MAPPED_SCORE] == pytest.approx(
+                harmonic_mean([1.0, 1.0, 1.0, 0.5, 1.0])
+            )
+        elif config_type == SOReflectionScoreConfigType.INCORRECT_FIELDS:
+            assert set(completion.per_field_metadata) == {f"field_{idx}" for idx in range(5)}
+            assert completion.response_fields[ExtractedResponseField.MAPPED_SCORE] == pytest.approx(
+                harmonic_mean([0.9, 0.9, 0.9])
+            )
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from tlm.components.scores.self_reflection_score_computation import SelfReflectionScoreComputation
+from tlm.types import Completion, ExtractedResponseField
+
+
+def _reflection_completion(score: float) -> Completion:
+    completion = Completion(message=str(score), original_response={}, template=None)
+    completion.add_response_field(ExtractedResponseField.MAPPED_SCORE, score)
+    return completion
+
+
+@pytest.mark.asyncio
+async def test_self_reflection_scores_are_not_mixed_between_reference_answers() -> None:
+    component = SelfReflectionScoreComputation()
+    component.execution_context.add("reference_answers", ["Paris", "Lyon"])
+    # one row per reference answer, one column per reflection template
+    component.execution_context.add(
+        "self_reflection_completions",
+        [
+            [_reflection_completion(1.0), _reflection_completion(0.8)],
+            [_reflection_completion(0.0), _reflection_completion(0.2)],
+        ],
+    )
+
+    await component.execute()
+
+    # each answer is scored by its own row only (the column-major reshape used before averaged 1.0 with 0.0)
+    np.testing.assert_allclose(component.execution_context.get("self_reflection_scores"), [0.9, 0.1])
@@ -0,0 +1,244 @@
+import json
+import math
+from typing import Any
+
+import pytest
+from litellm.types.utils import ChatCompletionTokenLogprob, ChoiceLogprobs, TopLogprob
+
+from tlm.components import semantic_evaluation_score_generator
+from tlm.components.semantic_evaluation_score_generator import SemanticEvaluationScoreGenerator
+from tlm.config.presets import ReasoningEffort
+from tlm.templates import BatchedSemanticEvaluationCompletionTemplate
+from tlm.types import Completion, CompletionTemplate, Eval, ExtractedResponseField
+from tlm.utils.cache_utils import LRUCache
+from tlm.utils.eval_utils import group_evals
+from tlm.utils.scoring.semantic_evaluation_scoring_utils import (
+    DEFAULT_RAG_EVALS,
+    get_batched_semantic_evaluation_scores,
+)
+
+EVALS = [
+    Eval(
+        name="groundedness",
+        criteria="Is the {Response} grounded?",
+        context_identifier="Context",
+        response_identifier="Response",
+    ),
+    Eval(
+        name="completeness",
+        criteria="Is the Response complete?",
+        context_identifier="Context",
+        response_identifier="Response",
+    ),
+    Eval(
+        name="helpfulness",
+        criteria="Is the Response helpful?",
+        query_identifier="Query",
+        response_identifier="Response",
+    ),
+]
+EVAL_RATINGS = {"groundedness": 5, "completeness": 3, "helpfulness": 1}
+
+
+def _patch_generate_completion(
+    monkeypatch: pytest.MonkeyPatch, batched_ratings: dict[str, Any]
+) -> list[CompletionTemplate]:
+    templates_run: list[CompletionTemplate] = []
+
+    async def fake_generate_completion(template: CompletionTemplate, **kwargs: Any) -> Completion:
+        templates_run.append(template)
+        if isinstance(template, BatchedSemanticEvaluationCompletionTemplate):
+            message = json.dumps(
+                {name: batched_ratings[name] for name in template.eval_names if name in batched_ratings}
+            )
+            return Completion(message=message, original_response={}, template=template)
+
+        eval_name = next(eval.name for eval in EVALS if eval.criteria == kwargs["template_kwargs"]["eval_criteria"])
+        completion = Completion(message="", original_response={}, template=template)
+        completion.add_response_field(ExtractedResponseField.MAPPED_SCORE, (EVAL_RATINGS[eval_name] - 1) / 4)
+        return completion
+
+    monkeypatch.setattr(semantic_evaluation_score_generator, "generate_completion", fake_generate_completion)
+    return templates_run
+
+
+def _create_generator(
+    batch_evals: bool,
+    eval_cache: LRUCache[str, float] | None = None,
+    reference_answers: list[str] | None = None,
+) -> SemanticEvaluationScoreGenerator:
+    component = SemanticEvaluationScoreGenerator(
+        query="What is the capital of France?",
+        context="Paris is the capital of France.",
+        evals=EVALS,
+        reasoning_effort=ReasoningEffort.NONE,
+        temperature=0.0,
+        batch_evals=batch_evals,
+        eval_cache=eval_cache,
+    )
+    component.execution_context.add("reference_answers", reference_answers or ["Paris", "Paris, France"])
+    return component
+
+
+async def _get_unbatched_scores(monkeypatch: pytest.MonkeyPatch) -> dict[str, float]:
+    _patch_generate_completion(monkeypatch, {})
+    component = _create_generator(batch_evals=False)
+    await component.execute()
+    scores = component.execution_context.get("evals_requiring_response")
+    assert all(score is not None for score in scores.values())
+    return scores
+
+
+@pytest.mark.asyncio
+async def test_batched_semantic_evaluation_rates_evals_of_a_response_in_one_call(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    unbatched_scores = await _get_unbatched_scores(monkeypatch)
+    templates_run = _patch_generate_completion(
+        monkeypatch, {name: {"rating": rating} for name, rating in EVAL_RATINGS.items()}
+    )
+    component = _create_generator(batch_evals=True)
+
+    await component.execute()
+
+    # one batched call for all evals per reference answer, although they use different inputs
+    assert len(templates_run) == 2
+    assert all(isinstance(template, BatchedSemanticEvaluationCompletionTemplate) for template in templates_run)
+    assert templates_run[0].eval_names == ["groundedness", "completeness", "helpfulness"]
+    assert component.execution_context.get("evals_requiring_response") == unbatched_scores
+    assert len(component.plan()) == 2
+
+
+@pytest.mark.asyncio
+async def test_batched_semantic_evaluation_falls_back_to_single_eval_calls(monkeypatch: pytest.MonkeyPatch) -> None:
+    unbatched_scores = await _get_unbatched_scores(monkeypatch)
+    templates_run = _patch_generate_completion(
+        monkeypatch, {"groundedness": {"rating": 5}, "completeness": {"rating": "not a rating"}}
+    )
+    component = _create_generator(batch_evals=True)
+
+    await component.execute()
+
+    # the unparseable completeness and missing helpfulness ratings are re-scored with their own call for each
+    # reference answer
+    assert len(templates_run) == 6
+    assert component.execution_context.get("evals_requiring_response") == unbatched_scores
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("batch_evals", [False, True])
+async def test_eval_cache_skips_calls_for_repeated_inputs(monkeypatch: pytest.MonkeyPatch, batch_evals: bool) -> None:
+    unbatched_scores = await _get_unbatched_scores(monkeypatch)
+    templates_run = _patch_generate_completion(
+        monkeypatch, {name: {"rating": rating} for name, rating in EVAL_RATINGS.items()}
+    )
+    eval_cache: LRUCache[str, float] = LRUCache(max_size=100)
+
+    first_component = _create_generator(batch_evals, eval_cache)
+    await first_component.execute()
+    num_calls = len(templates_run)
+    second_component = _create_generator(batch_evals, eval_cache)
+    await second_component.execute()
+
+    assert len(templates_run) == num_calls
+    assert second_component.execution_context.get("evals_requiring_response") == unbatched_scores
+    assert second_component.execution_context.get("evals_requiring_response_cache_hits") == 6
+    assert eval_cache.get_stats()["hit_rate"] == 0.5
+
+    # only the pairs of the new reference answer are scored
+    third_component = _create_generator(batch_evals, eval_cache, reference_answers=["Paris", "Lyon"])
+    await third_component.execute()
+    assert third_component.execution_context.get("evals_requiring_response_cache_hits") == 3
+    assert len(templates_run) == num_calls + (1 if batch_evals else 3)
+
+
+@pytest.mark.asyncio
+async def test_batched_semantic_evaluation_batches_default_rag_evals(monkeypatch: pytest.MonkeyPatch) -> None:
+    templates_run: list[CompletionTemplate] = []
+
+    async def fake_generate_completion(template: CompletionTemplate, **kwargs: Any) -> Completion:
+        templates_run.append(template)
+        assert isinstance(template, BatchedSemanticEvaluationCompletionTemplate)
+        message = json.dumps({name: {"rating": 4} for name in template.eval_names})
+        return Completion(message=message, original_response={}, template=template)
+
+    monkeypatch.setattr(semantic_evaluation_score_generator, "generate_completion", fake_generate_completion)
+    evals_requiring_response, evals_not_requiring_response = group_evals(DEFAULT_RAG_EVALS)
+
+    for evals in (evals_not_requiring_response, evals_requiring_response):
+        component = SemanticEvaluationScoreGenerator(
+            query="How much water does the bottle hold?",
+            context="The Simple Water Bottle holds 27 oz.",
+            evals=evals,
+            reasoning_effort=ReasoningEffort.NONE,
+            temperature=0.0,
+            batch_evals=True,
+        )
+        component.execution_context.add("reference_answers", ["27 oz"])
+        await component.execute()
+
+    # one call per group instead of one per eval, with the context sent once per group
+    assert len(templates_run) == 2
+    assert [template.eval_names for template in templates_run] == [
+        [eval.name for eval in evals_not_requiring_response],
+        [eval.name for eval in evals_requiring_response],
+    ]
+    assert all(template.prompt_template.count("{context}") == 1 for template in templates_run)
+
+
+def test_batched_semantic_evaluation_scores_use_rating_logprobs() -> None:
+    evals = EVALS[:2]
+    template = BatchedSemanticEvaluationCompletionTemplate.create(
+        evals=tuple(evals), reasoning_effort=ReasoningEffort.NONE
+    )
+    tokens = [
+        ('{"groundedness": {"rating": ', {}),
+        ("4", {"4": 0.6, "5": 0.3, "3": 0.1}),
+        ('}, "completeness": {"rating":', {}),
+        (" 2", {" 2": 1.0}),
+        ("}}", {}),
+    ]
+    logprobs = ChoiceLogprobs(
+        content=[
+            ChatCompletionTokenLogprob(
+                token=token,
+                logprob=0.0,
+                bytes=None,
+                top_logprobs=[
+                    TopLogprob(token=t, logprob=math.log(p), bytes=None) for t, p in (top or {token: 1.0}).items()
+                ],
+            )
+            for token, top in tokens
+        ]
+    )
+    completion = Completion(
+        message="".join(token for token, _ in tokens), logprobs=logprobs, original_response={}, template=template
+    )
+
+    scores = get_batched_semantic_evaluation_scores(completion, evals)
+
+    # expected value of the rating token, as for single eval ratings (with a 1e-3 floor for each rating)
+    assert scores[0] == pytest.approx((3 * 0.6 + 4 * 0.3 + 2 * 0.1) / 4, abs=2e-3)
+    assert scores[1] == pytest.approx(0.25, abs=2e-3)
+    # without logprobs, the ratings are mapped
+    assert get_batched_semantic_evaluation_scores(
+        Completion(message=completion.message, original_response={}, template=template), evals
+    ) == [0.75, 0.25]
+
+
+def test_evals_without_inputs_are_not_batched() -> None:
+    eval_without_inputs = Eval(name="politeness", criteria="Is the tone polite?")
+    template = BatchedSemanticEvaluationCompletionTemplate.create(
+        evals=(EVALS[2], eval_without_inputs), reasoning_effort=ReasoningEffort.LOW
+    )
+    assert template.eval_names == ["helpfulness", "politeness"]
+
+    component = SemanticEvaluationScoreGenerator(
+        query="What is the capital of France?",
+        context="Paris is the capital of France.",
+        evals=[eval_without_inputs, *EVALS],
+        reasoning_effort=ReasoningEffort.NONE,
+        temperature=0.0,
+        batch_evals=True,
+    )
+    assert component._get_eval_batches() == [[1, 2, 3], [0]]
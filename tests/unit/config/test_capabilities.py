@@ -0,0 +1,51 @@
+from tlm.config.capabilities import get_model_capabilities
+from tlm.config.models import BEDROCK_MODEL_TO_INFERENCE_PROFILE_ID, CLAUDE_3_5_HAIKU, GPT_4_1_MINI, O3_MINI
+from tlm.config.presets import ReasoningEffort
+from tlm.templates import ReferenceCompletionTemplate
+
+
+def test_get_model_capabilities_is_cached() -> None:
+    assert get_model_capabilities(GPT_4_1_MINI) is get_model_capabilities(GPT_4_1_MINI)
+    assert get_model_capabilities(GPT_4_1_MINI) is not get_model_capabilities(GPT_4_1_MINI, api_base="http://x")
+
+
+def test_openai_model_capabilities() -> None:
+    capabilities = get_model_capabilities(GPT_4_1_MINI)
+
+    assert capabilities.model == GPT_4_1_MINI
+    assert capabilities.provider == "openai"
+    assert capabilities.inference_profile_id is None
+    assert capabilities.supports_logprobs
+    assert capabilities.supports_top_logprobs
+    assert capabilities.supports_n
+    assert capabilities.supports_structured_outputs
+    assert capabilities.max_input_tokens is not None
+
+
+def test_bedrock_model_capabilities() -> None:
+    capabilities = get_model_capabilities(CLAUDE_3_5_HAIKU)
+
+    assert capabilities.provider == "bedrock"
+    assert capabilities.model == BEDROCK_MODEL_TO_INFERENCE_PROFILE_ID[CLAUDE_3_5_HAIKU]
+    assert capabilities.inference_profile_id == capabilities.model
+    assert not capabilities.supports_logprobs
+
+
+def test_unknown_model_capabilities() -> None:
+    capabilities = get_model_capabilities("my-finetuned-model", provider="openai")
+
+    assert capabilities.model == "my-finetuned-model"
+    assert not capabilities.supports_reasoning
+    assert capabilities.max_input_tokens is None
+
+
+def test_completion_param_overrides_use_capabilities() -> None:
+    template = ReferenceCompletionTemplate.create(reasoning_effort=ReasoningEffort.NONE)
+
+    overrides = template.get_completion_param_overrides(get_model_capabilities(GPT_4_1_MINI))
+    assert overrides["logprobs"] is True
+    assert overrides["top_logprobs"] is not None
+
+    overrides = template.get_completion_param_overrides(get_model_capabilities(O3_MINI))
+    assert overrides["logprobs"] is False
+    assert overrides["top_logprobs"] is None
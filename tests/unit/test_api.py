@@ -0,0 +1,361 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import litellm
+import numpy as np
+import pytest
+
+from tlm import api, inference
+from tlm.api import TLM
+from tlm.config.base import BaseConfig
+from tlm.config.presets import QualityPreset, ReasoningEffort, WorkflowType
+from tlm.config.schema import Config
+from tlm.types import SimilarityMeasure
+from tlm.utils import completion_utils
+
+NUM_THREADS = 8
+
+
+def test_background_loop_serves_concurrent_threads(monkeypatch: pytest.MonkeyPatch) -> None:
+    event_loops: set[asyncio.AbstractEventLoop] = set()
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_tlm_inference(**kwargs: Any) -> dict[str, Any]:
+        nonlocal in_flight, max_in_flight
+        event_loops.add(asyncio.get_running_loop())
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return {"response": kwargs["completion_params"]["messages"][0]["content"]}
+
+    monkeypatch.setattr(api, "tlm_inference", fake_tlm_inference)
+
+    with TLM(use_background_loop=True) as tlm, ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
+        results = list(
+            executor.map(
+                lambda i: tlm.create(model="gpt-4.1-mini", messages=[{"role": "user", "content": str(i)}]),
+                range(NUM_THREADS),
+            )
+        )
+
+    assert [result["response"] for result in results] == [str(i) for i in range(NUM_THREADS)]
+    assert len(event_loops) == 1
+    assert max_in_flight > 1
+    assert not any(thread.name == "tlm-event-loop" for thread in threading.enumerate())
+
+
+def test_background_loop_calls_fail_once_closed(monkeypatch: pytest.MonkeyPatch) -> None:
+    started = threading.Event()
+
+    async def blocking_tlm_inference(**_kwargs: Any) -> dict[str, Any]:
+        started.set()
+        await asyncio.Event().wait()
+        return {}
+
+    monkeypatch.setattr(api, "tlm_inference", blocking_tlm_inference)
+    openai_kwargs: dict[str, Any] = {"model": "gpt-4.1-mini", "messages": [{"role": "user", "content": "Hi"}]}
+    tlm = TLM(use_background_loop=True)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        in_flight_call = executor.submit(lambda: tlm.create(**openai_kwargs))
+        assert started.wait(timeout=5)
+        tlm.close()
+
+        # the call in flight during close() is cancelled instead of waiting forever
+        with pytest.raises(RuntimeError, match="TLM instance is closed"):
+            in_flight_call.result(timeout=5)
+
+    with pytest.raises(RuntimeError, match="TLM instance is closed"):
+        tlm.create(**openai_kwargs)
+    tlm.close()
+
+
+def test_close_is_noop_without_background_loop() -> None:
+    tlm = TLM()
+    tlm.close()
+
+
+def _count_llm_calls(monkeypatch: pytest.MonkeyPatch) -> list[dict[str, Any]]:
+    calls: list[dict[str, Any]] = []
+
+    async def counting_acompletion(**kwargs: Any) -> Any:
+        calls.append(kwargs)
+        return await litellm.acompletion(**kwargs, mock_response="Paris")
+
+    monkeypatch.setattr(completion_utils, "acompletion", counting_acompletion)
+    return calls
+
+
+def _chat_completion(content: str) -> dict[str, Any]:
+    return {"chat_completion": {"choices": [{"message": {"role": "assistant", "content": content}}]}}
+
+
+def test_score_many_shares_prompt_only_completions(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = _count_llm_calls(monkeypatch)
+    tlm = TLM(config=Config(quality_preset=QualityPreset.HIGH, similarity_measure=SimilarityMeasure.JACCARD))
+    openai_kwargs: dict[str, Any] = {
+        "model": "gpt-4.1-mini",
+        "messages": [{"role": "user", "content": "What is the capital of France?"}],
+    }
+
+    tlm.score(response=_chat_completion("Paris"), **openai_kwargs)
+    num_single_calls = len(calls)
+    calls.clear()
+
+    candidates = ["Paris", "London", "Paris, France"]
+    result = tlm.score_many(responses=[_chat_completion(candidate) for candidate in candidates], **openai_kwargs)
+
+    assert len(result["trustworthiness_scores"]) == len(candidates)
+    assert 0 <= result["best_index"] < len(candidates)
+    assert result["best_response"] == _chat_completion(candidates[result["best_index"]])
+    assert len(calls) < len(candidates) * num_single_calls
+
+
+def test_score_many_requires_responses() -> None:
+    with pytest.raises(ValueError, match="responses must contain at least one response"):
+        TLM().score_many(responses=[], model="gpt-4.1-mini", messages=[{"role": "user", "content": "Hi"}])
+
+
+def test_prompt_cache_skips_prompt_only_completions(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = _count_llm_calls(monkeypatch)
+    tlm = TLM(
+        config=Config(
+            quality_preset=QualityPreset.HIGH,
+            similarity_measure=SimilarityMeasure.JACCARD,
+            use_prompt_evaluation=True,
+            use_prompt_cache=True,
+        )
+    )
+    openai_kwargs: dict[str, Any] = {
+        "model": "gpt-4.1-mini",
+        "messages": [{"role": "user", "content": "What is the capital of France?"}],
+    }
+
+    first_result = tlm.score(response=_chat_completion("Paris"), **openai_kwargs)
+    num_first_calls = len(calls)
+    calls.clear()
+    second_result = tlm.score(response=_chat_completion("London"), **openai_kwargs)
+
+    assert first_result["metadata"] == {"prompt_cache": {"observed_consistency": False, "prompt_evaluation": False}}
+    assert second_result["metadata"] == {"prompt_cache": {"observed_consistency": True, "prompt_evaluation": True}}
+    # 4 observed consistency completions (HIGH preset) + 1 prompt evaluation completion are reused
+    assert len(calls) == num_first_calls - 5
+
+
+def test_usage_includes_all_llm_calls(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = _count_llm_calls(monkeypatch)
+    tlm = TLM(config=Config(quality_preset=QualityPreset.HIGH, similarity_measure=SimilarityMeasure.JACCARD))
+    openai_kwargs: dict[str, Any] = {
+        "model": "gpt-4.1-mini",
+        "messages": [{"role": "user", "content": "What is the capital of France?"}],
+    }
+
+    result = tlm.score(response=_chat_completion("Paris"), **openai_kwargs)
+    tlm.score(response=_chat_completion("Paris"), **openai_kwargs)
+
+    usage = result["usage"]
+    assert usage["total"]["num_calls"] == len(calls) // 2
+    assert usage["by_component"]["ObservedConsistencyCompletionGenerator"]["gpt-4.1-mini"]["num_calls"] == 4
+    assert "SelfReflectionCompletionGenerator" in usage["by_component"]
+    assert usage["total"]["total_tokens"] > 0
+    assert tlm.get_usage_totals()["total"]["num_calls"] == len(calls)
+
+    tlm.reset_usage_totals()
+    assert tlm.get_usage_totals()["total"]["num_calls"] == 0
+
+
+def test_escalation_reuses_initial_completions(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = _count_llm_calls(monkeypatch)
+    openai_kwargs: dict[str, Any] = {
+        "model": "gpt-4.1-mini",
+        "messages": [{"role": "user", "content": "What is the capital of France?"}],
+    }
+
+    low_result = TLM(config=Config(quality_preset=QualityPreset.LOW)).create(**openai_kwargs)
+    num_low_calls = len(calls)
+    calls.clear()
+
+    TLM(config=Config(quality_preset=QualityPreset.HIGH)).create(**openai_kwargs)
+    num_high_calls = len(calls)
+    calls.clear()
+
+    escalated_result = TLM(
+        config=Config(
+            quality_preset=QualityPreset.LOW,
+            escalation_quality_preset=QualityPreset.HIGH,
+            escalation_score_range=(0.0, 1.0),
+        )
+    ).create(**openai_kwargs)
+
+    # the reference answer and self reflection completions of the LOW run are reused, only the consistency samples are added
+    assert len(calls) == num_high_calls
+    assert num_low_calls < num_high_calls
+    assert escalated_result["metadata"]["escalation"] == {
+        "escalated": True,
+        "initial_trustworthiness_score": low_result["trustworthiness_score"],
+    }
+
+
+@pytest.mark.parametrize(
+    ("trustworthiness_score", "expected"),
+    [(0.1, False), (0.3, True), (0.6, True), (0.95, False), (None, True)],
+)
+def test_should_escalate_within_score_range(trustworthiness_score: float | None, expected: bool) -> None:
+    config = BaseConfig.from_input(
+        Config(
+            quality_preset=QualityPreset.BASE,
+            escalation_quality_preset=QualityPreset.BEST,
+            escalation_score_range=(0.3, 0.8),
+        ),
+        WorkflowType.QA,
+        model=None,
+    )
+
+    assert inference._should_escalate(trustworthiness_score, config) is expected
+    assert config.escalation_config is not None
+    assert config.escalation_config.num_consistency_completions == 8
+
+
+def test_defer_explanation_scores_without_reasoning() -> None:
+    config = BaseConfig.from_input(
+        Config(reasoning_effort=ReasoningEffort.HIGH, defer_explanation=True), WorkflowType.QA, model=None
+    )
+
+    assert config.reasoning_effort == ReasoningEffort.NONE
+    assert config.explanation_reasoning_effort == ReasoningEffort.HIGH
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("trustworthiness_score", "num_calls"), [(0.2, 1), (0.95, 0), (None, 0)])
+async def test_deferred_explanation_only_below_threshold(
+    monkeypatch: pytest.MonkeyPatch, trustworthiness_score: float | None, num_calls: int
+) -> None:
+    calls = _count_llm_calls(monkeypatch)
+    config = BaseConfig.from_input(Config(defer_explanation=True), WorkflowType.QA, model=None)
+    results: dict[str, Any] = {
+        "reference_answers": ["Lyon"],
+        "best_answer_idx": 0,
+        "explanation": "Cannot verify that this response is correct.",
+    }
+
+    await inference._add_deferred_explanation(
+        results,
+        {"messages": [{"role": "user", "content": "What is the capital of France?"}]},
+        config,
+        trustworthiness_score=trustworthiness_score,
+    )
+
+    assert len(calls) == num_calls
+    expected_explanation = "Paris" if num_calls else "Cannot verify that this response is correct."
+    assert results["explanation"] == expected_explanation
+
+
+class _FakeScoreManyPipeline:
+    def __init__(self, results: dict[str, Any]) -> None:
+        self.results = results
+
+    async def run(self) -> dict[str, Any]:
+        return self.results
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("trustworthiness_scores", "num_calls"), [([0.95, 0.05], 0), ([0.4, 0.05], 1)])
+async def test_score_many_deferred_explanation_uses_best_score(
+    monkeypatch: pytest.MonkeyPatch, trustworthiness_scores: list[float], num_calls: int
+) -> None:
+    calls = _count_llm_calls(monkeypatch)
+    config = BaseConfig.from_input(Config(defer_explanation=True), WorkflowType.QA, model=None)
+    results: dict[str, Any] = {
+        # the mean over candidates is below the explainability threshold in both cases
+        "trustworthiness_score": float(np.mean(trustworthiness_scores)),
+        "trustworthiness_scores": trustworthiness_scores,
+        "reference_answers": ["Paris", "Lyon"],
+        "best_answer_idx": 0,
+        "best_response": "Paris",
+        "explanation": None,
+    }
+    monkeypatch.setattr(inference.PipelineFactory, "create", lambda **_: _FakeScoreManyPipeline(results))
+
+    result = await inference.tlm_score_many(
+        completion_params={"messages": [{"role": "user", "content": "What is the capital of France?"}]},
+        responses=[{"content": "Paris"}, {"content": "Lyon"}],
+        evals=None,
+        context=None,
+        config=config,
+    )
+
+    assert len(calls) == num_calls
+    assert (result["explanation"] is not None) == bool(num_calls)
+
+
+@pytest.mark.asyncio
+async def test_score_many_warns_that_escalation_is_not_applied(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    config = BaseConfig.from_input(
+        Config(quality_preset=QualityPreset.BASE, escalation_quality_preset=QualityPreset.HIGH),
+        WorkflowType.QA,
+        model=None,
+    )
+    results: dict[str, Any] = {
+        "trustworthiness_score": 0.5,
+        "trustworthiness_scores": [0.5],
+        "reference_answers": ["Paris"],
+        "best_answer_idx": 0,
+        "best_response": "Paris",
+    }
+    monkeypatch.setattr(inference.PipelineFactory, "create", lambda **_: _FakeScoreManyPipeline(results))
+
+    with caplog.at_level(logging.WARNING, logger=inference.__name__):
+        await inference.tlm_score_many(
+            completion_params={"messages": [{"role": "user", "content": "What is the capital of France?"}]},
+            responses=[{"content": "Paris"}],
+            evals=None,
+            context=None,
+            config=config,
+        )
+
+    assert "escalation_quality_preset is not applied" in caplog.text
+
+
+def test_explain_makes_single_call(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = _count_llm_calls(monkeypatch)
+    tlm = TLM(config=Config(quality_preset=QualityPreset.BASE))
+    openai_kwargs: dict[str, Any] = {
+        "model": "gpt-4.1-mini",
+        "messages": [{"role": "user", "content": "What is the capital of France?"}],
+    }
+    result = tlm.score(response=_chat_completion("Lyon"), **openai_kwargs)
+    calls.clear()
+
+    explanation = tlm.explain(result, **openai_kwargs)
+
+    assert explanation == "Paris"
+    assert len(calls) == 1
+    assert "Lyon" in calls[0]["messages"][-1]["content"]
+    explanation_usage = tlm.get_usage_totals()["by_component"][inference.DEFERRED_EXPLANATION_COMPONENT]
+    assert sum(model_usage["num_calls"] for model_usage in explanation_usage.values()) == 1
+
+
+@pytest.mark.parametrize("score", [False, True])
+def test_logprob_fast_mode_makes_single_call(monkeypatch: pytest.MonkeyPatch, score: bool) -> None:
+    calls = _count_llm_calls(monkeypatch)
+    tlm = TLM(config=Config(constrain_outputs=["Paris", "London"], use_logprob_fast_mode=True))
+    openai_kwargs: dict[str, Any] = {
+        "model": "gpt-4.1-mini",
+        "messages": [{"role": "user", "content": "What is the capital of France? Answer Paris or London."}],
+    }
+
+    result = tlm.score(response=_chat_completion("Paris"), **openai_kwargs) if score else tlm.create(**openai_kwargs)
+
+    assert len(calls) == 1
+    assert calls[0]["top_logprobs"] is not None
+    assert set(result["usage"]["by_component"]) <= {
+        "ReferenceCompletionGenerator",
+        "LabelDistributionScoreComputation",
+    }
@@ -0,0 +1,68 @@
+from typing import Any
+
+import pytest
+
+from tlm import planning
+from tlm.api import TLM
+from tlm.config.presets import QualityPreset, WorkflowType
+from tlm.config.schema import Config
+from tlm.planning import InferencePlan
+from tlm.templates.reflection_completion_templates import SELF_REFLECTION_TEMPLATES_BY_WORKFLOW
+
+OPENAI_KWARGS: dict[str, Any] = {
+    "model": "gpt-4.1-mini",
+    "messages": [{"role": "user", "content": "What is the capital of France?"}],
+}
+
+
+@pytest.fixture(autouse=True)
+def approximate_token_count(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(planning, "get_token_counts", lambda texts, _model: [len(text.split()) for text in texts])
+
+
+def _calls_per_component(plan: InferencePlan) -> dict[str, int]:
+    return {component.component: component.num_llm_calls for component in plan.components}
+
+
+def test_plan_create() -> None:
+    tlm = TLM(config=Config(quality_preset=QualityPreset.HIGH))
+
+    plan = tlm.plan(**OPENAI_KWARGS)
+
+    assert _calls_per_component(plan) == {
+        "ReferenceCompletionGenerator": 1,
+        "ObservedConsistencyCompletionGenerator": 4,
+        "SelfReflectionCompletionGenerator": len(SELF_REFLECTION_TEMPLATES_BY_WORKFLOW[WorkflowType.QA]),
+        "ConsistencyScoreComputation": 1,
+    }
+    assert plan.num_llm_calls == sum(_calls_per_component(plan).values())
+    assert plan.estimated_input_tokens > 0
+    assert plan.estimated_output_tokens > 0
+    assert plan.estimated_cost_per_model["gpt-4.1-mini"] > 0
+
+
+def test_plan_score_does_not_generate_reference() -> None:
+    tlm = TLM(config=Config(quality_preset=QualityPreset.BASE))
+    response = {"chat_completion": {"choices": [{"message": {"role": "assistant", "content": "Paris"}}]}}
+
+    plan = tlm.plan(response=response, **OPENAI_KWARGS)
+
+    assert "ReferenceCompletionGenerator" not in _calls_per_component(plan)
+    assert "ObservedConsistencyCompletionGenerator" not in _calls_per_component(plan)
+
+
+def test_plan_batch_aggregates_requests() -> None:
+    tlm = TLM(config=Config(quality_preset=QualityPreset.HIGH))
+    single_plan = tlm.plan(**OPENAI_KWARGS)
+
+    batch_plan = tlm.plan_batch([OPENAI_KWARGS] * 3)
+
+    assert batch_plan.num_requests == 3
+    assert batch_plan.num_llm_calls == 3 * single_plan.num_llm_calls
+    assert batch_plan.estimated_input_tokens == 3 * single_plan.estimated_input_tokens
+    assert batch_plan.model_dump()["num_llm_calls"] == batch_plan.num_llm_calls
+
+
+def test_estimate_cost_of_unknown_model() -> None:
+    assert planning.estimate_cost("gpt-4.1-mini", input_tokens=1000, output_tokens=100) > 0
+    assert planning.estimate_cost("my-finetuned-model", input_tokens=1000, output_tokens=100) is None
@@ -0,0 +1,141 @@
+import pytest
+
+from tlm.config.presets import ReasoningEffort
+from tlm.templates import SemanticEvaluationCompletionTemplate
+from tlm.templates.reflection_completion_templates import (
+    ReflectionCertaintyTemplate,
+    ReflectionSOPerScoreCorrectnessTemplate,
+    SelfReflectionSOFieldAccuracyConfig,
+)
+from tlm.templates.template_cache import get_cached_template
+from tlm.types import Eval
+from tlm.utils import cache_utils
+from tlm.utils.cache_utils import LRUCache, hash_cache_key, make_cache_key
+from tlm.utils.response_format_utils import get_response_format_model, get_response_format_param
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    cache: LRUCache[str, int] = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_lru_cache_reports_hit_rate() -> None:
+    cache: LRUCache[str, int] = LRUCache(max_size=2)
+    assert cache.get_stats()["hit_rate"] is None
+
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    assert cache.get_stats() == {"size": 1, "max_size": 2, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_lru_cache_rejects_non_positive_size() -> None:
+    with pytest.raises(ValueError, match="max_size must be positive"):
+        LRUCache(max_size=0)
+
+
+def test_make_cache_key_is_order_independent() -> None:
+    assert make_cache_key({"a": [1, 2], "b": None}) == make_cache_key({"b": None, "a": [1, 2]})
+    assert make_cache_key({"a": [1, 2]}) != make_cache_key({"a": [2, 1]})
+
+
+def test_get_cached_template_reuses_instances() -> None:
+    template = get_cached_template(ReflectionCertaintyTemplate, reasoning_effort=ReasoningEffort.HIGH)
+
+    assert get_cached_template(ReflectionCertaintyTemplate, reasoning_effort=ReasoningEffort.HIGH) is template
+    assert get_cached_template(ReflectionCertaintyTemplate, reasoning_effort=ReasoningEffort.NONE) is not template
+
+
+def test_get_cached_template_keys_on_eval() -> None:
+    eval = Eval(name="helpfulness", criteria="Is the response helpful?", response_identifier="Response")
+    other_eval = Eval(name="helpfulness", criteria="Is the response concise?", response_identifier="Response")
+
+    template = get_cached_template(
+        SemanticEvaluationCompletionTemplate, eval=eval, reasoning_effort=ReasoningEffort.LOW
+    )
+
+    assert (
+        get_cached_template(SemanticEvaluationCompletionTemplate, eval=eval, reasoning_effort=ReasoningEffort.LOW)
+        is template
+    )
+    assert (
+        get_cached_template(SemanticEvaluationCompletionTemplate, eval=other_eval, reasoning_effort=ReasoningEffort.LOW)
+        is not template
+    )
+
+
+def test_get_response_format_model_keys_on_response_schema() -> None:
+    template_cls = SelfReflectionSOFieldAccuracyConfig
+
+    response_format = get_response_format_model(template_cls, '{"name": "Alice", "age": 30}')
+
+    assert get_response_format_model(template_cls, '{"name": "Bob", "age": 41}') is response_format
+    assert get_response_format_model(template_cls, '{"name": "Bob"}') is not response_format
+
+
+def test_get_response_format_model_skips_templates_without_response_format() -> None:
+    assert get_response_format_model(ReflectionCertaintyTemplate, '{"name": "Alice"}') is None
+
+
+def test_get_response_format_model_caches_none_response_formats() -> None:
+    num_constructions = 0
+
+    class _OptionalResponseFormatTemplate(ReflectionCertaintyTemplate):
+        @classmethod
+        def construct_response_format(cls, _response_json: str) -> None:
+            nonlocal num_constructions
+            num_constructions += 1
+            return None
+
+    assert get_response_format_model(_OptionalResponseFormatTemplate, '{"name": "Alice"}') is None
+    assert get_response_format_model(_OptionalResponseFormatTemplate, '{"name": "Bob"}') is None
+    assert num_constructions == 1
+
+
+def test_get_response_format_model_per_field_template() -> None:
+    template_cls = ReflectionSOPerScoreCorrectnessTemplate
+
+    response_format = get_response_format_model(template_cls, '{"name": "Alice", "age": 30}')
+
+    assert response_format is not None
+    assert set(response_format.model_fields) == {"name", "age"}
+
+
+def test_get_response_format_param_is_memoized() -> None:
+    template_cls = ReflectionSOPerScoreCorrectnessTemplate
+    response_format = get_response_format_model(template_cls, '{"name": "Alice"}')
+    assert response_format is not None
+
+    assert get_response_format_param(response_format) is get_response_format_param(response_format)
+    assert get_response_format_param(response_format)["type"] == "json_schema"
+
+
+def test_lru_cache_expires_entries(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 100.0
+    monkeypatch.setattr(cache_utils.time, "monotonic", lambda: now)
+    cache: LRUCache[str, int] = LRUCache(max_size=2, ttl_seconds=10)
+    cache.set("a", 1)
+
+    now = 105.0
+    assert cache.get("a") == 1
+
+    now = 111.0
+    assert cache.get("a") is None
+    assert "a" not in cache
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_hash_cache_key_is_stable() -> None:
+    messages = [{"role": "user", "content": "Hi"}]
+    assert hash_cache_key([messages, 1.0]) == hash_cache_key([[{"content": "Hi", "role": "user"}], 1.0])
+    assert hash_cache_key([messages, 1.0]) != hash_cache_key([messages, 0.0])
@@ -0,0 +1,145 @@
+from typing import Any
+
+import litellm
+import pytest
+
+from tlm.config.defaults import get_settings
+from tlm.config.models import BEDROCK_MODEL_TO_INFERENCE_PROFILE_ID, CLAUDE_3_HAIKU
+from tlm.config.presets import REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS, ReasoningEffort
+from tlm.templates import ReferenceCompletionTemplate
+from tlm.templates.reflection_completion_templates import REFLECTION_MAX_ANSWER_TOKENS, ReflectionCertaintyTemplate
+from tlm.types import Completion, ExtractedResponseField, ModelPricing
+from tlm.utils import completion_utils
+from tlm.utils.completion_utils import _build_litellm_params, generate_completion
+from tlm.utils.response_format_utils import add_explanation_to_response_format
+from tlm.utils.usage_utils import track_usage
+
+settings = get_settings()
+
+
+def _long_conversation(num_turns: int) -> list[dict[str, str]]:
+    messages = [{"role": "system", "content": "You are a helpful assistant."}]
+    for i in range(num_turns):
+        messages.append({"role": "user", "content": f"Question {i}"})
+        messages.append({"role": "assistant", "content": f"Answer {i}"})
+    messages.append({"role": "user", "content": "Final question"})
+    return messages
+
+
+def test_build_litellm_params_shares_message_prefix() -> None:
+    messages = _long_conversation(num_turns=5)
+    completion_params: dict[str, Any] = {"model": "gpt-4.1-mini", "messages": messages}
+    template = ReferenceCompletionTemplate.create(reasoning_effort=ReasoningEffort.NONE)
+
+    litellm_params = _build_litellm_params(template, completion_params, {"prompt": "Final question"})
+
+    assert litellm_params["messages"] is not messages
+    assert len(litellm_params["messages"]) == len(messages)
+    # the conversation prefix is shared, only the final user message is replaced
+    for original, formatted in zip(messages[:-1], litellm_params["messages"][:-1], strict=True):
+        assert formatted is original
+    assert litellm_params["messages"][-1]["content"].startswith("Prompt: Final question")
+
+
+def test_build_litellm_params_does_not_mutate_input() -> None:
+    messages = _long_conversation(num_turns=2)
+    completion_params: dict[str, Any] = {"model": "gpt-4.1-mini", "messages": messages, "temperature": 0.5}
+    snapshot = {"model": "gpt-4.1-mini", "messages": [dict(message) for message in messages], "temperature": 0.5}
+    template = ReferenceCompletionTemplate.create(reasoning_effort=ReasoningEffort.NONE)
+
+    litellm_params = _build_litellm_params(template, completion_params, {"prompt": "Final question"}, temperature=0.9)
+
+    assert litellm_params["temperature"] == 0.9
+    assert "max_tokens" in litellm_params
+    assert completion_params == snapshot
+
+
+def test_add_explanation_to_response_format_does_not_mutate_input(
+    structured_outputs_completion_params: dict[str, Any],
+) -> None:
+    original_schema = structured_outputs_completion_params["response_format"]["json_schema"]["schema"]
+    original_keys = set(original_schema.keys())
+
+    modified_params = add_explanation_to_response_format(structured_outputs_completion_params)
+
+    assert modified_params is not None
+    assert modified_params["messages"] is structured_outputs_completion_params["messages"]
+    assert modified_params["response_format"]["json_schema"]["name"] == "ObvConsistencyResponse"
+    assert set(original_schema.keys()) == original_keys
+    assert "logprobs" not in structured_outputs_completion_params
+
+
+def test_build_litellm_params_uses_template_output_budget() -> None:
+    template = ReflectionCertaintyTemplate.create(reasoning_effort=ReasoningEffort.NONE)
+    template_kwargs = {"question": "What is 1 + 1?", "answer": "2", "max_explanation_words": 0}
+
+    litellm_params = _build_litellm_params(template, {"model": "gpt-4.1-mini"}, template_kwargs)
+
+    assert litellm_params["max_tokens"] == REFLECTION_MAX_ANSWER_TOKENS
+    assert litellm_params["stop"] == ["</score>"]
+
+    reasoning_template = ReflectionCertaintyTemplate.create(reasoning_effort=ReasoningEffort.LOW)
+    reasoning_kwargs = {
+        **template_kwargs,
+        "max_explanation_words": REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS[ReasoningEffort.LOW],
+    }
+    reasoning_params = _build_litellm_params(reasoning_template, {"model": "gpt-4.1-mini"}, reasoning_kwargs)
+    assert REFLECTION_MAX_ANSWER_TOKENS < reasoning_params["max_tokens"] <= settings.MAX_TOKENS
+
+    # reasoning models spend output tokens on hidden reasoning, so they keep the default budget
+    o3_params = _build_litellm_params(template, {"model": "o3-mini"}, template_kwargs)
+    assert o3_params["max_tokens"] == settings.MAX_TOKENS
+
+
+@pytest.mark.asyncio
+async def test_stop_sequence_is_added_back_to_message(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def fake_acompletion(**kwargs: Any) -> Any:
+        assert kwargs["stop"] == ["</score>"]
+        return await litellm.acompletion(**kwargs, mock_response="<score>\n90\n")
+
+    monkeypatch.setattr(completion_utils, "acompletion", fake_acompletion)
+    template = ReflectionCertaintyTemplate.create(reasoning_effort=ReasoningEffort.NONE)
+
+    completion = await generate_completion(
+        template,
+        completion_params={"model": "gpt-4.1-mini"},
+        template_kwargs={"question": "What is 1 + 1?", "answer": "2", "max_explanation_words": 0},
+    )
+
+    assert isinstance(completion, Completion)
+    assert completion.message.endswith("</score>")
+    assert completion.response_fields[ExtractedResponseField.SCORE] == "90"
+
+
+@pytest.mark.asyncio
+async def test_usage_is_recorded_under_requested_model_name(monkeypatch: pytest.MonkeyPatch) -> None:
+    sent_models: list[str] = []
+
+    async def fake_acompletion(**kwargs: Any) -> Any:
+        sent_models.append(kwargs["model"])
+        # the mocked Bedrock call rejects logprobs params, even disabled ones
+        params = {key: value for key, value in kwargs.items() if key not in ("logprobs", "top_logprobs")}
+        return await litellm.acompletion(**params, mock_response="Paris")
+
+    monkeypatch.setattr(completion_utils, "acompletion", fake_acompletion)
+    template = ReferenceCompletionTemplate.create(reasoning_effort=ReasoningEffort.NONE)
+
+    with track_usage() as tracker:
+        completion = await generate_completion(
+            template,
+            completion_params={
+                "model": CLAUDE_3_HAIKU,
+                "messages": [{"role": "user", "content": "What is the capital of France?"}],
+            },
+            template_kwargs={"prompt": "What is the capital of France?"},
+        )
+
+    assert isinstance(completion, Completion)
+    assert sent_models == [BEDROCK_MODEL_TO_INFERENCE_PROFILE_ID[CLAUDE_3_HAIKU]]
+    price_table = {
+        CLAUDE_3_HAIKU: ModelPricing(input_cost_per_million_tokens=0.25, output_cost_per_million_tokens=1.25)
+    }
+    summary = tracker.summarize(price_table)
+    assert set(summary["by_model"]) == {CLAUDE_3_HAIKU}
+    assert summary["total"]["cost"] is not None
+    assert summary["total"]["cost"] > 0
@@ -1,5 +1,6 @@
-from tlm.types import Completion, ExtractedResponseField
+from tlm.types import Completion, CompletionTemplate, ExtractedResponseField
 from tlm.utils.constrain_outputs_utils import constrain_output
+from tlm.utils.label_matcher_utils import get_label_matcher
 
 
 def test_constrain_output_exact_match() -> None:
@@ -24,3 +25,26 @@ def test_constrain_output_closest_match() -> None:
     completion = Completion.from_response({"response": "colour"})
     constrain_output(completion, "colour", ["weight", "color", "style"])
     assert completion.response_fields[ExtractedResponseField.ANSWER] == "color"
+
+
+def test_constrain_output_first_listed_label_wins_at_same_position() -> None:
+    completion = Completion.from_response({"response": "Answer: yes please"})
+    constrain_output(completion, "Answer: YES please", ["yes", "yes please", "no"])
+    assert completion.response_fields[ExtractedResponseField.ANSWER] == "yes"
+
+
+def test_constrain_output_closest_match_in_large_taxonomy() -> None:
+    labels = [f"category {idx:04d}" for idx in range(5000)] + ["kitchen appliances"]
+    completion = Completion.from_response({"response": "kitchen appliance"})
+    constrain_output(completion, "Kitchen-appliance", labels)
+    assert completion.response_fields[ExtractedResponseField.ANSWER] == "kitchen appliances"
+
+
+def test_label_matcher_is_cached_on_template() -> None:
+    template = CompletionTemplate(prompt_template=None, constrain_outputs=["Paris", "London"])
+
+    label_matcher = template.get_label_matcher()
+
+    assert label_matcher is template.get_label_matcher()
+    assert label_matcher is get_label_matcher(("Paris", "London"))
+    assert CompletionTemplate(prompt_template=None).get_label_matcher() is None
@@ -0,0 +1,65 @@
+import json
+
+from tlm.types import Completion
+from tlm.utils.json_utils import get_json_field, parse_json
+from tlm.utils.scoring.jaccard_utils import get_structured_output_keys
+from tlm.utils.scoring.per_field_scoring_utils import extract_incorrect_fields_reflection_metadata
+
+
+def test_parse_json_accepts_json_and_python_literals() -> None:
+    assert parse_json('{"answer": "Paris", "verified": true}') == {"answer": "Paris", "verified": True}
+    assert parse_json("{'answer': 'Paris', 'verified': True}") == {"answer": "Paris", "verified": True}
+    assert parse_json('{"score": NaN}') is not None
+    assert parse_json("The answer is Paris") is None
+    assert parse_json("{[1]: 2}") is None
+
+
+def test_get_json_field() -> None:
+    parsed = parse_json('{"answer": 42, "explanation": "because"}')
+
+    assert get_json_field(parsed, "answer") == "42"
+    assert get_json_field(parsed, "missing") is None
+    assert get_json_field(None, "answer") is None
+    assert get_json_field(["answer"], "answer") is None
+
+
+def test_completion_parses_json_once() -> None:
+    completion = Completion.from_response({"response": '{"city": "Paris", "country": {"name": "France"}}'})
+
+    parsed = completion.get_parsed_json()
+
+    assert parsed == {"city": "Paris", "country": {"name": "France"}}
+    assert completion.get_parsed_json() is parsed
+
+    completion.message = '{"city": "Lyon"}'
+    assert completion.get_parsed_json() == {"city": "Lyon"}
+
+
+def test_structured_output_keys_of_json_with_literals() -> None:
+    assert get_structured_output_keys('{"city": "Paris", "details": {"capital": true, "population": null}}') == {
+        "city",
+        "details",
+        "capital",
+        "population",
+    }
+    assert get_structured_output_keys("Paris") == set()
+
+
+def test_parse_json_returns_unshared_objects() -> None:
+    answer = '{"city": "Paris", "country": {"name": "France"}}'
+
+    parsed = parse_json(answer)
+    parsed["country"]["name"] = "Italy"
+
+    assert parse_json(answer) == {"city": "Paris", "country": {"name": "France"}}
+
+
+def test_consumers_do_not_mutate_parsed_completion() -> None:
+    # the completion caches its parsed message content, which all consumers of the response share
+    answer = '{"city": "Paris", "country": {"name": "France", "languages": ["French"]}, "population": 2100000}'
+    reflection = '{"incorrect_fields": [{"field_name": "population", "explanation": "outdated"}], "score": 50}'
+    reflection_completion = Completion.from_response({"response": reflection})
+
+    extract_incorrect_fields_reflection_metadata(reflection_completion.get_parsed_json(), answer)
+
+    assert reflection_completion.get_parsed_json() == json.loads(reflection)
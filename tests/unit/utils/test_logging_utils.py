@@ -0,0 +1,72 @@
+import json
+import logging
+
+import pytest
+
+from tlm.types import Completion, CompletionFailure, CompletionFailureType, CompletionUsage
+from tlm.utils import logging_utils
+from tlm.utils.logging_utils import (
+    SAMPLED_LOGGER_NAME,
+    TRUNCATION_SUFFIX,
+    log_sampled_completion,
+    should_sample_completion_log,
+    truncate_payload,
+)
+
+
+def test_truncate_payload_truncates_nested_strings() -> None:
+    payload = {"messages": [{"role": "user", "content": "x" * 20}], "count": 3}
+
+    truncated = truncate_payload(payload, max_chars=5)
+
+    assert truncated["messages"][0]["content"] == "xxxxx" + TRUNCATION_SUFFIX
+    assert truncated["messages"][0]["role"] == "user"
+    assert truncated["count"] == 3
+
+
+def test_sampling_disabled_by_default(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(logging_utils.settings, "SAMPLED_LOG_RATE", 0.0)
+    assert not should_sample_completion_log()
+
+
+def test_sampling_enabled(monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture) -> None:
+    monkeypatch.setattr(logging_utils.settings, "SAMPLED_LOG_RATE", 1.0)
+    with caplog.at_level(logging.INFO, logger=SAMPLED_LOGGER_NAME):
+        assert should_sample_completion_log()
+
+
+def test_log_sampled_completion_emits_structured_record(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.setattr(logging_utils.settings, "SAMPLED_LOG_MAX_PAYLOAD_CHARS", 10)
+    completion = Completion(
+        message="Paris is the capital of France",
+        usage=CompletionUsage(prompt_tokens=10, completion_tokens=5, total_tokens=15),
+        original_response={"response": "Paris"},
+        template=None,
+    )
+    litellm_params = {"model": "gpt-4.1-mini", "messages": [{"role": "user", "content": "What is the capital?"}]}
+
+    with caplog.at_level(logging.INFO, logger=SAMPLED_LOGGER_NAME):
+        log_sampled_completion("ReferenceCompletionTemplate", litellm_params, completion, 0.25)
+
+    assert len(caplog.records) == 1
+    record = caplog.records[0].tlm_record  # type: ignore[attr-defined]
+    assert record["status"] == "success"
+    assert record["model"] == "gpt-4.1-mini"
+    assert record["latency_ms"] == 250.0
+    assert record["message"] == "Paris is t" + TRUNCATION_SUFFIX
+    assert record["usage"]["total_tokens"] == 15
+    assert json.loads(caplog.records[0].getMessage()) == record
+
+
+def test_log_sampled_completion_failure(caplog: pytest.LogCaptureFixture) -> None:
+    failure = CompletionFailure(type=CompletionFailureType.TIMEOUT, error="timed out")
+
+    with caplog.at_level(logging.INFO, logger=SAMPLED_LOGGER_NAME):
+        log_sampled_completion("ReferenceCompletionTemplate", {"model": "gpt-4.1-mini"}, failure, 1.0)
+
+    record = caplog.records[0].tlm_record  # type: ignore[attr-defined]
+    assert record["status"] == "failure"
+    assert record["failure_type"] == "timeout"
+    assert record["num_messages"] == 0
@@ -0,0 +1,94 @@
+import math
+
+import numpy as np
+import pytest
+from litellm.types.utils import ChatCompletionTokenLogprob, ChoiceLogprobs, TopLogprob
+
+from tlm.types import AnswerChoiceToken, Completion, CompletionTemplate, TokenLogprobs
+from tlm.utils.parse_utils import (
+    compute_mean_message_confidence,
+    compute_score_expected_value,
+    compute_token_score_expected_value,
+    get_choice_token_confidence,
+    get_parsed_answer_tokens_confidence,
+)
+
+
+def _token_logprob(token: str, probability: float, top: dict[str, float]) -> ChatCompletionTokenLogprob:
+    return ChatCompletionTokenLogprob(
+        token=token,
+        logprob=math.log(probability),
+        bytes=None,
+        top_logprobs=[TopLogprob(token=t, logprob=math.log(p), bytes=None) for t, p in top.items()],
+    )
+
+
+@pytest.fixture
+def completion() -> Completion:
+    logprobs = ChoiceLogprobs(
+        content=[
+            _token_logprob("<score>", 1.0, {"<score>": 1.0}),
+            _token_logprob("4", 0.6, {"4": 0.6, "5": 0.3, "3": 0.1}),
+            _token_logprob("</score>", 1.0, {"</score>": 1.0}),
+            _token_logprob(" Yes", 0.5, {" Yes": 0.5, "yes": 0.2, " No": 0.3}),
+        ]
+    )
+    template = CompletionTemplate(
+        prompt_template=None,
+        answer_choice_tokens=[
+            AnswerChoiceToken(token="Yes", positive=True),
+            AnswerChoiceToken(token="No", positive=False),
+        ],
+    )
+    return Completion(message="<score>4</score> Yes", logprobs=logprobs, original_response={}, template=template)
+
+
+def test_provider_logprobs_are_stored_columnar(completion: Completion) -> None:
+    logprobs = completion.logprobs
+
+    assert isinstance(logprobs, TokenLogprobs)
+    assert logprobs.text == "<score>4</score> Yes"
+    assert logprobs.tokens == ["<score>", "4", "</score>", " Yes"]
+    assert logprobs.offsets.tolist() == [0, 7, 8, 16, 20]
+    assert logprobs.logprobs.dtype == np.float32
+    assert logprobs.top_logprobs.shape == (4, 3)
+    assert logprobs.num_top_logprobs.tolist() == [1, 3, 1, 3]
+    assert logprobs.top_tokens[0].tolist() == ["<score>", "", ""]
+    assert logprobs.has_top_logprobs
+
+
+def test_logprob_lookups(completion: Completion) -> None:
+    # expected score over the 1-5 scale: (3 * 0.6 + 4 * 0.3 + 2 * 0.1) / 4, with a 1e-3 floor for each score
+    assert compute_score_expected_value(completion, "4") == pytest.approx(0.8, abs=2e-3)
+    assert compute_score_expected_value(completion, "2") is None
+    assert get_choice_token_confidence(completion) == pytest.approx(0.5)
+    # " Yes" and "yes" normalize to the same token, so their probabilities are summed
+    assert get_parsed_answer_tokens_confidence(completion, 17, 20) == pytest.approx(0.7)
+    assert compute_mean_message_confidence(completion) == pytest.approx((1 + 0.6 + 1 + 0.5) / 4)
+
+
+def test_whitespace_score_tokens_only_count_when_stripped() -> None:
+    logprobs = TokenLogprobs.from_provider(ChoiceLogprobs(content=[_token_logprob("1", 0.5, {"1": 0.5, " 5": 0.5})]))
+    assert logprobs is not None
+
+    # " 5" is not a score token, so only "1" (and the 1e-3 floor of each score) counts
+    assert compute_token_score_expected_value(logprobs, 0) == pytest.approx(0.0, abs=1e-2)
+    assert compute_token_score_expected_value(logprobs, 0, strip_whitespace=True) == pytest.approx(0.5, abs=1e-2)
+
+
+def test_find_token_index_binary_search() -> None:
+    logprobs = TokenLogprobs.from_provider(
+        {"content": [{"token": token, "logprob": 0.0} for token in ["The", "", " answer", " is", " 42"]]}
+    )
+    assert logprobs is not None
+
+    def find_token_index_linear(string_index: int) -> int:
+        index_count = 0
+        for idx, token in enumerate(logprobs.tokens):
+            if index_count + len(token) > string_index:
+                return idx
+            index_count += len(token)
+        return -1
+
+    for string_index in range(len(logprobs.text) + 2):
+        assert logprobs.find_token_index(string_index) == find_token_index_linear(string_index)
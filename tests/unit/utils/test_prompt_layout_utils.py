@@ -0,0 +1,167 @@
+from typing import Any
+
+import pytest
+
+from tlm.config.presets import PromptLayout, ReasoningEffort
+from tlm.templates import BatchedSemanticEvaluationCompletionTemplate, SemanticEvaluationCompletionTemplate
+from tlm.templates.prompt_evaluation_completion_template import PromptAnswerabilityCompletionTemplate
+from tlm.templates.reflection_completion_templates import (
+    SELF_REFLECTION_TEMPLATES_BY_WORKFLOW,
+    ReflectionCertaintyTemplate,
+    ReflectionClassificationCorrectnessTemplate,
+    ReflectionRAGIssuesTemplate,
+)
+from tlm.templates.template_cache import get_cached_template
+from tlm.types import Completion, CompletionTemplate, ExtractedResponseField
+from tlm.utils.completion_utils import generate_completion
+from tlm.utils.prompt_layout_utils import SHARED_INPUT_TAGS
+from tlm.utils.scoring.semantic_evaluation_scoring_utils import DEFAULT_RAG_EVALS
+
+from tests.helpers.litellm_patches import patch_acompletion
+
+QUESTION = "What is the capital of France?"
+CONTEXT = "Paris is the capital and largest city of France."
+REFLECTION_TEMPLATE_CLASSES = list(
+    dict.fromkeys(template for templates in SELF_REFLECTION_TEMPLATES_BY_WORKFLOW.values() for template in templates)
+)
+
+
+def _get_layout_templates(prompt_layout: PromptLayout) -> list[tuple[CompletionTemplate, dict[str, Any]]]:
+    """Returns every template the prompt layout applies to, with template kwargs to format it."""
+    reflection_kwargs = {"question": QUESTION, "answer": "Paris", "max_explanation_words": 50}
+    templates: list[tuple[CompletionTemplate, dict[str, Any]]] = [
+        (
+            get_cached_template(template_cls, prompt_layout=prompt_layout, reasoning_effort=ReasoningEffort.LOW),
+            reflection_kwargs,
+        )
+        for template_cls in REFLECTION_TEMPLATE_CLASSES
+    ]
+    templates.append(
+        (get_cached_template(PromptAnswerabilityCompletionTemplate, prompt_layout=prompt_layout), {"prompt": QUESTION})
+    )
+    templates.extend(
+        (
+            get_cached_template(
+                SemanticEvaluationCompletionTemplate,
+                prompt_layout=prompt_layout,
+                eval=eval,
+                reasoning_effort=ReasoningEffort.LOW,
+            ),
+            _get_eval_kwargs(eval.query_identifier, eval.context_identifier, eval.response_identifier),
+        )
+        for eval in DEFAULT_RAG_EVALS
+    )
+    templates.append(
+        (
+            get_cached_template(
+                BatchedSemanticEvaluationCompletionTemplate,
+                prompt_layout=prompt_layout,
+                evals=tuple(DEFAULT_RAG_EVALS[1:3]),
+                reasoning_effort=ReasoningEffort.LOW,
+            ),
+            _get_eval_kwargs("Query", "Context", "Response"),
+        )
+    )
+    return templates
+
+
+def _get_eval_kwargs(
+    query_identifier: str | None, context_identifier: str | None, response_identifier: str | None
+) -> dict[str, Any]:
+    return {
+        "query_identifier": query_identifier,
+        "context_identifier": context_identifier,
+        "response_identifier": response_identifier,
+        "query": QUESTION,
+        "context": CONTEXT,
+        "reference_answer": "Paris",
+        "eval_criteria": "Is the Response correct?",
+        "max_explanation_words": 50,
+    }
+
+
+def _format_prompt(template: CompletionTemplate, template_kwargs: dict[str, Any]) -> str:
+    return template.format_messages(**template_kwargs)[0]["content"]
+
+
+def _restore_default_layout(prompt: str, template_kwargs: dict[str, Any]) -> str:
+    """Removes the shared input blocks from the start of a PREFIX_CACHE prompt and puts their values back in place of
+    the references to them.
+    """
+    for field, tag in SHARED_INPUT_TAGS.items():
+        if field not in template_kwargs:
+            continue
+        block = f"<{tag}>\n{template_kwargs[field]}\n</{tag}>\n\n"
+        if prompt.startswith(block):
+            prompt = prompt.removeprefix(block)
+        elif block in prompt:
+            # a later block of the prefix
+            prompt = prompt.replace(block, "", 1)
+        prompt = prompt.replace(f"[given in <{tag}> at the start of this message]", template_kwargs[field])
+    return prompt
+
+
+def test_prefix_cache_layout_only_moves_shared_inputs() -> None:
+    default_templates = _get_layout_templates(PromptLayout.DEFAULT)
+    prefix_cache_templates = _get_layout_templates(PromptLayout.PREFIX_CACHE)
+
+    for (default_template, template_kwargs), (prefix_cache_template, _) in zip(
+        default_templates, prefix_cache_templates, strict=True
+    ):
+        default_prompt = _format_prompt(default_template, template_kwargs)
+        prefix_cache_prompt = _format_prompt(prefix_cache_template, template_kwargs)
+
+        assert default_prompt != prefix_cache_prompt
+        # the user request / query is given once, first; the rest of the prompt (instructions, the judged response and
+        # the output format) is the default prompt, in the same order
+        assert prefix_cache_prompt.startswith((f"<user_request>\n{QUESTION}\n", f"<query>\n{QUESTION}\n"))
+        assert prefix_cache_prompt.count(QUESTION) == 1
+        assert _restore_default_layout(prefix_cache_prompt, template_kwargs) == default_prompt
+
+
+def test_prefix_cache_layout_shares_prefix_across_templates() -> None:
+    prompts = [
+        _format_prompt(
+            get_cached_template(
+                template_cls, prompt_layout=PromptLayout.PREFIX_CACHE, reasoning_effort=ReasoningEffort.LOW
+            ),
+            {"question": QUESTION, "answer": answer, "max_explanation_words": 50},
+        )
+        for template_cls in (ReflectionCertaintyTemplate, ReflectionRAGIssuesTemplate)
+        for answer in ("Paris", "Lyon")
+    ]
+
+    shared_prefix = f"<user_request>\n{QUESTION}\n</user_request>\n\n"
+    assert all(prompt.startswith(shared_prefix) for prompt in prompts)
+    # the calls with the same template only differ from the judged answer on
+    assert prompts[0].split("Paris")[0] == prompts[1].split("Lyon")[0]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("template_cls", "llm_response"),
+    [
+        (ReflectionCertaintyTemplate, "<think>\nParis is correct.\n</think>\n\n<score>\n90\n</score>"),
+        (ReflectionClassificationCorrectnessTemplate, "Choice: A"),
+        (ReflectionRAGIssuesTemplate, "<issues>\n- none\n</issues>\n\n<score>\n75\n</score>"),
+    ],
+)
+async def test_prefix_cache_layout_parses_and_scores_the_same(
+    template_cls: type[CompletionTemplate], llm_response: str
+) -> None:
+    completions = []
+    for prompt_layout in (PromptLayout.DEFAULT, PromptLayout.PREFIX_CACHE):
+        template = get_cached_template(template_cls, prompt_layout=prompt_layout, reasoning_effort=ReasoningEffort.LOW)
+        with patch_acompletion(llm_response):
+            completions.append(
+                await generate_completion(
+                    template,
+                    template_kwargs={"question": QUESTION, "answer": "Paris", "max_explanation_words": 50},
+                )
+            )
+
+    default_completion, prefix_cache_completion = completions
+    assert isinstance(default_completion, Completion)
+    assert isinstance(prefix_cache_completion, Completion)
+    assert default_completion.response_fields.get(ExtractedResponseField.MAPPED_SCORE) is not None
+    assert prefix_cache_completion.response_fields == default_completion.response_fields
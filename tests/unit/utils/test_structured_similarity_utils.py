@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+import pytest
+
+from tlm.config.presets import WorkflowType
+from tlm.types import SimilarityMeasure
+from tlm.utils.scoring.consistency_scoring_utils import compute_structured_consistency_scores
+from tlm.utils.scoring.jaccard_utils import jaccard_similarity
+from tlm.utils.scoring.structured_similarity_utils import compute_structured_similarity_scores
+
+REFERENCE = {
+    "name": "Alice Smith",
+    "age": 30,
+    "tags": ["admin", "editor"],
+    "address": {"city": "Paris", "zip": "75001"},
+    "verified": True,
+}
+
+
+def test_leaf_by_leaf_similarity() -> None:
+    comparisons = [
+        # same values up to case, numeric tolerance and array order
+        {**REFERENCE, "name": "alice smith", "age": 30.1, "tags": ["editor", "admin"]},
+        # one of the two nested leaves differs, one string token differs, one array element is missing
+        {**REFERENCE, "name": "Alice Jones", "tags": ["admin"], "address": {"city": "Lyon", "zip": "75001"}},
+        # missing and differently typed fields
+        {"name": "Alice Smith", "age": "30", "verified": False},
+    ]
+
+    scores, field_scores = compute_structured_similarity_scores(
+        [json.dumps(REFERENCE)], [json.dumps(comparison) for comparison in comparisons]
+    )
+
+    # leaves: name, age, tags, address.city, address.zip, verified
+    np.testing.assert_allclose(scores, [1.0, (1 / 3 + 1 + 1 / 2 + 0 + 1 + 1) / 6, 1 / 6])
+    np.testing.assert_allclose(field_scores["address"], [[1.0, 0.5, 0.0]])
+    np.testing.assert_allclose(field_scores["age"], [[1.0, 1.0, 0.0]])
+    np.testing.assert_allclose(field_scores["tags"], [[1.0, 0.5, 0.0]])
+
+
+def test_non_json_answers_fall_back_to_jaccard() -> None:
+    reference = json.dumps(REFERENCE)
+
+    scores, field_scores = compute_structured_similarity_scores([reference], ["Alice Smith, 30"])
+
+    assert scores[0] == pytest.approx(jaccard_similarity(reference, "Alice Smith, 30", structured_outputs=True))
+    assert np.isnan(field_scores["name"][0, 0])
+
+
+def test_structured_consistency_scores_per_field() -> None:
+    references = [json.dumps(REFERENCE), json.dumps({"name": "Bob"})]
+    comparisons = [json.dumps(REFERENCE), json.dumps({**REFERENCE, "age": 41})]
+
+    average_scores, scores, field_scores = compute_structured_consistency_scores(references, comparisons)
+
+    assert scores.shape == (4,)
+    np.testing.assert_allclose(average_scores, scores.reshape(2, 2).mean(axis=1))
+    np.testing.assert_allclose(field_scores["age"], [0.5, 0.0])
+    np.testing.assert_allclose(field_scores["name"], [1.0, 0.0])
+
+
+def test_structured_outputs_use_structured_similarity() -> None:
+    assert SimilarityMeasure.for_workflow(WorkflowType.STRUCTURED_OUTPUT_SCORING) == SimilarityMeasure.STRUCTURED
@@ -0,0 +1,139 @@
+import threading
+from typing import Any
+
+import pytest
+
+from tlm.config.base import BaseConfig
+from tlm.config.capabilities import ModelCapabilities
+from tlm.config.presets import ContextTrimming, WorkflowType
+from tlm.config.schema import Config
+from tlm.utils import token_budget_utils, tokenize_utils
+from tlm.utils.token_budget_utils import (
+    atrim_request_inputs,
+    exceeds_input_token_limit,
+    trim_inputs_to_token_budget,
+    trim_request_inputs,
+)
+from tlm.utils.tokenize_utils import TokenizerService
+
+# no local tokenizer, so tokens are approximated as 4 characters each
+MODEL = "claude-3-5-haiku-latest"
+FILLER_PARAGRAPH = " ".join(["lorem ipsum dolor sit amet"] * 40)
+
+
+def test_relevance_trimming_keeps_the_context_chunks_relevant_to_the_prompt() -> None:
+    relevant_paragraph = "The Eiffel Tower is 330 metres tall and located in Paris."
+    context = "\n\n".join([FILLER_PARAGRAPH] * 5 + [relevant_paragraph] + [FILLER_PARAGRAPH] * 5)
+    completion_params = {"messages": [{"role": "user", "content": "How tall is the Eiffel Tower?"}]}
+
+    _, trimmed_context, report = trim_inputs_to_token_budget(
+        completion_params, context, model=MODEL, strategy=ContextTrimming.RELEVANCE, input_token_budget=600
+    )
+
+    assert report is not None
+    assert report.trimmed
+    assert relevant_paragraph in trimmed_context
+    assert report.trimmed_context_tokens <= 600 < report.context_tokens
+    assert report.num_context_chunks_dropped > 0
+
+
+def test_truncation_drops_oldest_turns_and_cuts_off_the_context() -> None:
+    messages = [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": FILLER_PARAGRAPH},
+        {"role": "assistant", "content": FILLER_PARAGRAPH},
+        {"role": "user", "content": "Summarize the document."},
+    ]
+    context = "\n\n".join([FILLER_PARAGRAPH] * 10)
+
+    trimmed_params, trimmed_context, report = trim_inputs_to_token_budget(
+        {"messages": messages}, context, model=MODEL, strategy=ContextTrimming.TRUNCATE, input_token_budget=300
+    )
+
+    # the oldest turn is dropped as a whole, so the conversation still starts with a user message
+    assert trimmed_params["messages"] == [messages[0], messages[3]]
+    assert report is not None
+    assert report.num_messages_dropped == 2
+    assert context.startswith(trimmed_context)
+    assert report.trimmed_context_tokens <= 300
+
+    # inputs within the budget are left unchanged
+    untrimmed_params, untrimmed_context, report = trim_inputs_to_token_budget(
+        {"messages": messages}, context, model=MODEL, strategy=ContextTrimming.TRUNCATE, input_token_budget=100_000
+    )
+    assert untrimmed_params["messages"] == messages
+    assert untrimmed_context == context
+    assert report is not None
+    assert not report.trimmed
+
+
+def test_truncation_drops_tool_calls_with_their_tool_results() -> None:
+    tool_call = {"id": "call_1", "type": "function", "function": {"name": "search", "arguments": FILLER_PARAGRAPH}}
+    messages = [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": "Find the document."},
+        {"role": "assistant", "content": None, "tool_calls": [tool_call]},
+        {"role": "tool", "tool_call_id": "call_1", "content": "Found it."},
+        {"role": "assistant", "content": "Here is the document."},
+        {"role": "user", "content": "Summarize the document."},
+    ]
+
+    # the tool call arguments count towards the budget
+    trimmed_params, _, report = trim_inputs_to_token_budget(
+        {"messages": messages}, None, model=MODEL, strategy=ContextTrimming.TRUNCATE, input_token_budget=100
+    )
+
+    assert trimmed_params["messages"] == [messages[0], messages[5]]
+    assert report is not None
+    assert report.num_messages_dropped == 4
+
+
+async def test_request_inputs_are_trimmed_on_worker_thread(monkeypatch: pytest.MonkeyPatch) -> None:
+    trimming_threads: list[str] = []
+
+    def recording_trim_request_inputs(*args: Any) -> Any:
+        trimming_threads.append(threading.current_thread().name)
+        return trim_request_inputs(*args)
+
+    monkeypatch.setattr(token_budget_utils, "trim_request_inputs", recording_trim_request_inputs)
+    completion_params = {"messages": [{"role": "user", "content": "How tall is the Eiffel Tower?"}]}
+    context = "\n\n".join([FILLER_PARAGRAPH] * 10)
+    config = BaseConfig.from_input(
+        Config(context_trimming=ContextTrimming.TRUNCATE, input_token_budget=200), WorkflowType.RAG, model=MODEL
+    )
+
+    _, trimmed_context, report = await atrim_request_inputs(completion_params, context, config)
+
+    assert report is not None
+    assert report.trimmed
+    assert trimmed_context == trim_request_inputs(completion_params, context, config)[1]
+    assert trimming_threads and threading.current_thread().name not in trimming_threads
+
+    # without trimming, the inputs are returned as they are
+    untrimmed_config = BaseConfig.from_input(Config(), WorkflowType.RAG, model=MODEL)
+    untrimmed_inputs = await atrim_request_inputs(completion_params, context, untrimmed_config)
+    assert untrimmed_inputs == (completion_params, context, None)
+
+
+class _CharacterEncoding:
+    def encode(self, text: str, **_kwargs: Any) -> list[str]:
+        return list(text)
+
+
+async def test_exceeds_input_token_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(tokenize_utils.tiktoken, "get_encoding", lambda _encoding_name: _CharacterEncoding())
+    monkeypatch.setattr(tokenize_utils, "_tokenizer_service", TokenizerService())
+    model_capabilities = ModelCapabilities(model="gpt-4.1-mini", max_input_tokens=100)
+
+    assert not await exceeds_input_token_limit([{"role": "user", "content": "x" * 100}], model_capabilities)
+    assert await exceeds_input_token_limit([{"role": "user", "content": "x" * 101}], model_capabilities)
+    assert not await exceeds_input_token_limit(
+        [{"role": "user", "content": "x" * 101}], ModelCapabilities(model="gpt-4.1-mini")
+    )
+
+
+async def test_estimated_token_counts_never_exceed_input_token_limit() -> None:
+    # the prompt of a model without an exact tokenizer is left for the provider to reject
+    model_capabilities = ModelCapabilities(model=MODEL, max_input_tokens=100)
+
+    assert not await exceeds_input_token_limit([{"role": "user", "content": "x" * 10_000}], model_capabilities)
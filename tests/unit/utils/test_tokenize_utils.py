@@ -0,0 +1,95 @@
+import threading
+from typing import Any
+
+import pytest
+
+from tlm.utils import tokenize_utils
+from tlm.utils.tokenize_utils import TokenizerService, approximate_token_count
+
+
+class _WhitespaceEncoding:
+    def __init__(self) -> None:
+        self.encode_threads: list[str] = []
+        self.num_batch_calls = 0
+
+    def encode(self, text: str, **_kwargs: Any) -> list[str]:
+        self.encode_threads.append(threading.current_thread().name)
+        return text.split()
+
+    def encode_batch(self, texts: list[str], **_kwargs: Any) -> list[list[str]]:
+        self.num_batch_calls += 1
+        return [text.split() for text in texts]
+
+
+@pytest.fixture
+def encodings(monkeypatch: pytest.MonkeyPatch) -> dict[str, _WhitespaceEncoding]:
+    loaded: dict[str, _WhitespaceEncoding] = {}
+
+    def fake_get_encoding(encoding_name: str) -> _WhitespaceEncoding:
+        loaded[encoding_name] = _WhitespaceEncoding()
+        return loaded[encoding_name]
+
+    monkeypatch.setattr(tokenize_utils.tiktoken, "get_encoding", fake_get_encoding)
+    return loaded
+
+
+def test_encoder_is_cached_per_model(encodings: dict[str, _WhitespaceEncoding]) -> None:
+    tokenizer = TokenizerService()
+
+    assert tokenizer.count("What is the capital of France?", "gpt-4.1-mini") == 6
+    assert tokenizer.count("Paris", "gpt-4.1-mini") == 1
+    assert tokenizer.count_batch(["a b", "c d e"], "gpt-4") == [2, 3]
+
+    assert set(encodings) == {"o200k_base", "cl100k_base"}
+
+
+def test_only_long_batches_are_encoded_in_parallel(encodings: dict[str, _WhitespaceEncoding]) -> None:
+    tokenizer = TokenizerService()
+    long_input = "word " * tokenize_utils.PARALLEL_TOKEN_COUNT_MIN_CHARS
+
+    assert tokenizer.count_batch(["a b", "c d e"], "gpt-4") == [2, 3]
+    assert encodings["cl100k_base"].num_batch_calls == 0
+
+    assert tokenizer.count_batch(["a b", long_input], "gpt-4") == [2, tokenize_utils.PARALLEL_TOKEN_COUNT_MIN_CHARS]
+    assert encodings["cl100k_base"].num_batch_calls == 1
+
+
+def test_unknown_models_use_approximate_count(encodings: dict[str, _WhitespaceEncoding]) -> None:
+    tokenizer = TokenizerService()
+    text = "x" * 41
+
+    assert tokenizer.get_encoder("gemini/gemini-2.5-flash") is None
+    assert tokenizer.count(text, "gemini/gemini-2.5-flash") == approximate_token_count(text) == 11
+    assert tokenizer.count_batch([text, ""], "deepseek-r1") == [11, 0]
+    assert not encodings
+
+
+@pytest.mark.asyncio
+async def test_long_inputs_are_counted_on_worker_thread(encodings: dict[str, _WhitespaceEncoding]) -> None:
+    tokenizer = TokenizerService()
+    long_input = "word " * tokenize_utils.ASYNC_TOKEN_COUNT_MIN_CHARS
+
+    assert await tokenizer.acount(long_input, "gpt-4.1-mini") == tokenize_utils.ASYNC_TOKEN_COUNT_MIN_CHARS
+    assert await tokenizer.acount("short input", "gpt-4.1-mini") == 2
+
+    worker_thread, main_thread = encodings["o200k_base"].encode_threads
+    assert main_thread == threading.current_thread().name
+    assert worker_thread != main_thread
+
+
+@pytest.mark.asyncio
+async def test_encoder_is_loaded_on_worker_thread(monkeypatch: pytest.MonkeyPatch) -> None:
+    loading_threads: list[str] = []
+
+    def fake_get_encoding(_encoding_name: str) -> _WhitespaceEncoding:
+        loading_threads.append(threading.current_thread().name)
+        return _WhitespaceEncoding()
+
+    monkeypatch.setattr(tokenize_utils.tiktoken, "get_encoding", fake_get_encoding)
+    tokenizer = TokenizerService()
+
+    assert await tokenizer.acount("short input", "gpt-4.1-mini") == 2
+    assert await tokenizer.acount_batch(["a b", "c"], "gpt-4") == [2, 1]
+
+    assert len(loading_threads) == 2
+    assert threading.current_thread().name not in loading_threads
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from tlm.types import CompletionUsage, ModelPricing
+from tlm.utils.usage_utils import (
+    UNKNOWN_COMPONENT,
+    UsageTracker,
+    get_cached_prompt_tokens,
+    record_completion_usage,
+    set_current_component,
+    track_usage,
+)
+
+
+def _usage(prompt_tokens: int, completion_tokens: int) -> CompletionUsage:
+    return CompletionUsage(
+        prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, total_tokens=prompt_tokens + completion_tokens
+    )
+
+
+@pytest.mark.asyncio
+async def test_track_usage_attributes_calls_to_components() -> None:
+    async def run_component(name: str, num_calls: int) -> None:
+        set_current_component(name)
+        await asyncio.gather(*[asyncio.create_task(_record("gpt-4.1-mini", _usage(100, 10))) for _ in range(num_calls)])
+
+    async def _record(model: str, usage: CompletionUsage) -> None:
+        record_completion_usage(model, usage)
+
+    with track_usage() as tracker:
+        await asyncio.gather(
+            asyncio.create_task(run_component("SelfReflectionCompletionGenerator", 3)),
+            asyncio.create_task(run_component("ReferenceCompletionGenerator", 1)),
+        )
+        record_completion_usage("text-embedding-3-small", _usage(5, 0))
+
+    summary = tracker.summarize()
+
+    assert summary["total"] == {
+        "num_calls": 5,
+        "prompt_tokens": 405,
+        "completion_tokens": 40,
+        "total_tokens": 445,
+        "cached_prompt_tokens": 0,
+    }
+    assert summary["by_component"]["SelfReflectionCompletionGenerator"]["gpt-4.1-mini"]["num_calls"] == 3
+    assert summary["by_component"]["ReferenceCompletionGenerator"]["gpt-4.1-mini"]["prompt_tokens"] == 100
+    assert summary["by_component"][UNKNOWN_COMPONENT]["text-embedding-3-small"]["prompt_tokens"] == 5
+    assert summary["by_model"]["gpt-4.1-mini"]["completion_tokens"] == 40
+
+
+def test_record_usage_without_tracker_is_noop() -> None:
+    record_completion_usage("gpt-4.1-mini", _usage(1, 1))
+
+
+def test_unreported_token_counts_are_not_counted() -> None:
+    with track_usage() as tracker:
+        record_completion_usage(
+            "gpt-4.1-mini", CompletionUsage(prompt_tokens=-1, completion_tokens=-1, total_tokens=-1)
+        )
+
+    assert tracker.summarize()["total"] == {
+        "num_calls": 1,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_tokens": 0,
+        "cached_prompt_tokens": 0,
+    }
+
+
+@pytest.mark.parametrize(
+    ("provider_usage", "expected_cached_tokens"),
+    [
+        ({"prompt_tokens": 2000, "prompt_tokens_details": {"cached_tokens": 1536}}, 1536),
+        ({"prompt_tokens": 2000, "cache_read_input_tokens": 1024}, 1024),
+        ({"prompt_tokens": 2000, "prompt_tokens_details": None}, None),
+        (None, None),
+    ],
+)
+def test_get_cached_prompt_tokens(provider_usage: dict | None, expected_cached_tokens: int | None) -> None:
+    assert get_cached_prompt_tokens(provider_usage) == expected_cached_tokens
+
+
+def test_cached_prompt_tokens_are_summed() -> None:
+    with track_usage() as tracker:
+        for cached_prompt_tokens in (None, 0, 1024):
+            record_completion_usage(
+                "gpt-4.1-mini",
+                CompletionUsage(
+                    prompt_tokens=2000,
+                    completion_tokens=10,
+                    total_tokens=2010,
+                    cached_prompt_tokens=cached_prompt_tokens,
+                ),
+            )
+
+    summary = tracker.summarize()
+    assert summary["total"]["cached_prompt_tokens"] == 1024
+    assert summary["by_model"]["gpt-4.1-mini"]["prompt_tokens"] == 6000
+
+
+def test_summarize_with_price_table() -> None:
+    tracker = UsageTracker()
+    with track_usage() as request_tracker:
+        record_completion_usage("gpt-4.1-mini", _usage(1_000_000, 500_000))
+    tracker.merge(request_tracker)
+    tracker.merge(request_tracker)
+
+    price_table = {"gpt-4.1-mini": ModelPricing(input_cost_per_million_tokens=0.4, output_cost_per_million_tokens=1.6)}
+    summary = tracker.summarize(price_table)
+
+    assert summary["by_model"]["gpt-4.1-mini"]["cost"] == pytest.approx(2 * (0.4 + 0.8))
+    assert summary["total"]["cost"] == pytest.approx(2 * (0.4 + 0.8))
+
+    with track_usage() as unpriced_tracker:
+        record_completion_usage("o3", _usage(10, 10))
+    tracker.merge(unpriced_tracker)
+
+    summary = tracker.summarize(price_table)
+    assert summary["by_model"]["o3"]["cost"] is None
+    assert summary["total"]["cost"] is None
@@ -1,17 +1,37 @@
-from typing import Any
+from collections.abc import Coroutine
+from typing import Any, TypeVar
 
 import asyncio
+import concurrent.futures
 import sys
+import threading
 from openai.types.chat import ChatCompletion
 from openai.lib._parsing._completions import type_to_response_format_param
 
 from tlm.config.base import BaseConfig
+from tlm.config.defaults import get_settings
 from tlm.config.schema import Config
 from tlm.config.presets import WorkflowType
-from tlm.inference import InferenceResult, tlm_inference
+from tlm.inference import (
+    DEFERRED_EXPLANATION_COMPONENT,
+    InferenceResult,
+    ScoreManyResult,
+    tlm_inference,
+    tlm_score_many,
+)
+from tlm.planning import InferencePlan, tlm_plan
 from tlm.types import Eval
+from tlm.utils.cache_utils import LRUCache
+from tlm.utils.response_format_utils import get_response_format_param
+from tlm.utils.explainability_utils import generate_explanation, get_response_text
+from tlm.utils.prompt_utils import format_user_request
+from tlm.utils.usage_utils import UsageTracker, attribute_usage_to, track_usage
 from tlm.utils.structured_output_utils import _get_untrustworthy_fields
 
+settings = get_settings()
+
+T = TypeVar("T")
+
 
 def is_notebook() -> bool:
     """Returns True if running in a notebook, False otherwise."""
@@ -22,6 +42,15 @@ def is_notebook() -> bool:
         return False
 
 
+async def _cancel_pending_tasks() -> None:
+    """Cancels the other tasks of the running event loop and waits for them to finish."""
+    current_task = asyncio.current_task()
+    pending_tasks = [task for task in asyncio.all_tasks() if task is not current_task]
+    for task in pending_tasks:
+        task.cancel()
+    await asyncio.gather(*pending_tasks, return_exceptions=True)
+
+
 class TLM:
     """Trustworthy Language Model (TLM) for scoring the trustworthines of responses from any LLM in real-time.
 
@@ -33,6 +62,7 @@ class TLM:
         self,
         config: Config = Config(),
         evals: list[Eval] | None = None,
+        use_background_loop: bool = False,
     ):
         """Initialize a TLM instance.
 
@@ -42,9 +72,41 @@ class TLM:
                 other component settings. Defaults to medium quality preset.
             evals: Optional list of evaluations. Each evaluation
                 defines a name, criteria, and optional query/context/response identifiers.
+            use_background_loop: If True, the TLM instance runs its own event loop on a background thread and
+                `create()`/`score()` submit work to it. This makes the sync methods safe to call concurrently from
+                many threads (e.g. a threaded web server or a ThreadPoolExecutor), which then share one event loop,
+                connection pool and caches. Call `close()` (or use the instance as a context manager) to stop the loop.
         """
         self.config = config
         self.evals = evals
+        self._loop_thread: threading.Thread | None = None
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._prompt_cache: LRUCache[str, Any] | None = (
+            LRUCache(
+                max_size=settings.PROMPT_CACHE_MAX_SIZE,
+                ttl_seconds=config.prompt_cache_ttl_seconds or settings.PROMPT_CACHE_TTL_SECONDS,
+            )
+            if config.use_prompt_cache
+            else None
+        )
+        self._eval_cache: LRUCache[str, float] | None = (
+            LRUCache(
+                max_size=settings.EVAL_CACHE_MAX_SIZE,
+                ttl_seconds=config.eval_cache_ttl_seconds or settings.EVAL_CACHE_TTL_SECONDS,
+            )
+            if config.use_eval_cache
+            else None
+        )
+        self._usage_totals = UsageTracker()
+
+        if use_background_loop:
+            self._event_loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(
+                target=self._event_loop.run_forever, name="tlm-event-loop", daemon=True
+            )
+            self._loop_thread.start()
+            return
 
         is_notebook_flag = is_notebook()
 
@@ -58,6 +120,51 @@ class TLM:
         except RuntimeError:
             self._event_loop = asyncio.new_event_loop()
 
+    def __enter__(self) -> "TLM":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stops the background event loop thread, if this instance was created with `use_background_loop=True`.
+
+        Calls still running on the loop are cancelled (they raise a RuntimeError in their calling threads), as are any
+        later calls.
+        """
+        with self._close_lock:
+            if self._loop_thread is None or self._closed:
+                return
+            self._closed = True
+
+        asyncio.run_coroutine_threadsafe(_cancel_pending_tasks(), self._event_loop).result()
+        self._event_loop.call_soon_threadsafe(self._event_loop.stop)
+        self._loop_thread.join()
+        self._event_loop.close()
+
+    def _run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """Runs a coroutine to completion on this instance's event loop and returns its result."""
+        if self._loop_thread is None:
+            return self._event_loop.run_until_complete(coroutine)
+
+        if threading.current_thread() is self._loop_thread:
+            coroutine.close()
+            raise RuntimeError("TLM sync methods cannot be called from within the TLM background event loop")
+
+        # submitted under the lock, so that close() cancels every call submitted before it
+        with self._close_lock:
+            if self._closed:
+                coroutine.close()
+                raise RuntimeError("TLM instance is closed")
+            future = asyncio.run_coroutine_threadsafe(coroutine, self._event_loop)
+
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError as e:
+            if self._closed:
+                raise RuntimeError("TLM instance is closed") from e
+            raise
+
     def create(
         self,
         *,
@@ -92,7 +199,7 @@ class TLM:
                 - evals: Dictionary of additional evaluation scores (if evals are provided)
                 - explanation: Optional explanation for the trustworthiness score
         """
-        return self._event_loop.run_until_complete(
+        return self._run(
             self._async_inference(
                 context=context,
                 evals=evals,
@@ -133,7 +240,7 @@ class TLM:
         if isinstance(response, ChatCompletion):
             response = {"chat_completion": response.model_dump()}
 
-        return self._event_loop.run_until_complete(
+        return self._run(
             self._async_inference(
                 response=response,
                 context=context,
@@ -142,6 +249,126 @@ class TLM:
             )
         )
 
+    def score_many(
+        self,
+        *,
+        responses: list[ChatCompletion | dict[str, Any]],
+        context: str | None = None,
+        evals: list[Eval] | None = None,
+        **openai_kwargs: Any,
+    ) -> ScoreManyResult:
+        """Score the trustworthiness of multiple candidate responses to the same prompt, e.g. for best-of-N selection.
+
+        This is cheaper than calling `score()` once per candidate: the work that only depends on the prompt
+        (observed consistency completions and prompt evaluation) is done once and shared by all candidates.
+        Escalation (`Config.escalation_quality_preset`) is not applied: all candidates are scored with the configured
+        quality preset, and a warning is logged if an escalation preset is set.
+
+        Args:
+            responses: The candidate responses to score. Each can be either an OpenAI
+                ChatCompletion object or a dictionary representation of a chat completion.
+            context: Optional context string for RAG workflows. When provided, enables
+                RAG-specific evaluations.
+            evals: Optional list of semantic evaluations to apply. Overrides any
+                evaluations provided during TLM initialization. Only evaluations that do
+                not require the response are scored.
+            **openai_kwargs: OpenAI-compatible parameters used to generate the responses
+                (e.g. messages, model, response_format).
+
+        Returns:
+            ScoreManyResult containing:
+                - trustworthiness_scores: Trustworthiness score of each candidate, in input order
+                - best_index: Index of the most trustworthy candidate
+                - best_response: The most trustworthy candidate
+                - usage: Token usage information
+                - evals: Dictionary of evaluation scores for evals that do not require the response
+                - explanation: Optional explanation for the trustworthiness score of the best candidate
+        """
+        response_dicts = [
+            {"chat_completion": response.model_dump()} if isinstance(response, ChatCompletion) else response
+            for response in responses
+        ]
+
+        return self._run(
+            self._async_score_many(
+                responses=response_dicts,
+                context=context,
+                evals=evals,
+                **openai_kwargs,
+            )
+        )
+
+    def explain(
+        self,
+        result: InferenceResult,
+        *,
+        context: str | None = None,
+        **openai_kwargs: Any,
+    ) -> str | None:
+        """Generate an explanation for the trustworthiness score of a previous `create()` or `score()` result on demand,
+        e.g. for results scored with `Config.defer_explanation` that were above the explainability threshold.
+
+        This makes a single LLM call, with the reasoning effort configured for this TLM instance.
+
+        Args:
+            result: The result of a previous `create()` or `score()` call.
+            context: Optional context string for RAG workflows, as passed to the original call.
+            **openai_kwargs: OpenAI-compatible completion parameters of the original call (e.g. messages).
+
+        Returns:
+            The explanation, or None if the explanation call failed.
+        """
+        return self._run(self._async_explain(result, context=context, **openai_kwargs))
+
+    def plan(
+        self,
+        *,
+        response: ChatCompletion | dict[str, Any] | None = None,
+        context: str | None = None,
+        evals: list[Eval] | None = None,
+        **openai_kwargs: Any,
+    ) -> InferencePlan:
+        """Estimate the LLM calls, tokens and cost of a `create()` (or `score()`, if `response` is given) call,
+        without calling any LLM.
+
+        The pipeline is built exactly as for the real call. Input tokens are counted on the formatted prompts,
+        output tokens are estimated from each prompt template's expected output length, and generated answers are
+        replaced by fixed-length placeholders.
+
+        Args:
+            response: Optional existing response, if planning a `score()` call.
+            context: Optional context string for RAG workflows.
+            evals: Optional list of semantic evaluations to apply.
+            **openai_kwargs: OpenAI-compatible completion parameters, as passed to `create()`/`score()`.
+
+        Returns:
+            InferencePlan with the estimated number of LLM calls and tokens per component and model, and the
+            estimated cost per model.
+        """
+        if isinstance(response, ChatCompletion):
+            response = {"chat_completion": response.model_dump()}
+
+        config = self._prepare_inference(openai_kwargs, score=response is not None, context=context)
+
+        return tlm_plan(
+            completion_params=openai_kwargs,
+            response=response,
+            evals=evals,
+            context=context,
+            config=config,
+        )
+
+    def plan_batch(self, requests: list[dict[str, Any]]) -> InferencePlan:
+        """Estimate the total LLM calls, tokens and cost of a batch of requests, without calling any LLM.
+
+        Args:
+            requests: Keyword arguments of each request, as they would be passed to `plan()`.
+
+        Returns:
+            InferencePlan with the totals across all requests.
+        """
+        return InferencePlan.combine([self.plan(**request) for request in requests])
+
     async def _async_inference(
         self,
         *,
@@ -156,25 +383,101 @@ class TLM:
         delegates to the TLM inference pipeline. It is called by both `create()` and
         `score()` methods.
         """
+        config = self._prepare_inference(openai_kwargs, score=response is not None, context=context)
+
+        return await tlm_inference(
+            completion_params=openai_kwargs,
+            response=response,
+            evals=evals,
+            context=context,
+            config=config,
+            prompt_cache=self._prompt_cache,
+            eval_cache=self._eval_cache,
+            usage_totals=self._usage_totals,
+        )
+
+    async def _async_score_many(
+        self,
+        *,
+        responses: list[dict[str, Any]],
+        context: str | None = None,
+        evals: list[Eval] | None = None,
+        **openai_kwargs: Any,
+    ) -> ScoreManyResult:
+        """Internal async method that scores multiple candidate responses in a single pipeline."""
+        config = self._prepare_inference(openai_kwargs, score=True, context=context)
+
+        return await tlm_score_many(
+            completion_params=openai_kwargs,
+            responses=responses,
+            evals=evals,
+            context=context,
+            config=config,
+            prompt_cache=self._prompt_cache,
+            eval_cache=self._eval_cache,
+            usage_totals=self._usage_totals,
+        )
+
+    async def _async_explain(
+        self,
+        result: InferenceResult,
+        *,
+        context: str | None = None,
+        **openai_kwargs: Any,
+    ) -> str | None:
+        """Internal async method that generates an explanation for a previous result."""
+        config = self._prepare_inference(openai_kwargs, score=True, context=context)
+        reasoning_effort = config.explanation_reasoning_effort if config.defer_explanation else config.reasoning_effort
+
+        with track_usage() as usage_tracker, attribute_usage_to(DEFERRED_EXPLANATION_COMPONENT):
+            explanation = await generate_explanation(
+                format_user_request(openai_kwargs),
+                get_response_text(result["response"]),
+                reasoning_effort,
+            )
+        self._usage_totals.merge(usage_tracker)
+
+        return explanation
+
+    def _prepare_inference(self, openai_kwargs: dict[str, Any], *, score: bool, context: str | None) -> BaseConfig:
+        """Detects the workflow type and builds the inference config.
+
+        Also converts the response_format (in place) into its JSON schema representation.
+        """
         workflow_type = WorkflowType.from_inference_params(
             openai_args=openai_kwargs,
-            score=response is not None,
+            score=score,
             rag=(context is not None),
             constrain_outputs=self.config.constrain_outputs,
         )
         model = openai_kwargs.get("model")
         config = BaseConfig.from_input(self.config, workflow_type, model)
 
-        if openai_kwargs.get("response_format"):
-            openai_kwargs["response_format"] = type_to_response_format_param(openai_kwargs["response_format"])
+        response_format = openai_kwargs.get("response_format")
+        if isinstance(response_format, type):
+            openai_kwargs["response_format"] = get_response_format_param(response_format)
+        elif response_format:
+            openai_kwargs["response_format"] = type_to_response_format_param(response_format)
 
-        return await tlm_inference(
-            completion_params=openai_kwargs,
-            response=response,
-            evals=evals,
-            context=context,
-            config=config,
-        )
+        return config
+
+    def get_usage_totals(self) -> dict[str, Any]:
+        """Returns the running token usage totals of all requests made with this TLM instance (e.g. over a batch),
+        in total, per model and per component, with dollar costs if a price table is configured.
+        """
+        return self._usage_totals.summarize(self.config.price_table)
+
+    def reset_usage_totals(self) -> None:
+        """Resets the running token usage totals returned by `get_usage_totals()`."""
+        self._usage_totals.reset()
+
+    def get_eval_cache_stats(self) -> dict[str, Any] | None:
+        """Returns the size and the hits, misses and hit rate of the Eval score cache of this TLM instance, None if
+        the cache is disabled (see `Config.use_eval_cache`).
+        """
+        if self._eval_cache is None:
+            return None
+        return self._eval_cache.get_stats()
 
     def get_untrustworthy_fields(
         self,
@@ -7,6 +7,7 @@ from .semantic_evaluation_score_generator import SemanticEvaluationScoreGenerato
 from .response_assembly import ResponseAssembly
 from .scores.trustworthiness_score_computation import TrustworthinessScoreComputation
 from .scores.consistency_score_computation import ConsistencyScoreComputation
+from .scores.label_distribution_score_computation import LabelDistributionScoreComputation
 from .scores.perplexity_score_computation import PerplexityScoreComputation
 from .scores.prompt_evaluation_score_extraction import PromptEvaluationScoreExtraction
 from .scores.self_reflection_score_computation import SelfReflectionScoreComputation
@@ -18,6 +19,7 @@ __all__ = [
     "ObservedConsistencyCompletionGenerator",
     "SelfReflectionCompletionGenerator",
     "ConsistencyScoreComputation",
+    "LabelDistributionScoreComputation",
     "TrustworthinessScoreComputation",
     "PerplexityScoreComputation",
     "SelfReflectionScoreComputation",
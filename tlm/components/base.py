@@ -3,8 +3,18 @@ import logging
 from abc import ABC, abstractmethod
 from typing import Any
 
+from tlm.types import PlannedCompletion
+
 logger = logging.getLogger(__name__)
 
+# length of the placeholder answers that stand in for generated answers when planning a pipeline
+PLACEHOLDER_ANSWER_TOKENS = 50
+
+
+def get_placeholder_answer(num_tokens: int = PLACEHOLDER_ANSWER_TOKENS) -> str:
+    """Returns a placeholder text of roughly num_tokens tokens."""
+    return " ".join(["answer"] * num_tokens)
+
 
 # TODO: consider requiring typed properties rather than a generic "results" dictionary
 # similar to Metadata object in existing SaaS TLM
@@ -53,3 +63,10 @@ class Component(ABC):
     @abstractmethod
     async def execute(self) -> None:
         pass
+
+    def plan(self) -> list[PlannedCompletion]:
+        """Returns the LLM calls this component would make, without making them.
+
+        Components that produce answers used by later components add placeholders for them to the execution context.
+        """
+        return []
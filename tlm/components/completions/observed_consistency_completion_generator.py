@@ -1,14 +1,18 @@
 import asyncio
+from typing import Any
 
 from tlm.components import Component
+from tlm.components.base import get_placeholder_answer
 from tlm.config.presets import ReasoningEffort
 from tlm.utils.completion_utils import generate_completion
 from tlm.utils.response_format_utils import add_explanation_to_response_format
 from tlm.templates import ObservedConsistencyQACompletionTemplate
+from tlm.templates.template_cache import get_cached_template
 from tlm.utils.prompt_utils import extract_user_prompt
-from tlm.types import Completion, ExtractedResponseField, CompletionParams
+from tlm.types import Completion, CompletionFailure, ExtractedResponseField, CompletionParams, PlannedCompletion
 from tlm.config.defaults import get_settings
 from tlm.config.presets import REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS
+from tlm.utils.cache_utils import LRUCache, hash_cache_key
 
 
 settings = get_settings()
@@ -22,6 +26,8 @@ class ObservedConsistencyCompletionGenerator(Component):
         temperature: float,
         reasoning_effort: ReasoningEffort,
         constrain_outputs: list[str] | None,
+        prompt_cache: LRUCache[str, Any] | None = None,
+        previous_completions: list[Completion | CompletionFailure] | None = None,
         depends_on: list[Component] | None = None,
     ):
         if count < 0:
@@ -37,35 +43,39 @@ class ObservedConsistencyCompletionGenerator(Component):
         self.constrain_outputs = constrain_outputs
         self.reasoning_effort = reasoning_effort
         self.max_explanation_words = REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS[reasoning_effort]
-        self.template = ObservedConsistencyQACompletionTemplate.create(
+        self.template = get_cached_template(
+            ObservedConsistencyQACompletionTemplate,
             reasoning_effort=reasoning_effort,
             constrain_outputs=constrain_outputs,
             extract_answer=modified_params is not None,
         )
+        self.prompt_cache = prompt_cache
+        # completions generated by an earlier run for the same prompt (e.g. before escalation), only the rest is generated
+        self.previous_completions = list(previous_completions or [])[:count]
 
         super().__init__(depends_on=depends_on)
 
     async def execute(self) -> None:
         observed_consistency_answers: list[str | None] = []
         observed_consistency_completions = []
+        used_prompt_cache = False
 
         if self.count > 0:
-            user_prompt = extract_user_prompt(self.completion_params)
-            observed_consistency_completions = await asyncio.gather(
-                *[
-                    asyncio.create_task(
-                        generate_completion(
-                            self.template,
-                            completion_params=self.completion_params,
-                            template_kwargs={
-                                "question": user_prompt,
-                                "max_explanation_words": self.max_explanation_words,
-                            },
-                        )
-                    )
-                    for _ in range(self.count)
-                ]
-            )
+            cache_key = self._get_prompt_cache_key()
+            cached_completions = self.prompt_cache.get(cache_key) if self.prompt_cache is not None else None
+
+            if cached_completions is not None:
+                observed_consistency_completions = list(cached_completions)
+                used_prompt_cache = True
+            else:
+                observed_consistency_completions = self.previous_completions + await self._generate_completions(
+                    self.count - len(self.previous_completions)
+                )
+                # only cache complete results, so failed completions are retried on the next call
+                if self.prompt_cache is not None and all(
+                    isinstance(completion, Completion) for completion in observed_consistency_completions
+                ):
+                    self.prompt_cache.set(cache_key, observed_consistency_completions)
 
             for completion in observed_consistency_completions:
                 if isinstance(completion, Completion):
@@ -79,3 +89,54 @@ class ObservedConsistencyCompletionGenerator(Component):
 
         self.execution_context.add("consistency_answers", observed_consistency_answers)
         self.execution_context.add("consistency_completions", observed_consistency_completions)
+        self.execution_context.add("consistency_completions_cached", used_prompt_cache)
+
+    def plan(self) -> list[PlannedCompletion]:
+        self.execution_context.add("consistency_answers", [get_placeholder_answer()] * self.count)
+        num_completions = self.count - len(self.previous_completions)
+        if num_completions == 0:
+            return []
+
+        return [
+            PlannedCompletion(
+                model=self.completion_params.get("model") or settings.DEFAULT_MODEL,
+                messages=self.template.format_messages(
+                    messages=self.completion_params.get("messages"), **self._get_template_kwargs()
+                ),
+                expected_output_tokens=self.template.get_expected_output_tokens(self.max_explanation_words),
+                count=num_completions,
+            )
+        ]
+
+    async def _generate_completions(self, count: int) -> list[Completion | CompletionFailure]:
+        template_kwargs = self._get_template_kwargs()
+        return await asyncio.gather(
+            *[
+                asyncio.create_task(
+                    generate_completion(
+                        self.template,
+                        completion_params=self.completion_params,
+                        template_kwargs=template_kwargs,
+                    )
+                )
+                for _ in range(count)
+            ]
+        )
+
+    def _get_template_kwargs(self) -> dict[str, Any]:
+        return {
+            "question": extract_user_prompt(self.completion_params),
+            "max_explanation_words": self.max_explanation_words,
+        }
+
+    def _get_prompt_cache_key(self) -> str:
+        return hash_cache_key(
+            [
+                self.__class__.__name__,
+                self.completion_params,
+                self.count,
+                self.temperature,
+                self.reasoning_effort,
+                self.constrain_outputs,
+            ]
+        )
@@ -1,18 +1,49 @@
 import asyncio
+from typing import Any
 
 from tlm.components import Component
+from tlm.config.defaults import get_settings
+from tlm.config.presets import PromptLayout
 from tlm.templates import PromptAnswerabilityCompletionTemplate
+from tlm.templates.template_cache import get_cached_template
+from tlm.types import Completion, CompletionFailure, PlannedCompletion
+from tlm.utils.cache_utils import LRUCache, hash_cache_key
 from tlm.utils.completion_utils import generate_completion
 
+settings = get_settings()
+
 
 class PromptEvaluationCompletionGenerator(Component):
-    def __init__(self, prompt: str, temperature: float | None, **kwargs):
+    def __init__(
+        self,
+        prompt: str,
+        temperature: float | None,
+        prompt_cache: LRUCache[str, Any] | None = None,
+        previous_completions: list[Completion | CompletionFailure] | None = None,
+        prompt_layout: PromptLayout = PromptLayout.DEFAULT,
+        **kwargs,
+    ):
         self.prompt = prompt
         self.temperature = temperature
-        self.template = PromptAnswerabilityCompletionTemplate.create()
+        self.prompt_layout = prompt_layout
+        self.template = get_cached_template(PromptAnswerabilityCompletionTemplate, prompt_layout=prompt_layout)
+        self.prompt_cache = prompt_cache
+        self.previous_completions = previous_completions
         super().__init__(**kwargs)
 
     async def execute(self) -> None:
+        if self.previous_completions:
+            self.execution_context.add("prompt_evaluation_completions", list(self.previous_completions))
+            self.execution_context.add("prompt_evaluation_completions_cached", False)
+            return
+
+        cache_key = hash_cache_key([self.__class__.__name__, self.prompt, self.temperature, self.prompt_layout.value])
+        cached_completions = self.prompt_cache.get(cache_key) if self.prompt_cache is not None else None
+        if cached_completions is not None:
+            self.execution_context.add("prompt_evaluation_completions", list(cached_completions))
+            self.execution_context.add("prompt_evaluation_completions_cached", True)
+            return
+
         prompt_evaluation_completions = []
 
         prompt_evaluation_completion_tasks = [
@@ -28,4 +59,22 @@ class PromptEvaluationCompletionGenerator(Component):
         ]
 
         prompt_evaluation_completions = await asyncio.gather(*prompt_evaluation_completion_tasks)
+        if self.prompt_cache is not None and all(
+            isinstance(completion, Completion) for completion in prompt_evaluation_completions
+        ):
+            self.prompt_cache.set(cache_key, prompt_evaluation_completions)
+
         self.execution_context.add("prompt_evaluation_completions", prompt_evaluation_completions)
+        self.execution_context.add("prompt_evaluation_completions_cached", False)
+
+    def plan(self) -> list[PlannedCompletion]:
+        if self.previous_completions:
+            return []
+
+        return [
+            PlannedCompletion(
+                model=settings.DEFAULT_MODEL,
+                messages=self.template.format_messages(prompt=self.prompt),
+                expected_output_tokens=self.template.get_expected_output_tokens(),
+            )
+        ]
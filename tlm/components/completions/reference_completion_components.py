@@ -2,31 +2,45 @@ import asyncio
 from typing import Any, Dict
 
 from tlm.components import Component
+from tlm.components.base import get_placeholder_answer
+from tlm.config.defaults import get_settings
 from tlm.config.presets import REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS, ReasoningEffort
 from tlm.templates.reference_completion_template import ReferenceCompletionTemplate
+from tlm.templates.template_cache import get_cached_template
 from tlm.utils.completion_utils import generate_completion
-from tlm.types import Completion, ExtractedResponseField, CompletionParams
+from tlm.types import Completion, ExtractedResponseField, CompletionParams, PlannedCompletion
 from tlm.utils.prompt_utils import extract_user_prompt
 from tlm.utils.response_format_utils import add_explanation_to_response_format
 
+settings = get_settings()
+
 
 class ReferenceCompletionFormatter(Component):
     """
     Used in scoring workflows when reference completions are provided as input.
+    Multiple responses (e.g. candidates from best-of-N sampling) are scored as multiple reference answers.
+    Already generated completions (e.g. from a lower quality preset run that is being escalated) can be passed directly.
     This component adds required context for usage by future components.
     """
 
     def __init__(
         self,
         completion_params: CompletionParams,
-        response_input: Dict[str, Any],
+        response_input: Dict[str, Any] | Completion | list[Dict[str, Any]] | list[Completion],
         depends_on: list[Component] | None = None,
     ):
         self.completion_params = completion_params
 
-        reference_completion = Completion.from_completion_dict(response_input)
-        self.reference_completions = [reference_completion]
-        self.reference_answers = [reference_completion.response_fields[ExtractedResponseField.ANSWER]]
+        response_inputs = response_input if isinstance(response_input, list) else [response_input]
+        self.reference_completions = [
+            response if isinstance(response, Completion) else Completion.from_completion_dict(response)
+            for response in response_inputs
+        ]
+        self.reference_answers = [
+            completion.response_fields.get(ExtractedResponseField.ANSWER)
+            or completion.response_fields.get(ExtractedResponseField.MESSAGE, completion.message)
+            for completion in self.reference_completions
+        ]
 
         super().__init__(depends_on=depends_on)
 
@@ -36,6 +50,10 @@ class ReferenceCompletionFormatter(Component):
         self.execution_context.add("reference_completions", self.reference_completions)
         self.execution_context.add("reference_answers", self.reference_answers)
 
+    def plan(self) -> list[PlannedCompletion]:
+        self.execution_context.add("reference_answers", self.reference_answers)
+        return []
+
 
 class ReferenceCompletionGenerator(Component):
     def __init__(
@@ -62,7 +80,8 @@ class ReferenceCompletionGenerator(Component):
 
         self.constrain_outputs = constrain_outputs
         self.max_explanation_words = REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS[reasoning_effort]
-        self.template = ReferenceCompletionTemplate.create(
+        self.template = get_cached_template(
+            ReferenceCompletionTemplate,
             reasoning_effort=reasoning_effort,
             constrain_outputs=constrain_outputs,
             extract_answer=modified_params is not None,
@@ -74,10 +93,7 @@ class ReferenceCompletionGenerator(Component):
         # this is used for counting input tokens, revisit later
         self.execution_context.add("prompt", extract_user_prompt(self.completion_params))
 
-        template_kwargs = {
-            "prompt": extract_user_prompt(self.completion_params),
-            "max_explanation_words": self.max_explanation_words,
-        }
+        template_kwargs = self._get_template_kwargs()
 
         completion_tasks = [
             asyncio.create_task(
@@ -112,3 +128,22 @@ class ReferenceCompletionGenerator(Component):
         self.execution_context.add("reference_answers", reference_answers)
         self.execution_context.add("reference_completions", reference_completions)
         self.execution_context.add("reference_failures", reference_failures)
+
+    def plan(self) -> list[PlannedCompletion]:
+        self.execution_context.add("reference_answers", [get_placeholder_answer()] * self.count)
+        return [
+            PlannedCompletion(
+                model=self.completion_params.get("model") or settings.DEFAULT_MODEL,
+                messages=self.template.format_messages(
+                    messages=self.completion_params.get("messages"), **self._get_template_kwargs()
+                ),
+                expected_output_tokens=self.template.get_expected_output_tokens(self.max_explanation_words),
+                count=self.count,
+            )
+        ]
+
+    def _get_template_kwargs(self) -> dict[str, Any]:
+        return {
+            "prompt": extract_user_prompt(self.completion_params),
+            "max_explanation_words": self.max_explanation_words,
+        }
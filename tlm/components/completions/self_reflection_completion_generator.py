@@ -1,9 +1,21 @@
 import asyncio
+from typing import Any
 
 from tlm.components import Component
-from tlm.config.presets import REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS, ReasoningEffort, WorkflowType
+from tlm.config.defaults import get_settings
+from tlm.config.presets import REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS, PromptLayout, ReasoningEffort, WorkflowType
 from tlm.templates.reflection_completion_templates import SELF_REFLECTION_TEMPLATES_BY_WORKFLOW
+from tlm.templates.template_cache import get_cached_template
+from tlm.types import Completion, CompletionFailure, CompletionTemplate, PlannedCompletion, SOReflectionScoreConfigType
 from tlm.utils.completion_utils import generate_completion
+from tlm.utils.response_format_utils import get_response_format_model
+from tlm.utils.scoring.per_field_scoring_utils import merge_field_chunk_completions, split_fields_into_chunks
+from tlm.utils.scoring.self_reflection_scoring_utils import self_reflections_agree
+
+settings = get_settings()
+
+# number of (highest priority) templates that run before deciding whether the remaining ones are needed in staged mode
+STAGED_SELF_REFLECTION_FIRST_STAGE_SIZE = 2
 
 
 class SelfReflectionCompletionGenerator(Component):
@@ -13,6 +25,12 @@ class SelfReflectionCompletionGenerator(Component):
         reasoning_effort: ReasoningEffort,
         workflow_type: WorkflowType,
         num_completions: int,
+        staged: bool = False,
+        agreement_margin: float = 0.1,
+        field_chunk_size: int | None = None,
+        prompt_layout: PromptLayout = PromptLayout.DEFAULT,
+        previous_templates: list[list[type[CompletionTemplate]]] | None = None,
+        previous_completions: list[list[Completion | CompletionFailure]] | None = None,
         **kwargs,
     ):
         self.prompt = prompt
@@ -26,41 +44,139 @@ class SelfReflectionCompletionGenerator(Component):
             completion_templates = completion_templates[:num_completions]
 
         self.completion_templates = completion_templates
+        # in staged mode, templates run in priority order and the remaining templates are skipped for a reference
+        # answer once the first ones agree (all scores within agreement_margin of 0, or all within it of 1)
+        self.staged = staged
+        self.agreement_margin = agreement_margin
+        # per-field templates judge at most field_chunk_size fields of a structured output answer per call, so that the
+        # output of large schemas stays within the token budget; the chunks run concurrently and are merged
+        self.field_chunk_size = field_chunk_size
+        self.prompt_layout = prompt_layout
+        # completions of an earlier run for the same reference answers (e.g. before escalation), one row per answer
+        # with the templates that ran for it; only the templates that did not run yet are generated
+        self.previous_templates = previous_templates or []
+        self.previous_completions = previous_completions or []
 
         super().__init__(**kwargs)
 
     async def execute(self) -> None:
         reference_answers: list[str] = self.execution_context.get("reference_answers")
 
-        completion_tasks = []
-
-        for answer in reference_answers:
-            template_kwargs = {
-                "question": self.prompt,
-                "answer": answer,
-                "max_explanation_words": REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS[self.reasoning_effort],
-            }
-
-            completion_tasks.extend(
-                [
-                    asyncio.create_task(
-                        generate_completion(
-                            template=template.create(reasoning_effort=self.reasoning_effort),
-                            template_kwargs=template_kwargs,
-                            temperature=0.0,
-                            response_format_model=template.construct_response_format(answer),
-                            reference_answer=answer,
-                        )
-                    )
-                    for template in self.completion_templates
-                ]
+        rows = await asyncio.gather(
+            *[self._generate_reflections(answer_idx, answer) for answer_idx, answer in enumerate(reference_answers)]
+        )
+
+        # 2D arrays: rows = number of reference answers, cols = number of completion templates that ran for the answer
+        self.execution_context.add("self_reflection_completions", [completions for _, completions in rows])
+        self.execution_context.add("self_reflection_templates", [templates for templates, _ in rows])
+
+    def plan(self) -> list[PlannedCompletion]:
+        reference_answers: list[str] = self.execution_context.get("reference_answers")
+        max_explanation_words = REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS[self.reasoning_effort]
+
+        # staged mode is planned for the worst case, where all templates run
+        return [
+            PlannedCompletion(
+                model=settings.DEFAULT_MODEL,
+                messages=template.format_messages(**self._get_template_kwargs(chunk)),
+                expected_output_tokens=template.get_expected_output_tokens(max_explanation_words),
+            )
+            for answer_idx, answer in enumerate(reference_answers)
+            for template_cls, template in zip(self.completion_templates, self._get_templates(), strict=True)
+            if self._get_previous_completion(answer_idx, template_cls) is None
+            for chunk in self._get_field_chunks(template, answer) or [answer]
+        ]
+
+    async def _generate_reflections(
+        self, answer_idx: int, answer: str
+    ) -> tuple[list[type[CompletionTemplate]], list[Completion | CompletionFailure]]:
+        """Returns the templates that ran for the reference answer and their completions."""
+        templates = list(zip(self.completion_templates, self._get_templates(), strict=True))
+        if not self.staged:
+            return self.completion_templates, await self._generate_completions(answer_idx, answer, templates)
+
+        first_stage = templates[:STAGED_SELF_REFLECTION_FIRST_STAGE_SIZE]
+        completions = await self._generate_completions(answer_idx, answer, first_stage)
+        if len(templates) > len(first_stage) and self_reflections_agree(completions, self.agreement_margin):
+            return [template_cls for template_cls, _ in first_stage], completions
+
+        remaining_stage = templates[len(first_stage) :]
+        completions += await self._generate_completions(answer_idx, answer, remaining_stage)
+        return self.completion_templates, completions
+
+    async def _generate_completions(
+        self,
+        answer_idx: int,
+        answer: str,
+        templates: list[tuple[type[CompletionTemplate], CompletionTemplate]],
+    ) -> list[Completion | CompletionFailure]:
+        template_kwargs = self._get_template_kwargs(answer)
+        completions: list[Completion | CompletionFailure | asyncio.Task] = [
+            self._get_previous_completion(answer_idx, template_cls)
+            or asyncio.create_task(
+                self._generate_chunked_completion(template_cls, template, chunks)
+                if (chunks := self._get_field_chunks(template, answer))
+                else generate_completion(
+                    template=template,
+                    template_kwargs=template_kwargs,
+                    temperature=0.0,
+                    response_format_model=get_response_format_model(template_cls, answer),
+                    reference_answer=answer,
+                )
             )
+            for template_cls, template in templates
+        ]
+
+        await asyncio.gather(*[completion for completion in completions if isinstance(completion, asyncio.Task)])
+        return [
+            completion.result() if isinstance(completion, asyncio.Task) else completion for completion in completions
+        ]
+
+    async def _generate_chunked_completion(
+        self, template_cls: type[CompletionTemplate], template: CompletionTemplate, chunks: list[str]
+    ) -> Completion | CompletionFailure:
+        """Runs a per-field template on each chunk of fields concurrently and merges the chunk completions."""
+        chunk_completions = await asyncio.gather(
+            *[
+                generate_completion(
+                    template=template,
+                    template_kwargs=self._get_template_kwargs(chunk),
+                    temperature=0.0,
+                    response_format_model=get_response_format_model(template_cls, chunk),
+                    reference_answer=chunk,
+                )
+                for chunk in chunks
+            ]
+        )
+        return merge_field_chunk_completions(chunk_completions)
+
+    def _get_field_chunks(self, template: CompletionTemplate, answer: str) -> list[str] | None:
+        """Returns the chunks of fields of the answer to judge separately with a per-field template, or None if the
+        template judges the whole answer in one call.
+        """
+        if self.field_chunk_size is None or template.so_reflection_score_config_type not in (
+            SOReflectionScoreConfigType.PER_FIELD,
+            SOReflectionScoreConfigType.INCORRECT_FIELDS,
+        ):
+            return None
+        return split_fields_into_chunks(answer, self.field_chunk_size)
 
-        self_reflection_completions_flat = await asyncio.gather(*completion_tasks)
-        # Reshape into 2D array: rows = number of reference answers, cols = number of completion templates
-        num_templates = len(self.completion_templates)
-        self_reflection_completions = [
-            self_reflection_completions_flat[i : i + num_templates]
-            for i in range(0, len(self_reflection_completions_flat), num_templates)
+    def _get_previous_completion(
+        self, answer_idx: int, template_cls: type[CompletionTemplate]
+    ) -> Completion | CompletionFailure | None:
+        if answer_idx >= len(self.previous_templates) or template_cls not in self.previous_templates[answer_idx]:
+            return None
+        return self.previous_completions[answer_idx][self.previous_templates[answer_idx].index(template_cls)]
+
+    def _get_templates(self) -> list[CompletionTemplate]:
+        return [
+            get_cached_template(template, prompt_layout=self.prompt_layout, reasoning_effort=self.reasoning_effort)
+            for template in self.completion_templates
         ]
-        self.execution_context.add("self_reflection_completions", self_reflection_completions)
+
+    def _get_template_kwargs(self, answer: str) -> dict[str, Any]:
+        return {
+            "question": self.prompt,
+            "answer": answer,
+            "max_explanation_words": REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS[self.reasoning_effort],
+        }
@@ -4,7 +4,7 @@ from typing import Literal
 from tlm.components import Component
 from tlm.types import Completion, InferenceType
 from tlm.utils.math_utils import make_score_asymptotic
-from tlm.utils.tokenize_utils import get_token_count
+from tlm.utils.tokenize_utils import aget_token_count
 from tlm.utils.explainability_utils import get_explainability_message
 from tlm.utils.completion_utils import get_cleaned_chat_completion
 
@@ -13,6 +13,9 @@ class ResponseAssembly(Component):
     """
     Assembles the response using context from previous components.
     This includes adding explanations, custom evals, usage, and metadata.
+
+    With explain_best_response (when scoring several candidate responses), whether and how the best response is
+    explained depends on its own score and self reflections only, rather than on those of all candidates.
     """
 
     def __init__(
@@ -21,12 +24,14 @@ class ResponseAssembly(Component):
         response_type: Literal["answer", "completion"],
         inference_type: InferenceType,
         log_metadata: list[str] = [],
+        explain_best_response: bool = False,
         depends_on: list[Component] | None = None,
     ):
         self.model = model
         self.response_type = response_type
         self.inference_type = inference_type
         self.log_metadata = log_metadata
+        self.explain_best_response = explain_best_response
         super().__init__(depends_on=depends_on)
 
     async def execute(self) -> None:
@@ -61,8 +66,8 @@ class ResponseAssembly(Component):
         if self.inference_type == InferenceType.PROMPT:
             if best_completion.usage is None:
                 prompt = self.execution_context.get("prompt", "")
-                prompt_tokens = get_token_count(prompt, self.model)
-                completion_tokens = get_token_count(best_answer, self.model)
+                prompt_tokens = await aget_token_count(prompt, self.model)
+                completion_tokens = await aget_token_count(best_answer, self.model)
             else:
                 prompt_tokens = best_completion.usage.prompt_tokens
                 completion_tokens = best_completion.usage.completion_tokens
@@ -74,10 +79,11 @@ class ResponseAssembly(Component):
                 },
             )
 
-        self_reflection_completions = self.execution_context.get("self_reflection_completions")
-        consistency_scores = self.execution_context.get("consistency_scores")
-        observed_consistency_completions = self.execution_context.get("consistency_completions")
-        consistency_scores_flat = self.execution_context.get("consistency_scores_flat")
+        # pipelines in logprob-fast mode generate no self reflection or observed consistency completions
+        self_reflection_completions = self.execution_context.get("self_reflection_completions", [])
+        consistency_scores = self.execution_context.get("consistency_scores", np.array([]))
+        observed_consistency_completions = self.execution_context.get("consistency_completions", [])
+        consistency_scores_flat = self.execution_context.get("consistency_scores_flat", np.array([]))
         num_reference_answers = len(reference_answers)
         if consistency_scores_flat.size > 0:
             consistency_scores_for_best_answer = consistency_scores_flat.reshape(num_reference_answers, -1)[
@@ -91,13 +97,19 @@ class ResponseAssembly(Component):
         else:
             mean_consistency_score = float(np.nanmean(consistency_scores))
 
+        explained_score = average_trustworthiness_score
+        if self.explain_best_response and average_trustworthiness_score is not None:
+            explained_score = float(trustworthiness_scores[best_answer_idx])
+
         explainability_message = get_explainability_message(
-            average_trustworthiness_score,
+            explained_score,
             self_reflection_completions,
             observed_consistency_completions,
             mean_consistency_score,
             consistency_scores_for_best_answer,
             best_answer_idx,
             best_answer,
+            label_distribution=self.execution_context.get("label_distribution"),
+            best_answer_reflections_only=self.explain_best_response,
         )
         self.execution_context.add("explanation", explainability_message)
@@ -1,13 +1,22 @@
 from tlm.components import Component
+from tlm.config.defaults import get_settings
+from tlm.templates.llm_consistency_completion_templates import (
+    CodeConsistencyCompletionTemplate,
+    StatementConsistencyCompletionTemplate,
+)
+from tlm.templates.template_cache import get_cached_template
 from tlm.utils.scoring.consistency_scoring_utils import (
     compute_consistency_scores,
     compute_consistency_scores_classification,
+    compute_structured_consistency_scores,
 )
 from tlm.utils.scoring.indicator_scoring_utils import compute_indicator_scores
-from tlm.types import SimilarityMeasure
+from tlm.types import PlannedCompletion, SimilarityMeasure
 
 import numpy as np
 
+settings = get_settings()
+
 
 class ConsistencyScoreComputation(Component):
     def __init__(
@@ -36,6 +45,15 @@ class ConsistencyScoreComputation(Component):
                 # Classification tasks don't use indicator scores
                 average_indicator_scores = np.array([None] * len(reference_answers))
                 indicator_scores_flat = np.array([None] * len(reference_answers) * len(consistency_answers))
+            elif self.similarity_measure == SimilarityMeasure.STRUCTURED:
+                average_consistency_scores, consistency_scores_flat, consistency_scores_per_field = (
+                    compute_structured_consistency_scores(reference_answers, consistency_answers)
+                )
+                # per top-level field of the responses, reported in the per-field score metadata
+                self.execution_context.add("consistency_scores_per_field", consistency_scores_per_field)
+                average_indicator_scores, indicator_scores_flat = compute_indicator_scores(
+                    reference_answers, consistency_answers
+                )
             else:
                 average_consistency_scores, consistency_scores_flat = await compute_consistency_scores(
                     reference_answers, consistency_answers, self.similarity_measure, self.structured_outputs
@@ -53,3 +71,30 @@ class ConsistencyScoreComputation(Component):
         self.execution_context.add("indicator_scores", average_indicator_scores)
         self.execution_context.add("consistency_scores_flat", consistency_scores_flat)
         self.execution_context.add("indicator_scores_flat", indicator_scores_flat)
+
+    def plan(self) -> list[PlannedCompletion]:
+        reference_answers: list[str] = self.execution_context.get("reference_answers")
+        consistency_answers: list[str] = self.execution_context.get("consistency_answers")
+
+        if not consistency_answers or self.constrain_outputs is not None:
+            return []
+
+        if self.similarity_measure == SimilarityMeasure.STATEMENT:
+            # each reference answer is compared to one consistency answer
+            template = get_cached_template(StatementConsistencyCompletionTemplate)
+            num_comparisons = min(len(reference_answers), len(consistency_answers))
+        elif self.similarity_measure == SimilarityMeasure.CODE:
+            # at most one comparison (to the median consistency answer) per reference answer
+            template = get_cached_template(CodeConsistencyCompletionTemplate)
+            num_comparisons = len(reference_answers)
+        else:
+            return []
+
+        return [
+            PlannedCompletion(
+                model=settings.DEFAULT_MODEL,
+                messages=template.format_messages(input_1=reference_answers[0], input_2=consistency_answers[0]),
+                expected_output_tokens=template.get_expected_output_tokens(),
+                count=num_comparisons,
+            )
+        ]
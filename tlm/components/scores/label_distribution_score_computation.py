@@ -0,0 +1,124 @@
+from typing import Any
+
+import numpy as np
+
+from tlm.components import Component
+from tlm.config.defaults import get_settings
+from tlm.config.presets import REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS, ReasoningEffort
+from tlm.templates.reference_completion_template import ReferenceCompletionTemplate
+from tlm.templates.template_cache import get_cached_template
+from tlm.types import Completion, CompletionFailure, CompletionParams, ExtractedResponseField, PlannedCompletion
+from tlm.utils.completion_utils import generate_completion
+from tlm.utils.prompt_utils import extract_user_prompt
+from tlm.utils.scoring.label_distribution_scoring_utils import (
+    get_calibrated_label_score,
+    get_label_distribution,
+    match_label,
+)
+
+settings = get_settings()
+
+
+class LabelDistributionScoreComputation(Component):
+    """
+    Scores classification answers in logprob-fast mode: the trustworthiness score of each reference answer is the
+    calibrated probability of its label, taken from the label distribution (over all constrain_outputs) of a single
+    completion's top logprobs. No observed consistency or self reflection completions are generated.
+
+    When reference answers are generated, the label distribution comes from the first reference completion.
+    When provided responses are scored, they carry no logprobs, so one completion is generated here.
+    """
+
+    def __init__(
+        self,
+        completion_params: CompletionParams,
+        constrain_outputs: list[str],
+        reasoning_effort: ReasoningEffort,
+        generate_label_completion: bool,
+        depends_on: list[Component] | None = None,
+    ):
+        self.completion_params = completion_params
+        self.constrain_outputs = constrain_outputs
+        self.max_explanation_words = REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS[reasoning_effort]
+        self.generate_label_completion = generate_label_completion
+        self.template = get_cached_template(
+            ReferenceCompletionTemplate,
+            reasoning_effort=reasoning_effort,
+            constrain_outputs=constrain_outputs,
+        )
+
+        super().__init__(depends_on=depends_on)
+
+    async def execute(self) -> None:
+        reference_answers: list[str] = self.execution_context.get("reference_answers")
+
+        label_completion: Completion | CompletionFailure
+        if self.generate_label_completion:
+            label_completion = await generate_completion(
+                template=self.template,
+                completion_params=self.completion_params,
+                template_kwargs=self._get_template_kwargs(),
+                temperature=0.0,
+            )
+        else:
+            label_completion = self.execution_context.get("reference_completions")[0]
+
+        label_distribution = get_label_distribution(label_completion, self.constrain_outputs)
+        trustworthiness_scores = np.array(
+            [self._get_score(answer, label_completion, label_distribution) for answer in reference_answers],
+            dtype=np.float64,
+        )
+
+        if label_distribution is not None:
+            normalized_distribution = label_distribution / label_distribution.sum()
+            self.execution_context.add(
+                "label_distribution",
+                {
+                    label: float(probability)
+                    for label, probability in zip(self.constrain_outputs, normalized_distribution, strict=True)
+                },
+            )
+        self.execution_context.add("trustworthiness_scores", trustworthiness_scores)
+
+    def plan(self) -> list[PlannedCompletion]:
+        if not self.generate_label_completion:
+            return []
+
+        return [
+            PlannedCompletion(
+                model=self.completion_params.get("model") or settings.DEFAULT_MODEL,
+                messages=self.template.format_messages(
+                    messages=self.completion_params.get("messages"), **self._get_template_kwargs()
+                ),
+                expected_output_tokens=self.template.get_expected_output_tokens(self.max_explanation_words),
+            )
+        ]
+
+    def _get_score(
+        self,
+        answer: str,
+        label_completion: Completion | CompletionFailure,
+        label_distribution: np.ndarray | None,
+    ) -> float:
+        label_idx = match_label(answer, self.constrain_outputs)
+        if label_idx is None:
+            # answers outside of the constrained outputs are scored 0, as in the consistency score of the full pipeline
+            return 0.0
+
+        if label_distribution is not None:
+            return get_calibrated_label_score(label_distribution, label_idx)
+
+        # without top logprobs, fall back to the confidence of the generated label
+        if (
+            isinstance(label_completion, Completion)
+            and label_completion.response_fields.get(ExtractedResponseField.ANSWER) == self.constrain_outputs[label_idx]
+            and label_completion.perplexity is not None
+        ):
+            return label_completion.perplexity
+        return np.nan
+
+    def _get_template_kwargs(self) -> dict[str, Any]:
+        return {
+            "prompt": extract_user_prompt(self.completion_params),
+            "max_explanation_words": self.max_explanation_words,
+        }
@@ -1,3 +1,5 @@
+import numpy as np
+
 from tlm.components import Component
 from tlm.utils.scoring.self_reflection_scoring_utils import generate_self_reflection_scores
 from tlm.types import Completion
@@ -12,7 +14,14 @@ class SelfReflectionScoreComputation(Component):
         self_reflection_completions_flat = [
             completion for sublist in self_reflection_completions for completion in sublist
         ]
-        self_reflection_scores = generate_self_reflection_scores(reference_answers, self_reflection_completions_flat)
+        # scored per reference answer, since staged self reflection may run a different number of templates per answer
+        self_reflection_scores = np.array(
+            [
+                generate_self_reflection_scores([answer], completions)[0]
+                for answer, completions in zip(reference_answers, self_reflection_completions, strict=True)
+            ],
+            dtype=np.float64,
+        )
 
         self.execution_context.add("self_reflection_scores", self_reflection_scores)
 
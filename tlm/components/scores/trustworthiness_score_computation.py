@@ -38,6 +38,6 @@ class TrustworthinessScoreComputation(Component):
             prompt_evaluation_scores,
         )
 
-        logger.info(f"Calculated trustworthiness scores: {trustworthiness_scores}")
+        logger.info("Calculated trustworthiness scores: %s", trustworthiness_scores)
 
         self.execution_context.add("trustworthiness_scores", trustworthiness_scores)
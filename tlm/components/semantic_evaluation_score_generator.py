@@ -1,16 +1,39 @@
 import asyncio
 
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
 from tlm.components import Component
-from tlm.config.presets import REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS, ReasoningEffort
-from tlm.templates import SemanticEvaluationCompletionTemplate
+from tlm.config.capabilities import get_model_capabilities
+from tlm.config.defaults import get_settings
+from tlm.config.presets import REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS, PromptLayout, ReasoningEffort
+from tlm.templates import BatchedSemanticEvaluationCompletionTemplate, SemanticEvaluationCompletionTemplate
+from tlm.templates.template_cache import get_cached_template
+from tlm.utils.cache_utils import LRUCache, hash_cache_key
 from tlm.utils.completion_utils import generate_completion
-from tlm.utils.scoring.semantic_evaluation_scoring_utils import compute_semantic_evaluation_scores
-from tlm.types import Eval
+from tlm.utils.scoring.semantic_evaluation_scoring_utils import (
+    aggregate_semantic_evaluation_scores,
+    get_batched_semantic_evaluation_scores,
+    get_semantic_evaluation_score,
+)
+from tlm.types import Completion, CompletionFailure, Eval, PlannedCompletion
+
+settings = get_settings()
 
 
 class SemanticEvaluationScoreGenerator(Component):
     """
     Generates completions and computes evaluation scores using LLM-as-judge with semantic criteria.
+
+    With batch_evals, the evals that depend on the response, and those that do not, are each rated in one
+    structured-output call per reference answer, so that the inputs (e.g. a long context) are sent once rather than once
+    per eval. Evals whose rating cannot be parsed from the batched response are rated with their own call.
+
+    With an eval_cache, the score of each (eval, reference answer) pair is cached under a hash of the eval and of the
+    inputs it uses, and cached scores skip their LLM call. Scores are only cached at temperature 0, where they are
+    deterministic, and failed scores are never cached.
     """
 
     def __init__(
@@ -20,6 +43,9 @@ class SemanticEvaluationScoreGenerator(Component):
         evals: list[Eval],
         reasoning_effort: ReasoningEffort,
         temperature: float,
+        batch_evals: bool = False,
+        prompt_layout: PromptLayout = PromptLayout.DEFAULT,
+        eval_cache: LRUCache[str, float] | None = None,
         **kwargs,
     ):
         query_required = any(eval.query_identifier is not None for eval in evals)
@@ -36,51 +62,251 @@ class SemanticEvaluationScoreGenerator(Component):
         self.reasoning_effort = reasoning_effort
         self.max_explanation_words = REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS[reasoning_effort]
         self.temperature = temperature
+        self.batch_evals = batch_evals
+        self.prompt_layout = prompt_layout
+        self.eval_cache = eval_cache if temperature == 0 else None
         super().__init__(**kwargs)
 
     async def execute(self) -> None:
         if not self.evals:
             return
 
-        use_reference_answers = any(eval.response_identifier is not None for eval in self.evals)
+        use_reference_answers = self._use_reference_answers()
+        reference_answers = self._get_reference_answers()
+
+        context_key = "evals_requiring_response" if use_reference_answers else "evals_not_requiring_response"
+        cache_keys = self._get_eval_cache_keys(reference_answers)
+        raw_scores = np.full((len(reference_answers), len(self.evals)), np.nan, dtype=np.float64)
+        self._add_cached_scores(raw_scores, cache_keys)
+        uncached = np.isnan(raw_scores)
+
+        if self.batch_evals:
+            await self._generate_batched_scores(reference_answers, raw_scores)
+        else:
+            await self._generate_scores(
+                reference_answers,
+                raw_scores,
+                [(eval_idx, answer_idx) for answer_idx, eval_idx in np.argwhere(uncached)],
+            )
 
-        reference_answers: list[str | None] = (
-            self.execution_context.get("reference_answers") if use_reference_answers else [None]
+        if self.eval_cache is not None:
+            for answer_idx, eval_idx in np.argwhere(uncached & ~np.isnan(raw_scores)):
+                self.eval_cache.set(cache_keys[answer_idx][eval_idx], float(raw_scores[answer_idx, eval_idx]))
+            self.execution_context.add(f"{context_key}_cache_hits", int(raw_scores.size - uncached.sum()))
+
+        self.execution_context.add(
+            context_key, aggregate_semantic_evaluation_scores(reference_answers, self.evals, raw_scores.reshape(-1))
         )
 
-        params = []
-        for answer in reference_answers:
-            for eval in self.evals:
-                params.append((eval, answer))
+    def plan(self) -> list[PlannedCompletion]:
+        if not self.evals:
+            return []
+
+        if self.batch_evals:
+            return [
+                self._plan_completion(self._get_batch_template(batch), self.evals[batch[0]], reference_answer)
+                for reference_answer in self._get_reference_answers()
+                for batch in self._get_eval_batches()
+            ]
 
-        completion_tasks = [
-            asyncio.create_task(
+        return [
+            PlannedCompletion(
+                model=settings.DEFAULT_MODEL,
+                messages=self._get_template(eval).format_messages(**self._get_template_kwargs(eval, reference_answer)),
+                expected_output_tokens=self._get_template(eval).get_expected_output_tokens(self.max_explanation_words),
+            )
+            for reference_answer in self._get_reference_answers()
+            for eval in self.evals
+        ]
+
+    async def _generate_batched_scores(
+        self, reference_answers: list[str | None], raw_scores: npt.NDArray[np.float64]
+    ) -> None:
+        """Fills in the missing (NaN) raw scores of the (reference answer, eval) pairs.
+
+        The missing scores of several evals of a batch are rated in one call per reference answer. Single evals, and
+        the evals of a batch whose rating is missing from a (successful) batched response, are rated with their own
+        call.
+        """
+        response_format_model_supported = get_model_capabilities(
+            settings.DEFAULT_MODEL, settings.DEFAULT_PROVIDER
+        ).supports_structured_outputs
+
+        batch_params: list[tuple[list[int], int]] = []
+        single_eval_params: list[tuple[int, int]] = []
+        for answer_idx in range(len(reference_answers)):
+            for batch in self._get_eval_batches():
+                missing_batch = [eval_idx for eval_idx in batch if np.isnan(raw_scores[answer_idx, eval_idx])]
+                if len(missing_batch) > 1:
+                    batch_params.append((missing_batch, answer_idx))
+                elif missing_batch:
+                    single_eval_params.append((missing_batch[0], answer_idx))
+
+        batch_completions = await asyncio.gather(
+            *(
+                self._generate_batch_completion(batch, reference_answers[answer_idx], response_format_model_supported)
+                for batch, answer_idx in batch_params
+            )
+        )
+        for (batch, answer_idx), completion in zip(batch_params, batch_completions, strict=True):
+            batch_scores = get_batched_semantic_evaluation_scores(completion, [self.evals[idx] for idx in batch])
+            for eval_idx, score in zip(batch, batch_scores, strict=True):
+                if np.isnan(score) and isinstance(completion, Completion):
+                    # the response could not be parsed for this eval
+                    single_eval_params.append((eval_idx, answer_idx))
+                else:
+                    raw_scores[answer_idx, eval_idx] = score
+
+        await self._generate_scores(reference_answers, raw_scores, single_eval_params)
+
+    async def _generate_scores(
+        self,
+        reference_answers: list[str | None],
+        raw_scores: npt.NDArray[np.float64],
+        params: list[tuple[int, int]],
+    ) -> None:
+        """Rates each (eval index, reference answer index) pair of params with its own call into raw_scores."""
+        completions = await asyncio.gather(
+            *(
                 generate_completion(
-                    template=SemanticEvaluationCompletionTemplate.create(
-                        eval=eval, reasoning_effort=self.reasoning_effort
-                    ),
-                    template_kwargs={
-                        "query_identifier": eval.query_identifier,
-                        "context_identifier": eval.context_identifier,
-                        "response_identifier": eval.response_identifier,
-                        "query": self.query,
-                        "context": self.context,
-                        "reference_answer": reference_answer,
-                        "eval_criteria": eval.criteria,
-                        "max_explanation_words": self.max_explanation_words,
-                    },
+                    template=self._get_template(self.evals[eval_idx]),
+                    template_kwargs=self._get_template_kwargs(self.evals[eval_idx], reference_answers[answer_idx]),
                     temperature=self.temperature,
                 )
+                for eval_idx, answer_idx in params
             )
-            for eval, reference_answer in params
+        )
+        for (eval_idx, answer_idx), completion in zip(params, completions, strict=True):
+            raw_scores[answer_idx, eval_idx] = get_semantic_evaluation_score(completion)
+
+    def _get_eval_cache_keys(self, reference_answers: list[str | None]) -> list[list[str]]:
+        """Returns the eval cache key of each (reference answer, eval) pair, empty if the eval cache is disabled.
+
+        The query, context and reference answer are hashed once, so that long contexts are not serialized again for
+        every eval. Each key only covers the inputs its eval uses, so that evals not requiring the response (e.g.
+        context sufficiency) are reused across responses.
+        """
+        if self.eval_cache is None:
+            return []
+
+        query_hash = hash_cache_key(self.query)
+        context_hash = hash_cache_key(self.context)
+        settings_key = [settings.DEFAULT_MODEL, self.reasoning_effort.value, self.prompt_layout.value, self.batch_evals]
+        return [
+            [
+                hash_cache_key(
+                    [
+                        *settings_key,
+                        eval.model_dump(mode="json"),
+                        query_hash if eval.query_identifier is not None else None,
+                        context_hash if eval.context_identifier is not None else None,
+                        answer_hash if eval.response_identifier is not None else None,
+                    ]
+                )
+                for eval in self.evals
+            ]
+            for answer_hash in (hash_cache_key(answer) for answer in reference_answers)
         ]
 
-        semantic_evaluation_completions = await asyncio.gather(*completion_tasks)
-        computed_scores = compute_semantic_evaluation_scores(
-            reference_answers,
-            self.evals,
-            semantic_evaluation_completions,
+    def _add_cached_scores(self, raw_scores: npt.NDArray[np.float64], cache_keys: list[list[str]]) -> None:
+        """Fills in the raw score of each (reference answer, eval) pair found in the eval cache."""
+        if self.eval_cache is None:
+            return
+
+        for answer_idx, answer_keys in enumerate(cache_keys):
+            for eval_idx, cache_key in enumerate(answer_keys):
+                if (cached_score := self.eval_cache.get(cache_key)) is not None:
+                    raw_scores[answer_idx, eval_idx] = cached_score
+
+    async def _generate_batch_completion(
+        self, batch: list[int], reference_answer: str | None, response_format_model_supported: bool
+    ) -> Completion | CompletionFailure:
+        template = get_cached_template(
+            BatchedSemanticEvaluationCompletionTemplate,
+            evals=tuple(self.evals[idx] for idx in batch),
+            reasoning_effort=self.reasoning_effort,
+            prompt_layout=self.prompt_layout,
+        )
+        response_format_model = (
+            template.get_response_format_model(include_explanation=self.reasoning_effort != ReasoningEffort.NONE)
+            if response_format_model_supported
+            else None
+        )
+        return await generate_completion(
+            template=template,
+            template_kwargs=self._get_template_kwargs(self.evals[batch[0]], reference_answer),
+            temperature=self.temperature,
+            response_format_model=response_format_model,
         )
 
-        context_key = "evals_requiring_response" if use_reference_answers else "evals_not_requiring_response"
-        self.execution_context.add(context_key, computed_scores)
+    def _get_eval_batches(self) -> list[list[int]]:
+        """Groups the indices of the evals that depend on the response, and of those that do not (with distinct names),
+        in eval order. Evals that use none of the inputs are not batched.
+
+        Evals are not grouped by their identifiers: the batched prompt labels the inputs the same way for all evals and
+        tells each eval which inputs it uses and under which labels (see BatchedSemanticEvaluationCompletionTemplate).
+        """
+        batches: dict[bool, list[int]] = {}
+        unbatched: list[list[int]] = []
+        for idx, eval in enumerate(self.evals):
+            if eval.query_identifier is None and eval.context_identifier is None and eval.response_identifier is None:
+                unbatched.append([idx])
+                continue
+            batch = batches.setdefault(eval.response_identifier is not None, [])
+            if any(self.evals[batched_idx].name == eval.name for batched_idx in batch):
+                unbatched.append([idx])
+            else:
+                batch.append(idx)
+        return [*batches.values(), *unbatched]
+
+    def _get_batch_template(
+        self, batch: list[int]
+    ) -> SemanticEvaluationCompletionTemplate | BatchedSemanticEvaluationCompletionTemplate:
+        if len(batch) == 1:
+            return self._get_template(self.evals[batch[0]])
+        return get_cached_template(
+            BatchedSemanticEvaluationCompletionTemplate,
+            evals=tuple(self.evals[idx] for idx in batch),
+            reasoning_effort=self.reasoning_effort,
+            prompt_layout=self.prompt_layout,
+        )
+
+    def _plan_completion(
+        self,
+        template: SemanticEvaluationCompletionTemplate | BatchedSemanticEvaluationCompletionTemplate,
+        eval: Eval,
+        reference_answer: str | None,
+    ) -> PlannedCompletion:
+        return PlannedCompletion(
+            model=settings.DEFAULT_MODEL,
+            messages=template.format_messages(**self._get_template_kwargs(eval, reference_answer)),
+            expected_output_tokens=template.get_expected_output_tokens(self.max_explanation_words),
+        )
+
+    def _use_reference_answers(self) -> bool:
+        return any(eval.response_identifier is not None for eval in self.evals)
+
+    def _get_reference_answers(self) -> list[str | None]:
+        if self._use_reference_answers():
+            return self.execution_context.get("reference_answers")
+        return [None]
+
+    def _get_template(self, eval: Eval) -> SemanticEvaluationCompletionTemplate:
+        return get_cached_template(
+            SemanticEvaluationCompletionTemplate,
+            prompt_layout=self.prompt_layout,
+            eval=eval,
+            reasoning_effort=self.reasoning_effort,
+        )
+
+    def _get_template_kwargs(self, eval: Eval, reference_answer: str | None) -> dict[str, Any]:
+        return {
+            "query_identifier": eval.query_identifier,
+            "context_identifier": eval.context_identifier,
+            "response_identifier": eval.response_identifier,
+            "query": self.query,
+            "context": self.context,
+            "reference_answer": reference_answer,
+            "eval_criteria": eval.criteria,
+            "max_explanation_words": self.max_explanation_words,
+        }
@@ -1,14 +1,17 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 from tlm.config.schema import Config as ConfigSchema
 from tlm.config.presets import (
     DEFAULT_CONFIG_FOR_QUALITY,
     DEFAULT_CONFIG_FOR_QUALITY_AND_WORKFLOW,
+    ContextTrimming,
+    PromptLayout,
+    QualityPreset,
     ReasoningEffort,
     WorkflowType,
 )
 from tlm.config.provider import ModelProvider
-from tlm.types import SimilarityMeasure
+from tlm.types import ModelPricing, SimilarityMeasure
 
 from tlm.config.defaults import get_settings
 
@@ -39,12 +42,49 @@ class SelfReflectionConfig(BaseModel):
     min_self_reflection_completions: int = Field(
         description="The minimum number of successful self reflection completions required."
     )
+    use_staged_self_reflection: bool = False
+    self_reflection_agreement_margin: float = Field(default=0.1, ge=0.0, le=0.5)
+    per_field_reflection_chunk_size: int | None = Field(default=None, ge=1)
 
 
 class SemanticEvalsConfig(BaseModel):
     use_prompt_evaluation: bool = False
     prompt_evaluation_temperature: float = 0.0
     semantic_evaluation_temperature: float = 0.0
+    use_batched_semantic_evaluation: bool = False
+
+
+class PromptCacheConfig(BaseModel):
+    use_prompt_cache: bool = False
+    prompt_cache_ttl_seconds: float = settings.PROMPT_CACHE_TTL_SECONDS
+    prompt_layout: PromptLayout = PromptLayout.DEFAULT
+    use_eval_cache: bool = False
+    eval_cache_ttl_seconds: float = settings.EVAL_CACHE_TTL_SECONDS
+
+
+class TokenBudgetConfig(BaseModel):
+    context_trimming: ContextTrimming = ContextTrimming.NONE
+    input_token_budget: int | None = Field(default=None, ge=1)
+
+
+class UsageConfig(BaseModel):
+    price_table: dict[str, ModelPricing] | None = None
+
+
+class EscalationConfig(BaseModel):
+    escalation_quality_preset: QualityPreset | None = None
+    escalation_score_range: tuple[float, float] = (
+        settings.ESCALATION_SCORE_LOWER_BOUND,
+        settings.ESCALATION_SCORE_UPPER_BOUND,
+    )
+
+    @field_validator("escalation_score_range")
+    @classmethod
+    def validate_escalation_score_range(cls, value: tuple[float, float]) -> tuple[float, float]:
+        lower, upper = value
+        if not 0.0 <= lower <= upper <= 1.0:
+            raise ValueError("escalation_score_range must be a (lower, upper) range within [0, 1]")
+        return value
 
 
 class BaseConfig(
@@ -52,12 +92,24 @@ class BaseConfig(
     ObservedConsistencyConfig,
     SelfReflectionConfig,
     SemanticEvalsConfig,
+    PromptCacheConfig,
+    TokenBudgetConfig,
+    UsageConfig,
+    EscalationConfig,
     ModelProvider,
 ):
     workflow_type: WorkflowType
     similarity_measure: SimilarityMeasure = SimilarityMeasure.STATEMENT
     reasoning_effort: ReasoningEffort = ReasoningEffort.NONE
+    defer_explanation: bool = False
+    explanation_reasoning_effort: ReasoningEffort = Field(
+        default=ReasoningEffort.NONE, description="Reasoning effort of the deferred explanation call."
+    )
+    use_logprob_fast_mode: bool = False
     constrain_outputs: list[str] | None = None
+    escalation_config: "BaseConfig | None" = Field(
+        default=None, description="Config of the escalation_quality_preset, used for requests with uncertain scores."
+    )
 
     @classmethod
     def from_input(cls, input: ConfigSchema, workflow_type: WorkflowType, model: str | None) -> "BaseConfig":
@@ -77,4 +129,26 @@ class BaseConfig(
             "similarity_measure": SimilarityMeasure.for_workflow(workflow_type),
             **input.model_dump(exclude_unset=True, exclude_none=True),
         }
-        return cls(**params, workflow_type=workflow_type)
+        if params.get("defer_explanation"):
+            # scoring runs without explanations, the requested reasoning effort only applies to the explanation call
+            params["explanation_reasoning_effort"] = params["reasoning_effort"]
+            params["reasoning_effort"] = ReasoningEffort.NONE
+
+        config = cls(**params, workflow_type=workflow_type)
+
+        if input.escalation_quality_preset is not None:
+            # escalation keeps the initial reasoning effort, so the completions of the initial run can be reused,
+            # and always runs the full pipeline
+            escalation_input = input.model_copy(
+                update={
+                    "quality_preset": input.escalation_quality_preset,
+                    "escalation_quality_preset": None,
+                    "use_logprob_fast_mode": None,
+                    "reasoning_effort": (
+                        config.explanation_reasoning_effort if config.defer_explanation else config.reasoning_effort
+                    ),
+                }
+            )
+            config.escalation_config = cls.from_input(escalation_input, workflow_type, model)
+
+        return config
@@ -0,0 +1,85 @@
+from functools import lru_cache
+from typing import Any
+
+import litellm
+from litellm.litellm_core_utils.get_supported_openai_params import get_supported_openai_params
+from pydantic import BaseModel, ConfigDict
+
+from tlm.config.models import BEDROCK_MODEL_TO_INFERENCE_PROFILE_ID, MODELS_WITH_LOGPROBS
+from tlm.config.provider import ModelProvider
+
+MODEL_CAPABILITIES_CACHE_SIZE = 128
+
+
+class ModelCapabilities(BaseModel):
+    """What a (model, provider, api_base) combination supports, resolved once and shared by all completions.
+
+    Attributes:
+        model: The model name to send to LiteLLM (the inference profile ID for Bedrock models).
+        provider: The resolved model provider, or None if it could not be inferred from the model name.
+        api_base: The base URL of the model provider's API, if any.
+        inference_profile_id: The Bedrock inference profile ID for the model, None for non-Bedrock models.
+        supports_logprobs: Whether the model returns token logprobs.
+        supports_top_logprobs: Whether the model supports the `top_logprobs` parameter.
+        supports_n: Whether the model supports generating multiple choices with the `n` parameter.
+        supports_structured_outputs: Whether the model supports the `response_format` parameter.
+        supports_stop_sequences: Whether the model supports the `stop` parameter.
+        supports_reasoning: Whether the model is a reasoning model (whose hidden reasoning counts toward max_tokens).
+        max_input_tokens: Max number of prompt tokens of the model, None if unknown.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    model: str
+    provider: str | None = None
+    api_base: str | None = None
+    inference_profile_id: str | None = None
+    supports_logprobs: bool = False
+    supports_top_logprobs: bool = False
+    supports_n: bool = False
+    supports_structured_outputs: bool = False
+    supports_stop_sequences: bool = False
+    supports_reasoning: bool = False
+    max_input_tokens: int | None = None
+
+
+@lru_cache(maxsize=MODEL_CAPABILITIES_CACHE_SIZE)
+def get_model_capabilities(model: str, provider: str | None = None, api_base: str | None = None) -> ModelCapabilities:
+    """Returns the (cached) capability record for a model, provider and API base."""
+    model_provider = ModelProvider(model=model, provider=provider, api_base=api_base)
+    supported_params = (
+        get_supported_openai_params(model=model_provider.model, custom_llm_provider=model_provider.provider) or []
+    )
+
+    return ModelCapabilities(
+        model=model_provider.model,
+        provider=model_provider.provider,
+        api_base=api_base,
+        inference_profile_id=BEDROCK_MODEL_TO_INFERENCE_PROFILE_ID.get(model),
+        supports_logprobs=model_provider.model in MODELS_WITH_LOGPROBS,
+        supports_top_logprobs="top_logprobs" in supported_params,
+        supports_n="n" in supported_params,
+        supports_structured_outputs="response_format" in supported_params,
+        supports_stop_sequences="stop" in supported_params,
+        # supports_reasoning returns False for models LiteLLM does not know
+        supports_reasoning=litellm.supports_reasoning(
+            model=model_provider.model, custom_llm_provider=model_provider.provider
+        ),
+        max_input_tokens=_get_max_input_tokens(model_provider.model, model_provider.provider),
+    )
+
+
+def get_litellm_model_info(model: str, provider: str | None) -> dict[str, Any]:
+    """Returns LiteLLM's model info (context window, pricing, ...) for a model, empty if LiteLLM does not know it.
+
+    Looked up in litellm.model_cost directly since litellm.get_model_info raises a bare Exception for unknown models.
+    """
+    model_info = litellm.model_cost.get(model)
+    if model_info is None and provider is not None:
+        model_info = litellm.model_cost.get(f"{provider}/{model}")
+    return model_info or {}
+
+
+def _get_max_input_tokens(model: str, provider: str | None) -> int | None:
+    max_input_tokens = get_litellm_model_info(model, provider).get("max_input_tokens")
+    return max_input_tokens if isinstance(max_input_tokens, int) and max_input_tokens > 0 else None
@@ -64,6 +64,27 @@ class ScoreSettings(BaseSettings):
     EXPLAINABILITY_THRESHOLD: float = 0.8
     SELF_REFLECTION_EXPLAINABILITY_THRESHOLD: float = 0.85
     CONSISTENCY_EXPLAINABILITY_THRESHOLD: float = 0.85
+    # Default uncertainty band of trustworthiness scores that trigger escalation to a higher quality preset
+    ESCALATION_SCORE_LOWER_BOUND: float = 0.3
+    ESCALATION_SCORE_UPPER_BOUND: float = 0.8
+
+
+class LoggingSettings(BaseSettings):
+    # Fraction of LLM calls (0-1) emitted as structured records on the "tlm.sampled" logger, 0 disables sampling
+    SAMPLED_LOG_RATE: float = 0.0
+    # Maximum number of characters kept for each message / response string in a sampled record
+    SAMPLED_LOG_MAX_PAYLOAD_CHARS: int = 500
+
+
+class CacheSettings(BaseSettings):
+    # Maximum number of prompts kept in each TLM instance's prompt cache (when enabled)
+    PROMPT_CACHE_MAX_SIZE: int = 1024
+    # Default number of seconds a prompt cache entry stays valid
+    PROMPT_CACHE_TTL_SECONDS: float = 3600.0
+    # Maximum number of eval scores kept in each TLM instance's eval cache (when enabled)
+    EVAL_CACHE_MAX_SIZE: int = 4096
+    # Default number of seconds an eval cache entry stays valid
+    EVAL_CACHE_TTL_SECONDS: float = 3600.0
 
 
 class Settings(
@@ -71,6 +92,8 @@ class Settings(
     ModelSettings,
     TokenSettings,
     ScoreSettings,
+    LoggingSettings,
+    CacheSettings,
 ):
     model_config = SettingsConfigDict(
         env_file=str(find_project_root() / ".env"), env_file_encoding="utf-8", case_sensitive=False, extra="ignore"
@@ -168,3 +168,13 @@ ENCODING_MODELS: dict[str, str] = {
     NOVA_LITE: CL100K_BASE,
     NOVA_PRO: CL100K_BASE,
 }
+
+# models whose encoding in ENCODING_MODELS only approximates their tokenizer
+APPROXIMATE_ENCODING_MODELS = {
+    CLAUDE_3_HAIKU,
+    CLAUDE_3_SONNET,
+    CLAUDE_3_5_SONNET,
+    NOVA_MICRO,
+    NOVA_LITE,
+    NOVA_PRO,
+}
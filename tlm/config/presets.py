@@ -43,6 +43,36 @@ REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS = {
 }
 
 
+class PromptLayout(str, Enum):
+    """Order of the parts of the prompts sent to the LLM.
+
+    Values:
+        `DEFAULT`: each template's own order.
+        `PREFIX_CACHE`: the inputs shared by the calls of a request (the user request / query and context) are given
+        once in tagged blocks at the start of the prompt, and referred to from their place in the template, so that
+        the calls of a request share a long prompt prefix that providers can cache. The rest of the template keeps its
+        order.
+    """
+
+    DEFAULT = "default"
+    PREFIX_CACHE = "prefix_cache"
+
+
+class ContextTrimming(str, Enum):
+    """How the context and conversation of a request are trimmed when they exceed the input token budget.
+
+    Values:
+        `NONE` (default): inputs are sent unmodified.
+        `TRUNCATE`: the oldest conversation turns are dropped and the end of the context is cut off.
+        `RELEVANCE`: the oldest conversation turns are dropped and the context chunks most relevant to the user prompt
+            are kept (in their original order).
+    """
+
+    NONE = "none"
+    TRUNCATE = "truncate"
+    RELEVANCE = "relevance"
+
+
 class WorkflowType(str, Enum):
     """Enum for different types of workflows supported by TLM."""
 
@@ -1,5 +1,5 @@
-from tlm.config.presets import QualityPreset, ReasoningEffort
-from tlm.types import SimilarityMeasure
+from tlm.config.presets import ContextTrimming, PromptLayout, QualityPreset, ReasoningEffort
+from tlm.types import ModelPricing, SimilarityMeasure
 
 from pydantic import BaseModel, Field
 
@@ -39,6 +39,10 @@ class SelfReflectionConfigSchema(BaseModel):
     Attributes:
         self_reflection_temperature: The temperature to use for self reflection completions.
         num_self_reflection_completions: The attempted number of self reflection completions to generate.
+        use_staged_self_reflection: Whether to skip the lower priority self reflection prompts once the first ones agree.
+        self_reflection_agreement_margin: Margin within which the scores of the first self reflection prompts agree.
+        per_field_reflection_chunk_size: Max number of response fields per per-field self reflection call when scoring
+            structured outputs. Responses with more top-level fields are split into chunks scored concurrently.
     """
 
     self_reflection_temperature: float | None = None
@@ -50,6 +54,29 @@ class SelfReflectionConfigSchema(BaseModel):
             "-1 means all prompts will be used."
         ),
     )
+    use_staged_self_reflection: bool | None = Field(
+        default=None,
+        description=(
+            "Whether to run the self reflection prompts in priority order, skipping the remaining prompts for a "
+            "response once the first ones agree. The prompts that ran are reported in the metadata."
+        ),
+    )
+    self_reflection_agreement_margin: float | None = Field(
+        default=None,
+        description=(
+            "In staged self reflection, the first prompts agree if all their scores are within this margin of 0, "
+            "or all within this margin of 1."
+        ),
+    )
+    per_field_reflection_chunk_size: int | None = Field(
+        default=None,
+        ge=1,
+        description=(
+            "When scoring structured outputs, the per-field self reflection prompts judge at most this many top-level "
+            "fields of the response per call: larger responses are split into chunks of fields that are judged "
+            "concurrently and merged. None judges all fields in one call."
+        ),
+    )
 
 
 class SemanticEvalsConfigSchema(BaseModel):
@@ -60,11 +87,115 @@ class SemanticEvalsConfigSchema(BaseModel):
         use_prompt_evaluation: Whether to incorporate prompt evaluation scores into the final trustworthiness score.
         prompt_evaluation_temperature: The temperature to use for prompt evaluation completions.
         semantic_evaluation_temperature: The temperature to use when generating completions to score the Evals.
+        use_batched_semantic_evaluation: Whether to score several Evals in one call per response rather than one each.
     """
 
     use_prompt_evaluation: bool | None = None
     prompt_evaluation_temperature: float | None = None  # TODO: rename to prompt_evaluation_temperature
     semantic_evaluation_temperature: float | None = None  # TODO: rename to semantic_evaluation_temperature
+    use_batched_semantic_evaluation: bool | None = Field(
+        default=None,
+        description=(
+            "Whether to score the Evals that depend on the response in one structured-output call per response, and "
+            "those that do not in one call, returning a rating for each Eval, rather than one call per Eval. This sends "
+            "long contexts once instead of once per Eval. The inputs are labeled the same way for all Evals, and each "
+            "Eval is told which inputs it uses. Ratings are scored by the expected value of their token logprobs like "
+            "per-Eval ratings (mapped from the rating if logprobs are unavailable). Evals whose rating cannot be parsed "
+            "are scored with their own call."
+        ),
+    )
+
+
+class PromptCacheConfigSchema(BaseModel):
+    """
+    Configuration for caching the prompt-only completions (observed consistency and prompt evaluation) and the Eval
+    scores across calls.
+
+    Attributes:
+        use_prompt_cache: Whether to reuse observed consistency and prompt evaluation completions for repeated prompts.
+        prompt_cache_ttl_seconds: Number of seconds a cached prompt entry stays valid.
+        prompt_layout: Order of the parts of the self reflection, prompt evaluation and semantic evaluation prompts.
+            `PREFIX_CACHE` moves the shared inputs to the start of the prompts, for provider prompt caching.
+        use_eval_cache: Whether to reuse the Eval scores of repeated inputs (query, context and response).
+        eval_cache_ttl_seconds: Number of seconds a cached Eval score stays valid.
+    """
+
+    use_prompt_cache: bool | None = None
+    prompt_cache_ttl_seconds: float | None = None
+    prompt_layout: PromptLayout | None = Field(
+        default=None,
+        description=(
+            "Order of the parts of the self reflection, prompt evaluation and semantic evaluation prompts. "
+            "PREFIX_CACHE gives the inputs shared by the calls of a request (user request, query, context) once at the "
+            "start of each prompt, and refers to them from their place in the template, so that the calls share a long "
+            "prompt prefix that the provider can cache (see the cached_prompt_tokens usage counts). The instructions, "
+            "the response being judged and the output format keep their order."
+        ),
+    )
+    use_eval_cache: bool | None = Field(
+        default=None,
+        description=(
+            "Whether to reuse the score of an Eval whose inputs (query, context and response, whichever the Eval uses) "
+            "were already scored by this TLM instance, skipping its LLM call. Only scores computed at a "
+            "semantic_evaluation_temperature of 0 are cached. Cache hit rates are reported by get_eval_cache_stats()."
+        ),
+    )
+    eval_cache_ttl_seconds: float | None = None
+
+
+class TokenBudgetConfigSchema(BaseModel):
+    """
+    Configuration for fitting the inputs of TLM requests (conversation and context) in the model's context window.
+
+    Attributes:
+        context_trimming: How the conversation and context are trimmed when they exceed the input token budget.
+        input_token_budget: Max number of tokens of the conversation, and of the user prompt plus the context.
+    """
+
+    context_trimming: ContextTrimming | None = Field(
+        default=None,
+        description=(
+            "How the conversation and context are trimmed when they exceed the input token budget: the oldest "
+            "conversation turns are dropped, and the context is truncated (TRUNCATE) or reduced to the chunks most "
+            "relevant to the user prompt (RELEVANCE). What was trimmed is reported in metadata['input_trimming']. "
+            "NONE sends the inputs unmodified."
+        ),
+    )
+    input_token_budget: int | None = Field(
+        default=None,
+        ge=1,
+        description=(
+            "Max number of tokens of the conversation, and of the user prompt plus the context. Defaults to the "
+            "model's input limit minus room for the template instructions and outputs."
+        ),
+    )
+
+
+class UsageConfigSchema(BaseModel):
+    """
+    Configuration for reporting the token usage of TLM requests.
+
+    Attributes:
+        price_table: Optional price per model, keyed by model name. When provided, usage reports include dollar costs.
+    """
+
+    price_table: dict[str, ModelPricing] | None = None
+
+
+class EscalationConfigSchema(BaseModel):
+    """
+    Configuration for escalating uncertain requests to a higher quality preset.
+
+    Attributes:
+        escalation_quality_preset: Quality preset to escalate to. The request first runs with `quality_preset`; only if
+            the resulting trustworthiness score falls within `escalation_score_range` are the additional observed
+            consistency completions and self-reflection prompts of this preset generated, reusing the completions
+            that were already generated.
+        escalation_score_range: Inclusive (lower, upper) range of trustworthiness scores that trigger escalation.
+    """
+
+    escalation_quality_preset: QualityPreset | None = None
+    escalation_score_range: tuple[float, float] | None = None
 
 
 class ModelProviderSchema(BaseModel):
@@ -89,6 +220,10 @@ class Config(
     ObservedConsistencyConfigSchema,
     SelfReflectionConfigSchema,
     SemanticEvalsConfigSchema,
+    PromptCacheConfigSchema,
+    TokenBudgetConfigSchema,
+    UsageConfigSchema,
+    EscalationConfigSchema,
     ModelProviderSchema,
 ):
     """Configuration for TLM inference.
@@ -100,11 +235,18 @@ class Config(
     Attributes:
         quality_preset: Quality preset controlling the trade-off between speed and accuracy.
         reasoning_effort: Optional reasoning effort level for models that support it.
+        defer_explanation: If True, scoring runs without explanations (reasoning effort NONE) and a single explanation
+            call (with the configured reasoning effort) is made only for responses below the explainability threshold.
+        use_logprob_fast_mode: If True, classification requests on models that return logprobs are scored from the label
+            distribution of a single completion's top logprobs ("logprob-fast" mode), without observed consistency,
+            self reflection or prompt evaluation completions. Other requests run the full pipeline.
         similarity_measure: Optional similarity measure to use for comparing consistency across responses.
         constrain_outputs: Optional list of allowed output values to constrain responses, for example in multiple choice questions.
     """
 
     quality_preset: QualityPreset = QualityPreset.MEDIUM
     reasoning_effort: ReasoningEffort | None = None
+    defer_explanation: bool | None = None
+    use_logprob_fast_mode: bool | None = None
     similarity_measure: SimilarityMeasure | None = None
     constrain_outputs: list[str] | None = None
@@ -1,11 +1,25 @@
+import logging
 from typing import Any, TypedDict
 
+import numpy as np
+import numpy.typing as npt
+
 from tlm.config.base import BaseConfig
 from tlm.config.presets import WorkflowType
 from tlm.pipeline import PipelineFactory
 from tlm.types import Eval, CompletionParams
+from tlm.utils.cache_utils import LRUCache
+from tlm.utils.eval_utils import group_evals
+from tlm.utils.explainability_utils import generate_explanation, needs_explanation
+from tlm.utils.prompt_utils import format_user_request
+from tlm.utils.token_budget_utils import InputTrimming, atrim_request_inputs
+from tlm.utils.usage_utils import UsageTracker, attribute_usage_to, track_usage
 from tlm.utils.scoring.semantic_evaluation_scoring_utils import DEFAULT_RAG_EVALS
 
+logger = logging.getLogger(__name__)
+
+DEFERRED_EXPLANATION_COMPONENT = "DeferredExplanation"
+
 
 class InferenceResult(TypedDict):
     """Result returned from TLM inference.
@@ -13,8 +27,10 @@ class InferenceResult(TypedDict):
     Attributes:
         response: Either a response string or dictionary representation of an OpenAI chat completion.
         trustworthiness_score: Score indicating the trustworthiness of the response, between 0 and 1.
-        usage: Token usage information for the inference, including prompt and completion tokens.
-        metadata: Optional metadata, e.g. per-field scores for structured outputs.
+        usage: Token usage information for the inference: prompt and completion tokens of the response, plus the
+            usage of all LLM / embedding calls made by TLM in total, per model and per component (with dollar costs
+            if a price table is configured).
+        metadata: Optional metadata, e.g. per-field scores for structured outputs or whether cached prompt completions were used.
         evals: Optional dictionary of Eval scores, keyed by evaluation name.
         explanation: Explanation for the trustworthiness score.
     """
@@ -27,6 +43,28 @@ class InferenceResult(TypedDict):
     explanation: str | None
 
 
+class ScoreManyResult(TypedDict):
+    """Result returned from scoring multiple candidate responses to the same prompt.
+
+    Attributes:
+        trustworthiness_scores: Trustworthiness score of each candidate response (in input order), None if scoring failed.
+        best_index: Index of the candidate response with the highest trustworthiness score.
+        best_response: The candidate response with the highest trustworthiness score.
+        usage: Token usage information for the inference.
+        metadata: Optional metadata, e.g. whether cached prompt completions were used.
+        evals: Optional dictionary of scores for the Evals that do not depend on the response, keyed by evaluation name.
+        explanation: Explanation for the trustworthiness score of the best response.
+    """
+
+    trustworthiness_scores: list[float | None]
+    best_index: int
+    best_response: str | dict[str, Any]
+    usage: dict[str, Any]
+    metadata: dict[str, Any] | None
+    evals: dict[str, float] | None
+    explanation: str | None
+
+
 async def tlm_inference(
     *,
     completion_params: CompletionParams,
@@ -34,9 +72,13 @@ async def tlm_inference(
     evals: list[Eval] | None,
     context: str | None,
     config: BaseConfig,
+    prompt_cache: LRUCache[str, Any] | None = None,
+    eval_cache: LRUCache[str, float] | None = None,
+    usage_totals: UsageTracker | None = None,
 ) -> InferenceResult:
     if evals is None and config.workflow_type == WorkflowType.RAG:
         evals = DEFAULT_RAG_EVALS
+    completion_params, context, input_trimming = await atrim_request_inputs(completion_params, context, config)
 
     pipeline = PipelineFactory.create(
         config=config,
@@ -44,18 +86,47 @@ async def tlm_inference(
         response=response,
         evals=evals,
         context=context,
+        prompt_cache=prompt_cache,
+        eval_cache=eval_cache,
     )
-    results = await pipeline.run()
+    with track_usage() as usage_tracker:
+        results = await pipeline.run()
+        initial_trustworthiness_score = results["trustworthiness_score"]
+        escalated = _should_escalate(initial_trustworthiness_score, config)
+        if escalated:
+            results = await _run_escalation(
+                results,
+                completion_params=completion_params,
+                response=response,
+                context=context,
+                config=config,
+                prompt_cache=prompt_cache,
+            )
+        if config.defer_explanation:
+            await _add_deferred_explanation(
+                results, completion_params, config, trustworthiness_score=results["trustworthiness_score"]
+            )
+    usage = _get_usage(results, usage_tracker, config, usage_totals)
 
     best_response = results["best_response"]
     trustworthiness_score = results["trustworthiness_score"]
-    usage = results.get("usage", {})
     explanation = results.get("explanation")
     evals_not_requiring_response: dict[str, float] = results.get("evals_not_requiring_response", {})
     evals_requiring_response: dict[str, float] = results.get("evals_requiring_response", {})
-    metadata = {}
-    if results.get("self_reflection_metadata_per_field"):
-        metadata["per_field_score"] = results.get("self_reflection_metadata_per_field")
+    metadata = _get_metadata(
+        results,
+        prompt_cache_enabled=prompt_cache is not None,
+        input_trimming=input_trimming,
+        eval_cache_enabled=eval_cache is not None,
+    )
+    # self reflection does not run in logprob-fast mode
+    if config.use_staged_self_reflection and "self_reflection_templates" in results:
+        metadata["self_reflection_templates"] = _get_self_reflection_template_names(results)[results["best_answer_idx"]]
+    if config.escalation_config is not None:
+        metadata["escalation"] = {
+            "escalated": escalated,
+            "initial_trustworthiness_score": initial_trustworthiness_score,
+        }
 
     return InferenceResult(
         response=best_response,
@@ -68,3 +139,212 @@ async def tlm_inference(
         },
         explanation=explanation,
     )
+
+
+async def tlm_score_many(
+    *,
+    completion_params: CompletionParams,
+    responses: list[dict[str, Any]],
+    evals: list[Eval] | None,
+    context: str | None,
+    config: BaseConfig,
+    prompt_cache: LRUCache[str, Any] | None = None,
+    eval_cache: LRUCache[str, float] | None = None,
+    usage_totals: UsageTracker | None = None,
+) -> ScoreManyResult:
+    """Scores all candidate responses in a single pipeline, treating each candidate as a reference answer.
+
+    The prompt-only work (observed consistency completions, prompt evaluation and Evals that do not depend on the
+    response) runs once and is shared by all candidates. Evals that depend on the response are skipped, since their
+    scores would be averaged across candidates. Escalation (config.escalation_config) is not applied: all candidates
+    are scored with the base config.
+    """
+    if not responses:
+        raise ValueError("responses must contain at least one response to score")
+    if config.escalation_config is not None:
+        logger.warning("escalation_quality_preset is not applied when scoring multiple responses")
+
+    if evals is None and config.workflow_type == WorkflowType.RAG:
+        evals = DEFAULT_RAG_EVALS
+    _, evals_not_requiring_response = group_evals(evals)
+    completion_params, context, input_trimming = await atrim_request_inputs(completion_params, context, config)
+
+    pipeline = PipelineFactory.create(
+        config=config,
+        completion_params=completion_params,
+        response=responses,
+        evals=evals_not_requiring_response,
+        context=context,
+        prompt_cache=prompt_cache,
+        eval_cache=eval_cache,
+    )
+    with track_usage() as usage_tracker:
+        results = await pipeline.run()
+        trustworthiness_scores = np.asarray(results["trustworthiness_scores"], dtype=np.float64)
+        if config.defer_explanation:
+            # results["trustworthiness_score"] is the mean over all candidates, the explanation is for the best one
+            await _add_deferred_explanation(
+                results,
+                completion_params,
+                config,
+                trustworthiness_score=float(trustworthiness_scores[results["best_answer_idx"]]),
+            )
+    usage = _get_usage(results, usage_tracker, config, usage_totals)
+
+    metadata = _get_metadata(
+        results,
+        prompt_cache_enabled=prompt_cache is not None,
+        input_trimming=input_trimming,
+        eval_cache_enabled=eval_cache is not None,
+    )
+    if config.use_staged_self_reflection and "self_reflection_templates" in results:
+        metadata["self_reflection_templates"] = _get_self_reflection_template_names(results)
+
+    return ScoreManyResult(
+        trustworthiness_scores=[None if np.isnan(score) else float(score) for score in trustworthiness_scores],
+        best_index=int(results["best_answer_idx"]),
+        best_response=results["best_response"],
+        usage=usage,
+        metadata=metadata,
+        evals=results.get("evals_not_requiring_response", {}),
+        explanation=results.get("explanation"),
+    )
+
+
+def _should_escalate(trustworthiness_score: float | None, config: BaseConfig) -> bool:
+    """Whether the request should be escalated to config.escalation_config, i.e. its score is within the uncertainty
+    band (a missing score counts as uncertain).
+    """
+    if config.escalation_config is None:
+        return False
+    if trustworthiness_score is None or np.isnan(trustworthiness_score):
+        return True
+
+    lower, upper = config.escalation_score_range
+    return lower <= trustworthiness_score <= upper
+
+
+async def _run_escalation(
+    results: dict[str, Any],
+    *,
+    completion_params: CompletionParams,
+    response: dict[str, Any] | None,
+    context: str | None,
+    config: BaseConfig,
+    prompt_cache: LRUCache[str, Any] | None,
+) -> dict[str, Any]:
+    """Scores the reference completions of an initial run again with the escalation config.
+
+    Completions of the initial run are reused, only the additional observed consistency completions and self
+    reflection prompts of the escalation config are generated. Eval scores do not depend on the quality preset, so
+    the initial ones are kept.
+    """
+    assert config.escalation_config is not None
+
+    pipeline = PipelineFactory.create(
+        config=config.escalation_config,
+        completion_params=completion_params,
+        response=response,
+        evals=None,
+        context=context,
+        prompt_cache=prompt_cache,
+        previous_results=results,
+    )
+    escalation_results = await pipeline.run()
+
+    for key in ("evals_not_requiring_response", "evals_requiring_response"):
+        if key in results:
+            escalation_results[key] = results[key]
+
+    return escalation_results
+
+
+async def _add_deferred_explanation(
+    results: dict[str, Any],
+    completion_params: CompletionParams,
+    config: BaseConfig,
+    trustworthiness_score: float | None,
+) -> None:
+    """Replaces the explanation of the best response with a targeted explanation call, if its trustworthiness score is
+    below the explainability threshold (the pipeline ran without explanations).
+    """
+    if not needs_explanation(trustworthiness_score):
+        return
+
+    with attribute_usage_to(DEFERRED_EXPLANATION_COMPONENT):
+        explanation = await generate_explanation(
+            format_user_request(completion_params),
+            results["reference_answers"][results["best_answer_idx"]],
+            config.explanation_reasoning_effort,
+        )
+    if explanation:
+        results["explanation"] = explanation
+
+
+def _get_metadata(
+    results: dict[str, Any],
+    prompt_cache_enabled: bool,
+    input_trimming: InputTrimming | None = None,
+    eval_cache_enabled: bool = False,
+) -> dict[str, Any]:
+    metadata: dict[str, Any] = {}
+    if input_trimming is not None and input_trimming.trimmed:
+        metadata["input_trimming"] = input_trimming.model_dump(mode="json")
+
+    if results.get("self_reflection_metadata_per_field"):
+        metadata["per_field_score"] = _add_per_field_consistency(
+            results["self_reflection_metadata_per_field"],
+            results.get("consistency_scores_per_field"),
+            results["best_answer_idx"],
+        )
+
+    if results.get("label_distribution"):
+        metadata["label_distribution"] = results["label_distribution"]
+
+    if prompt_cache_enabled:
+        metadata["prompt_cache"] = {
+            "observed_consistency": results.get("consistency_completions_cached", False),
+            "prompt_evaluation": results.get("prompt_evaluation_completions_cached", False),
+        }
+
+    if eval_cache_enabled:
+        metadata["eval_cache"] = {
+            "evals_not_requiring_response": results.get("evals_not_requiring_response_cache_hits", 0),
+            "evals_requiring_response": results.get("evals_requiring_response_cache_hits", 0),
+        }
+
+    return metadata
+
+
+def _add_per_field_consistency(
+    per_field_score: dict[str, dict[str, Any]],
+    consistency_scores_per_field: dict[str, npt.NDArray[np.float64]] | None,
+    best_answer_idx: int,
+) -> dict[str, dict[str, Any]]:
+    """Adds the observed consistency of each field of the best response (STRUCTURED similarity measure) to the
+    per-field self reflection scores.
+    """
+    if not consistency_scores_per_field:
+        return per_field_score
+
+    return {
+        field: {**field_score, "consistency": float(consistency_scores[best_answer_idx])}
+        if (consistency_scores := consistency_scores_per_field.get(field)) is not None
+        and not np.isnan(consistency_scores[best_answer_idx])
+        else field_score
+        for field, field_score in per_field_score.items()
+    }
+
+
+def _get_self_reflection_template_names(results: dict[str, Any]) -> list[list[str]]:
+    """Returns the names of the self reflection templates that ran for each reference answer."""
+    return [[template.__name__ for template in templates] for templates in results.get("self_reflection_templates", [])]
+
+
+def _get_usage(
+    results: dict[str, Any], usage_tracker: UsageTracker, config: BaseConfig, usage_totals: UsageTracker | None
+) -> dict[str, Any]:
+    if usage_totals is not None:
+        usage_totals.merge(usage_tracker)
+
+    return {**results.get("usage", {}), **usage_tracker.summarize(config.price_table)}
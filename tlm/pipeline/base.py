@@ -3,6 +3,8 @@ import logging
 from typing import Any
 
 from tlm.components import Component
+from tlm.types import PlannedCompletion
+from tlm.utils.usage_utils import set_current_component
 
 logger = logging.getLogger(__name__)
 
@@ -28,9 +30,40 @@ class InferencePipeline:
 
         return final_results
 
+    def plan(self) -> list[tuple[Component, list[PlannedCompletion]]]:
+        """Returns the LLM calls each component would make, without executing the pipeline."""
+        self._validate()
+
+        planned_completions = []
+        for component in self._get_topological_order():
+            planned_completions.append((component, component.plan()))
+            for child in component.blocking:
+                child.merge_context(component.execution_context)
+
+        return planned_completions
+
+    def _get_topological_order(self) -> list[Component]:
+        ordered: list[Component] = []
+        visited: set[Component] = set()
+
+        def visit(component: Component) -> None:
+            if component in visited:
+                return
+            visited.add(component)
+            for dep in component.depends_on:
+                visit(dep)
+            ordered.append(component)
+
+        for component in self.components:
+            visit(component)
+
+        return ordered
+
     async def _execute_component(self, component: Component) -> None:
         """Execute a component after waiting for all dependencies to complete."""
         await component._ready_event.wait()
+        # each component runs in its own task, so this only applies to this component's calls
+        set_current_component(component.__class__.__name__)
         await component.execute()
 
         for child in component.blocking:
@@ -1,8 +1,10 @@
 from typing import Any, Dict
 
 from tlm.components import (
+    Component,
     TrustworthinessScoreComputation,
     ConsistencyScoreComputation,
+    LabelDistributionScoreComputation,
     ObservedConsistencyCompletionGenerator,
     PerplexityScoreComputation,
     PromptEvaluationCompletionGenerator,
@@ -15,9 +17,11 @@ from tlm.components import (
     SelfReflectionScoreComputation,
 )
 from tlm.config.base import BaseConfig
+from tlm.config.capabilities import get_model_capabilities
 from tlm.config.presets import WorkflowType
 from tlm.pipeline import InferencePipeline
 from tlm.utils.prompt_utils import format_user_request, extract_user_prompt
+from tlm.utils.cache_utils import LRUCache
 from tlm.utils.eval_utils import group_evals
 from tlm.types import Eval, CompletionParams, InferenceType
 
@@ -28,32 +32,52 @@ class PipelineFactory:
         *,
         completion_params: CompletionParams,
         config: BaseConfig,
-        response: Dict[str, Any] | None,
+        response: Dict[str, Any] | list[Dict[str, Any]] | None,
         evals: list[Eval] | None,
         context: str | None,
+        prompt_cache: LRUCache[str, Any] | None = None,
+        eval_cache: LRUCache[str, float] | None = None,
+        previous_results: dict[str, Any] | None = None,
     ) -> InferencePipeline:
+        """Creates the inference pipeline for a request.
+
+        previous_results are the results of an earlier pipeline run for the same request (e.g. with a lower quality
+        preset before escalation). Its reference completions are scored again and its observed consistency, prompt
+        evaluation and self reflection completions are reused, so only the additional completions are generated.
+        """
         pipeline = InferencePipeline()
+        previous_results = previous_results or {}
+        logprob_fast_mode = use_logprob_fast_mode(config)
 
         user_prompt = extract_user_prompt(completion_params)
         user_request = format_user_request(completion_params)
 
-        if config.use_prompt_evaluation:
+        if config.use_prompt_evaluation and not logprob_fast_mode:
             prompt_evaluation_completion_generator = pipeline.add(
                 PromptEvaluationCompletionGenerator(
                     prompt=user_prompt,
                     temperature=config.prompt_evaluation_temperature,
+                    prompt_cache=prompt_cache,
+                    previous_completions=previous_results.get("prompt_evaluation_completions"),
+                    prompt_layout=config.prompt_layout,
                 )
             )
         else:
             prompt_evaluation_completion_generator = None
 
-        observed_consistency_completion_generator = pipeline.add(
-            ObservedConsistencyCompletionGenerator(
-                completion_params=completion_params,
-                count=config.num_consistency_completions,
-                temperature=config.observed_consistency_temperature,
-                reasoning_effort=config.reasoning_effort,
-                constrain_outputs=config.constrain_outputs,
+        observed_consistency_completion_generator = (
+            None
+            if logprob_fast_mode
+            else pipeline.add(
+                ObservedConsistencyCompletionGenerator(
+                    completion_params=completion_params,
+                    count=config.num_consistency_completions,
+                    temperature=config.observed_consistency_temperature,
+                    reasoning_effort=config.reasoning_effort,
+                    constrain_outputs=config.constrain_outputs,
+                    prompt_cache=prompt_cache,
+                    previous_completions=previous_results.get("consistency_completions"),
+                )
             )
         )
 
@@ -67,7 +91,9 @@ class PipelineFactory:
                     evals=evals_not_requiring_response,
                     reasoning_effort=config.reasoning_effort,
                     temperature=config.semantic_evaluation_temperature,
-                    model=config.model,
+                    batch_evals=config.use_batched_semantic_evaluation,
+                    prompt_layout=config.prompt_layout,
+                    eval_cache=eval_cache,
                 )
             )
             if evals_not_requiring_response
@@ -76,27 +102,26 @@ class PipelineFactory:
 
         inference_type = InferenceType.SCORE if response else InferenceType.PROMPT
 
-        reference_completion_component = pipeline.add(
-            ReferenceCompletionFormatter(completion_params=completion_params, response_input=response)
-            if inference_type == InferenceType.SCORE and response
-            else ReferenceCompletionGenerator(
-                count=config.num_reference_completions,
-                min_count=config.min_reference_completions,
-                completion_params=completion_params,
-                reasoning_effort=config.reasoning_effort,
-                constrain_outputs=config.constrain_outputs,
+        previous_reference_completions = previous_results.get("reference_completions")
+        if previous_reference_completions:
+            reference_completion_component = pipeline.add(
+                ReferenceCompletionFormatter(
+                    completion_params=completion_params, response_input=previous_reference_completions
+                )
             )
-        )
-
-        self_reflection_completion_generator = pipeline.add(
-            SelfReflectionCompletionGenerator(
-                prompt=user_request,
-                reasoning_effort=config.reasoning_effort,
-                workflow_type=config.workflow_type,
-                num_completions=config.num_self_reflection_completions,
-                depends_on=[reference_completion_component],
+        else:
+            reference_completion_component = pipeline.add(
+                ReferenceCompletionFormatter(completion_params=completion_params, response_input=response)
+                if inference_type == InferenceType.SCORE and response
+                else ReferenceCompletionGenerator(
+                    # logprob-fast mode scores the label distribution of a single reference completion
+                    count=1 if logprob_fast_mode else config.num_reference_completions,
+                    min_count=config.min_reference_completions,
+                    completion_params=completion_params,
+                    reasoning_effort=config.reasoning_effort,
+                    constrain_outputs=config.constrain_outputs,
+                )
             )
-        )
 
         evals_requiring_response_generator = (
             pipeline.add(
@@ -106,7 +131,9 @@ class PipelineFactory:
                     evals=evals_requiring_response,
                     reasoning_effort=config.reasoning_effort,
                     temperature=config.semantic_evaluation_temperature,
-                    model=config.model,
+                    batch_evals=config.use_batched_semantic_evaluation,
+                    prompt_layout=config.prompt_layout,
+                    eval_cache=eval_cache,
                     depends_on=[reference_completion_component],
                 )
             )
@@ -114,6 +141,81 @@ class PipelineFactory:
             else None
         )
 
+        if logprob_fast_mode:
+            assert config.constrain_outputs is not None
+            trustworthiness_score_computation = pipeline.add(
+                LabelDistributionScoreComputation(
+                    completion_params=completion_params,
+                    constrain_outputs=config.constrain_outputs,
+                    reasoning_effort=config.reasoning_effort,
+                    generate_label_completion=not isinstance(
+                        reference_completion_component, ReferenceCompletionGenerator
+                    ),
+                    depends_on=[reference_completion_component],
+                )
+            )
+        else:
+            trustworthiness_score_computation = PipelineFactory._add_score_components(
+                pipeline,
+                user_request=user_request,
+                config=config,
+                previous_results=previous_results,
+                reference_completion_component=reference_completion_component,
+                observed_consistency_completion_generator=observed_consistency_completion_generator,
+                prompt_evaluation_completion_generator=prompt_evaluation_completion_generator,
+            )
+
+        pipeline.add(
+            ResponseAssembly(
+                model=config.model,
+                response_type="completion",
+                inference_type=inference_type,
+                # candidate responses scored together are explained by the best one's own score
+                explain_best_response=isinstance(response, list),
+                depends_on=[
+                    component
+                    for component in [
+                        trustworthiness_score_computation,
+                        evals_not_requiring_response_generator,
+                        evals_requiring_response_generator,
+                    ]
+                    if component is not None
+                ],
+            )
+        )
+
+        return pipeline
+
+    @staticmethod
+    def _add_score_components(
+        pipeline: InferencePipeline,
+        *,
+        user_request: str,
+        config: BaseConfig,
+        previous_results: dict[str, Any],
+        reference_completion_component: Component,
+        observed_consistency_completion_generator: Component,
+        prompt_evaluation_completion_generator: Component | None,
+    ) -> Component:
+        """Adds the self reflection, consistency, perplexity and prompt evaluation scores of the full pipeline, and
+        returns the component that combines them into trustworthiness scores.
+        """
+        self_reflection_completion_generator = pipeline.add(
+            SelfReflectionCompletionGenerator(
+                prompt=user_request,
+                reasoning_effort=config.reasoning_effort,
+                workflow_type=config.workflow_type,
+                num_completions=config.num_self_reflection_completions,
+                staged=config.use_staged_self_reflection,
+                agreement_margin=config.self_reflection_agreement_margin,
+                field_chunk_size=config.per_field_reflection_chunk_size,
+                prompt_layout=config.prompt_layout,
+                previous_templates=previous_results.get("self_reflection_templates"),
+                previous_completions=previous_results.get("self_reflection_completions"),
+                depends_on=[reference_completion_component],
+            )
+        )
+
         consistency_score_computation = pipeline.add(
             ConsistencyScoreComputation(
                 similarity_measure=config.similarity_measure,
@@ -140,7 +242,7 @@ class PipelineFactory:
         else:
             prompt_evaluation_score_extraction = None
 
-        trustworthiness_score_computation = pipeline.add(
+        return pipeline.add(
             TrustworthinessScoreComputation(
                 workflow_type=config.workflow_type,
                 model=config.model,
@@ -157,21 +259,17 @@ class PipelineFactory:
             )
         )
 
-        pipeline.add(
-            ResponseAssembly(
-                model=config.model,
-                response_type="completion",
-                inference_type=inference_type,
-                depends_on=[
-                    component
-                    for component in [
-                        trustworthiness_score_computation,
-                        evals_not_requiring_response_generator,
-                        evals_requiring_response_generator,
-                    ]
-                    if component is not None
-                ],
-            )
-        )
 
-        return pipeline
+def use_logprob_fast_mode(config: BaseConfig) -> bool:
+    """Whether the request is scored in logprob-fast mode: it must be enabled, be a classification request and use a
+    model that returns logprobs with their top logprobs.
+    """
+    if not (
+        config.use_logprob_fast_mode
+        and config.workflow_type in (WorkflowType.CLASSIFICATION, WorkflowType.BINARY_CLASSIFICATION)
+        and config.constrain_outputs
+    ):
+        return False
+
+    model_capabilities = get_model_capabilities(config.model, config.provider, config.api_base)
+    return model_capabilities.supports_logprobs and model_capabilities.supports_top_logprobs
@@ -0,0 +1,165 @@
+from typing import Any
+
+import litellm
+from pydantic import BaseModel, computed_field
+
+from tlm.config.base import BaseConfig
+from tlm.config.capabilities import get_litellm_model_info, get_model_capabilities
+from tlm.config.presets import WorkflowType
+from tlm.pipeline import PipelineFactory
+from tlm.types import CompletionParams, Eval, PlannedCompletion
+from tlm.utils.scoring.semantic_evaluation_scoring_utils import DEFAULT_RAG_EVALS
+from tlm.utils.token_budget_utils import trim_request_inputs
+from tlm.utils.tokenize_utils import get_token_counts
+
+# approximate number of tokens the chat format adds for each message
+TOKENS_PER_MESSAGE = 3
+
+
+class ComponentPlan(BaseModel):
+    """Estimated LLM usage of one pipeline component for one model.
+
+    Attributes:
+        component: Name of the pipeline component.
+        model: The model the component's completions are generated with.
+        num_llm_calls: Number of LLM calls the component makes.
+        estimated_input_tokens: Estimated total number of input tokens across all calls.
+        estimated_output_tokens: Estimated total number of output tokens across all calls.
+    """
+
+    component: str
+    model: str
+    num_llm_calls: int
+    estimated_input_tokens: int
+    estimated_output_tokens: int
+
+
+class InferencePlan(BaseModel):
+    """Estimated LLM calls, tokens and cost of one or more TLM requests, computed without calling any LLM.
+
+    Attributes:
+        num_requests: Number of requests covered by the plan.
+        components: Estimated usage of each pipeline component (summed across requests).
+        num_llm_calls: Total number of LLM calls.
+        estimated_input_tokens: Total estimated number of input tokens.
+        estimated_output_tokens: Total estimated number of output tokens.
+        estimated_cost_per_model: Estimated cost (USD) per model, None for models without known pricing.
+    """
+
+    num_requests: int = 1
+    components: list[ComponentPlan] = []
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def num_llm_calls(self) -> int:
+        return sum(component.num_llm_calls for component in self.components)
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def estimated_input_tokens(self) -> int:
+        return sum(component.estimated_input_tokens for component in self.components)
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def estimated_output_tokens(self) -> int:
+        return sum(component.estimated_output_tokens for component in self.components)
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def estimated_cost_per_model(self) -> dict[str, float | None]:
+        tokens_per_model: dict[str, tuple[int, int]] = {}
+        for component in self.components:
+            input_tokens, output_tokens = tokens_per_model.get(component.model, (0, 0))
+            tokens_per_model[component.model] = (
+                input_tokens + component.estimated_input_tokens,
+                output_tokens + component.estimated_output_tokens,
+            )
+
+        return {
+            model: estimate_cost(model, input_tokens, output_tokens)
+            for model, (input_tokens, output_tokens) in tokens_per_model.items()
+        }
+
+    @classmethod
+    def combine(cls, plans: list["InferencePlan"]) -> "InferencePlan":
+        """Aggregates the plans of multiple requests (e.g. a batch) into one plan."""
+        components: dict[tuple[str, str], ComponentPlan] = {}
+        for plan in plans:
+            for component in plan.components:
+                key = (component.component, component.model)
+                if key not in components:
+                    components[key] = component.model_copy()
+                    continue
+
+                combined = components[key]
+                combined.num_llm_calls += component.num_llm_calls
+                combined.estimated_input_tokens += component.estimated_input_tokens
+                combined.estimated_output_tokens += component.estimated_output_tokens
+
+        return cls(num_requests=sum(plan.num_requests for plan in plans), components=list(components.values()))
+
+
+def tlm_plan(
+    *,
+    completion_params: CompletionParams,
+    response: dict[str, Any] | list[dict[str, Any]] | None,
+    evals: list[Eval] | None,
+    context: str | None,
+    config: BaseConfig,
+) -> InferencePlan:
+    """Builds the inference pipeline for a request and estimates its LLM usage without executing it."""
+    if evals is None and config.workflow_type == WorkflowType.RAG:
+        evals = DEFAULT_RAG_EVALS
+    completion_params, context, _ = trim_request_inputs(completion_params, context, config)
+
+    pipeline = PipelineFactory.create(
+        config=config,
+        completion_params=completion_params,
+        response=response,
+        evals=evals,
+        context=context,
+    )
+
+    components: dict[tuple[str, str], ComponentPlan] = {}
+    for component, planned_completions in pipeline.plan():
+        for planned_completion in planned_completions:
+            component_name = component.__class__.__name__
+            key = (component_name, planned_completion.model)
+            component_plan = components.setdefault(
+                key,
+                ComponentPlan(
+                    component=component_name,
+                    model=planned_completion.model,
+                    num_llm_calls=0,
+                    estimated_input_tokens=0,
+                    estimated_output_tokens=0,
+                ),
+            )
+            component_plan.num_llm_calls += planned_completion.count
+            component_plan.estimated_input_tokens += planned_completion.count * _count_input_tokens(planned_completion)
+            component_plan.estimated_output_tokens += (
+                planned_completion.count * planned_completion.expected_output_tokens
+            )
+
+    return InferencePlan(components=list(components.values()))
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float | None:
+    """Estimates the cost (USD) of the given number of tokens using LiteLLM's pricing data, None if unknown."""
+    model_capabilities = get_model_capabilities(model)
+    # litellm.cost_per_token raises a bare Exception for models without pricing data
+    if not get_litellm_model_info(model_capabilities.model, model_capabilities.provider):
+        return None
+
+    input_cost, output_cost = litellm.cost_per_token(
+        model=model_capabilities.model,
+        custom_llm_provider=model_capabilities.provider,
+        prompt_tokens=input_tokens,
+        completion_tokens=output_tokens,
+    )
+    return input_cost + output_cost
+
+
+def _count_input_tokens(planned_completion: PlannedCompletion) -> int:
+    contents = [message.get("content") or "" for message in planned_completion.messages]
+    return sum(get_token_counts(contents, planned_completion.model)) + TOKENS_PER_MESSAGE * len(contents)
@@ -1,7 +1,10 @@
 from .observed_consistency_completion_template import ObservedConsistencyQACompletionTemplate
 from .reference_completion_template import ReferenceCompletionTemplate
 from .prompt_evaluation_completion_template import PromptAnswerabilityCompletionTemplate
-from .semantic_evaluation_completion_template import SemanticEvaluationCompletionTemplate
+from .semantic_evaluation_completion_template import (
+    BatchedSemanticEvaluationCompletionTemplate,
+    SemanticEvaluationCompletionTemplate,
+)
 from .keywords import TemplateKeyword
 
 __all__ = [
@@ -10,4 +13,5 @@ __all__ = [
     "TemplateKeyword",
     "PromptAnswerabilityCompletionTemplate",
     "SemanticEvaluationCompletionTemplate",
+    "BatchedSemanticEvaluationCompletionTemplate",
 ]
@@ -0,0 +1,48 @@
+from typing import ClassVar
+
+from tlm.templates.keywords import ANSWER_PLACEHOLDER, MAX_EXPLANATION_WORDS_PLACEHOLDER, QUESTION_PLACEHOLDER
+from tlm.templates.parsers import EXPLANATION_XML_PARSER
+from tlm.types import CompletionTemplate
+
+
+class ExplanationCompletionTemplate(CompletionTemplate):
+    """Explains why a response that received a low trustworthiness score may be incorrect (used for deferred explanations)."""
+
+    _PROMPT: ClassVar[str] = f"""Below is a User Request and the Response proposed by an unreliable AI Assistant.
+An automated evaluation flagged this Response as potentially untrustworthy.
+
+<request>
+{QUESTION_PLACEHOLDER}
+</request>
+
+<response>
+{ANSWER_PLACEHOLDER}
+</response>
+
+
+# Instructions
+
+Explain why this Response may be incorrect or unreliable, considering factors like: factual errors, unsupported claims, misinterpretations of the User Request, missing details, and alternative better Responses.
+If you cannot find a concrete issue, state what cannot be verified about the Response.
+Be concise and specific (no more than {MAX_EXPLANATION_WORDS_PLACEHOLDER} words).
+
+Your output should strictly use the following template:
+
+<explanation>
+[your explanation]
+</explanation>"""
+
+    _TEMPERATURE: ClassVar[float] = 0.0
+
+    @classmethod
+    def create(cls, **kwargs):
+        return cls(
+            prompt_template=cls._PROMPT,
+            parse_patterns=EXPLANATION_XML_PARSER,
+            temperature=cls._TEMPERATURE,
+            use_logprobs=False,
+            include_message_context=False,
+            max_answer_tokens=16,
+            stop_sequence="</explanation>",
+            **kwargs,
+        )
@@ -36,6 +36,7 @@ Choice: [choose one letter between A and B]"""
             score_mapper=ab_mapping,
             use_logprobs=False,
             include_message_context=False,
+            max_answer_tokens=32,
         )
 
 
@@ -76,4 +77,6 @@ The output should strictly use the following template:
             parse_patterns=ANSWER_YES_NO_XML_PARSER,
             score_mapper=yes_no_mapping,
             use_logprobs=False,
+            max_answer_tokens=32,
+            stop_sequence="</answer>",
         )
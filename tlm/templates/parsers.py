@@ -27,6 +27,20 @@ REASONING_RESPONSE_PARSER = {
     **RESPONSE_PARSER,
 }
 
+EXPLANATION_XML_PARSER = {
+    ExtractedResponseField.EXPLANATION: [
+        RegexPattern(
+            regex=[
+                r"<explanation>\s*(.*?)\s*</explanation>",
+                r"<explanation>\s*(.*)",
+                r"^(.*?)\s*</explanation>",
+                r"^(.+)$",  # Fallback if no format matches
+            ],
+            flags=re.DOTALL | re.IGNORECASE,
+        ),
+    ],
+}
+
 SCORE_XML_PARSER = {
     ExtractedResponseField.SCORE: [
         RegexPattern(
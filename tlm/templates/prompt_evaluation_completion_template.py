@@ -59,5 +59,7 @@ Your output should strictly use the following template:
             score_mapper=yes_no_mapping,
             use_logprobs=True,
             include_message_context=False,
+            max_answer_tokens=32,
+            stop_sequence="</choice>",
             **kwargs,
         )
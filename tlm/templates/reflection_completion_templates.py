@@ -1,7 +1,5 @@
 from abc import ABC, abstractmethod
 from typing import Callable, ClassVar, Literal
-import json
-import ast
 from pydantic import BaseModel, Field
 
 from tlm.types.base import SOReflectionScoreConfigType
@@ -34,6 +32,7 @@ from tlm.templates.score_mapping import (
     certainty_mapping,
 )
 from tlm.types import AnswerChoiceToken, ExtractedResponseField, RegexPattern, CompletionTemplate
+from tlm.utils.json_utils import parse_json_object
 from tlm.utils.response_format_utils import construct_per_field_response_format_model
 from tlm.templates.per_field_scoring_models import (
     PerFieldCorrectnessEvaluation,
@@ -42,7 +41,13 @@ from tlm.templates.per_field_scoring_models import (
 )
 
 
+# output-token budget of a reflection score / rating / choice (excluding the explanation)
+REFLECTION_MAX_ANSWER_TOKENS = 32
+
+
 class ReflectionCompletionTemplate(CompletionTemplate, ABC):
+    _MAX_ANSWER_TOKENS: ClassVar[int | None] = REFLECTION_MAX_ANSWER_TOKENS
+    _STOP_SEQUENCE: ClassVar[str | None] = None
     _SHARED_USER_REQUEST_PROPOSED_RESPONSE_PROMPT: ClassVar[str] = (
         "Below is a User Request and the Response proposed by an unreliable AI Assistant:\n\n"
         f"<request>\n{QUESTION_PLACEHOLDER}\n</request>\n\n"
@@ -59,6 +64,8 @@ class ReflectionCompletionTemplate(CompletionTemplate, ABC):
         use_logprobs: bool | None = None,
         **kwargs,
     ):
+        kwargs.setdefault("max_answer_tokens", type(self)._MAX_ANSWER_TOKENS)
+        kwargs.setdefault("stop_sequence", type(self)._STOP_SEQUENCE)
         super().__init__(
             prompt_template=prompt_template,
             parse_patterns=parse_patterns,
@@ -81,6 +88,8 @@ class ReflectionCompletionTemplate(CompletionTemplate, ABC):
 
 class ReflectionSOPerFieldScoreTemplate(ReflectionCompletionTemplate):
     per_field_score_response_format: ClassVar[type[BaseModel]]
+    # the JSON response grows with the number of fields
+    _MAX_ANSWER_TOKENS: ClassVar[int | None] = None
 
     def __init_subclass__(cls, **kwargs):
         cls.so_reflection_score_config_type = SOReflectionScoreConfigType.PER_FIELD
@@ -94,6 +103,9 @@ class ReflectionSOPerFieldScoreTemplate(ReflectionCompletionTemplate):
 
 
 class ReflectionSOIncorrectFieldsTemplate(ReflectionCompletionTemplate):
+    # the JSON response grows with the number of fields
+    _MAX_ANSWER_TOKENS: ClassVar[int | None] = None
+
     def __init_subclass__(cls, **kwargs):
         cls.so_reflection_score_config_type = SOReflectionScoreConfigType.INCORRECT_FIELDS
         cls.per_field_score_key = "score"  # use a default key name for the per-field score
@@ -135,6 +147,7 @@ Your output should strictly use the following template:\n\n"""
         _SHARED_PROMPT + _OUTPUT_FORMAT_EXPLANATION + "\n\n" + _SHARED_OUTPUT_FORMAT_SCORE_0_100
     )
     _TEMPERATURE: ClassVar[float] = 0.0
+    _STOP_SEQUENCE: ClassVar[str | None] = "</score>"
 
     @classmethod
     def create(cls, reasoning_effort: ReasoningEffort, **kwargs) -> ReflectionCompletionTemplate:
@@ -180,6 +193,7 @@ Your output should strictly follow this template:\n\n"""
         _SHARED_PROMPT + _OUTPUT_FORMAT_RATING_EXPLANATION + "\n\n" + _SHARED_OUTPUT_FORMAT_RATING_0_10
     )
     _TEMPERATURE: ClassVar[float] = 0.0
+    _STOP_SEQUENCE: ClassVar[str | None] = "</rating>"
 
     @classmethod
     def create(cls, reasoning_effort: ReasoningEffort, **kwargs) -> ReflectionCompletionTemplate:
@@ -238,6 +252,7 @@ Your output should strictly use the following template:\n\n"""
         _SHARED_PROMPT + _OUTPUT_FORMAT_EXPLANATION + "\n\n" + _SHARED_OUTPUT_FORMAT_SCORE_0_100
     )
     _TEMPERATURE: ClassVar[float] = 0.0
+    _STOP_SEQUENCE: ClassVar[str | None] = "</score>"
 
     @classmethod
     def create(cls, reasoning_effort: ReasoningEffort, **kwargs) -> ReflectionCompletionTemplate:
@@ -296,6 +311,7 @@ Your output should strictly use the following template:\n\n"""
         AnswerChoiceToken(token="true", positive=True),
         AnswerChoiceToken(token="false", positive=False),
     ]
+    _STOP_SEQUENCE: ClassVar[str | None] = "</choice>"
 
     @classmethod
     def create(cls, reasoning_effort: ReasoningEffort, **kwargs) -> ReflectionCompletionTemplate:
@@ -349,6 +365,7 @@ Your output should strictly use the following template:\n\n"""
         _SHARED_PROMPT + _OUTPUT_FORMAT_EXPLANATION + "\n\n" + _SHARED_OUTPUT_FORMAT_RATING_1_5
     )
     _TEMPERATURE: ClassVar[float] = 0.0
+    _STOP_SEQUENCE: ClassVar[str | None] = "</rating>"
 
     @classmethod
     def create(cls, reasoning_effort: ReasoningEffort, **kwargs) -> ReflectionCompletionTemplate:
@@ -404,6 +421,7 @@ Your output must strictly use the following template:\n\n"""
         _SHARED_PROMPT + _OUTPUT_FORMAT_EXPLANATION + "\n\n" + _SHARED_OUTPUT_FORMAT_RATING_0_10
     )
     _TEMPERATURE: ClassVar[float] = 0.0
+    _STOP_SEQUENCE: ClassVar[str | None] = "</rating>"
 
     @classmethod
     def create(cls, reasoning_effort: ReasoningEffort, **kwargs) -> ReflectionCompletionTemplate:
@@ -452,6 +470,7 @@ Your output should strictly follow this template:
     )
 
     _TEMPERATURE: ClassVar[float] = 0.0
+    _STOP_SEQUENCE: ClassVar[str | None] = "</score>"
 
     @classmethod
     def create(cls, reasoning_effort: ReasoningEffort, **kwargs) -> ReflectionCompletionTemplate:
@@ -505,6 +524,7 @@ Your output should strictly use the following template:
     )
 
     _TEMPERATURE: ClassVar[float] = 0.0
+    _STOP_SEQUENCE: ClassVar[str | None] = "</score>"
 
     @classmethod
     def create(cls, reasoning_effort: ReasoningEffort, **kwargs) -> ReflectionCompletionTemplate:
@@ -571,6 +591,9 @@ Your output should strictly follow this template:
     )
 
     _TEMPERATURE: ClassVar[float] = 0.0
+    # the issues and alternate response (with reasoning) are not bounded by max_explanation_words
+    _MAX_ANSWER_TOKENS: ClassVar[int | None] = 256
+    _STOP_SEQUENCE: ClassVar[str | None] = "</score>"
 
     @classmethod
     def create(cls, reasoning_effort: ReasoningEffort, **kwargs) -> ReflectionCompletionTemplate:
@@ -809,12 +832,7 @@ Think through your evaluation systematically and provide clear reasoning for you
 
     @classmethod
     def construct_response_format(cls, response_json: str) -> type[BaseModel] | None:
-        try:
-            response_dict = json.loads(response_json)
-        except Exception:
-            response_dict = ast.literal_eval(response_json)
-
-        response_fields = response_dict.keys()
+        response_fields = parse_json_object(response_json).keys()
         ResponseFields = Literal[tuple(response_fields)]  # type: ignore
 
         class IncorrectField(BaseModel):
@@ -882,12 +900,7 @@ Output a JSON object with three fields:
 
     @classmethod
     def construct_response_format(cls, response_json: str) -> type[BaseModel] | None:
-        try:
-            response_dict = json.loads(response_json)
-        except Exception:
-            response_dict = ast.literal_eval(response_json)
-
-        response_fields = response_dict.keys()
+        response_fields = parse_json_object(response_json).keys()
         ResponseFields = Literal[tuple(response_fields)]  # type: ignore
 
         class IncorrectField(BaseModel):
@@ -1,5 +1,11 @@
+import functools
+import math
 from typing import ClassVar
 
+from pydantic import BaseModel, Field, create_model
+
+from tlm.config.capabilities import ModelCapabilities
+from tlm.config.defaults import get_settings
 from tlm.config.presets import ReasoningEffort
 from tlm.templates.keywords import (
     CONTEXT_IDENTIFIER_PLACEHOLDER,
@@ -14,6 +20,14 @@ from tlm.templates.keywords import (
 from tlm.templates.parsers import RATING_XML_PARSER, THINK_RATING_XML_PARSER
 from tlm.templates.score_mapping import score_5_mapping
 from tlm.types import Eval, CompletionTemplate
+from tlm.types.completion_template import EXPECTED_ANSWER_TOKENS
+
+settings = get_settings()
+
+# output-token budget of the rating of each eval in a batched semantic evaluation (excluding the explanation)
+BATCHED_EVAL_MAX_ANSWER_TOKENS = 32
+# labels of the query, context and response in a batched semantic evaluation prompt
+BATCHED_EVAL_INPUT_LABELS = ("Query", "Context", "Response")
 
 
 class SemanticEvaluationCompletionTemplate(CompletionTemplate):
@@ -94,5 +108,162 @@ Format your output using the following template:"""
             score_mapper=score_5_mapping,
             include_message_context=False,
             use_logprobs=True,
+            max_answer_tokens=32,
+            stop_sequence="</rating>",
+            **kwargs,
+        )
+
+
+class BatchedSemanticEvaluationCompletionTemplate(CompletionTemplate):
+    """Rates the provided information against the criteria of several evals in one call.
+
+    The inputs used by any eval of the batch (query, context and response) are sent once, under the labels of
+    BATCHED_EVAL_INPUT_LABELS. Each criteria block names the inputs its eval uses, and the labels its criteria use
+    for them when they differ. The response is a JSON object with the rating of each eval under its name.
+    """
+
+    eval_names: list[str] = Field(default=[], description="Names of the evals rated by the completion, in order")
+
+    _SHARED_PROMPT: ClassVar[str] = """## Your Task
+
+Evaluate the provided information based on each of the criteria below, independently of the other criteria, and rate it between 1 and 5 for each criteria, where 5 indicates meeting the criteria exceptionally well and 1 indicates not meeting the criteria at all.
+
+"""
+
+    _CRITERIA_PROMPT: ClassVar[str] = '<criteria name="{name}">\n{criteria}\n</criteria>\n\n'
+
+    _OUTPUT_FORMAT: ClassVar[
+        str
+    ] = """Format your output as a JSON object with one key per criteria name, each mapping to an object with the following keys:
+"""
+    _OUTPUT_FORMAT_EXPLANATION: ClassVar[str] = (
+        f'- "explanation": think carefully step by step to derive the rating in no more than '
+        f"{MAX_EXPLANATION_WORDS_PLACEHOLDER} words\n"
+    )
+    _OUTPUT_FORMAT_RATING: ClassVar[str] = '- "rating": single integer between 1 and 5\n'
+
+    @classmethod
+    def create(
+        cls, evals: tuple[Eval, ...], reasoning_effort: ReasoningEffort, **kwargs
+    ) -> "BatchedSemanticEvaluationCompletionTemplate":
+        if len({eval.name for eval in evals}) != len(evals):
+            raise ValueError("evals in a batch must have unique names")
+
+        query_label, context_label, response_label = BATCHED_EVAL_INPUT_LABELS
+        prompt_parts = [SemanticEvaluationCompletionTemplate._PREFIX]
+        input_information = []
+
+        if any(eval.query_identifier is not None for eval in evals):
+            prompt_parts.append(SemanticEvaluationCompletionTemplate._QUERY_PROMPT)
+            input_information.append(SemanticEvaluationCompletionTemplate._INPUT_INFORMATION_QUERY)
+
+        if any(eval.context_identifier is not None for eval in evals):
+            prompt_parts.append(SemanticEvaluationCompletionTemplate._CONTEXT_PROMPT)
+            input_information.append(SemanticEvaluationCompletionTemplate._INPUT_INFORMATION_CONTEXT)
+
+        if any(eval.response_identifier is not None for eval in evals):
+            prompt_parts.append(SemanticEvaluationCompletionTemplate._RESPONSE_PROMPT)
+            input_information.append(SemanticEvaluationCompletionTemplate._INPUT_INFORMATION_REFERENCE_ANSWER)
+
+        if input_information:
+            prompt_parts.append("\n")
+            prompt_parts.extend(input_information)
+
+        # the inputs are labeled the same way for all evals, whatever the identifiers of each eval
+        input_prompt = (
+            "".join(prompt_parts)
+            .replace(QUERY_IDENTIFIER_PLACEHOLDER, query_label)
+            .replace(CONTEXT_IDENTIFIER_PLACEHOLDER, context_label)
+            .replace(RESPONSE_IDENTIFIER_PLACEHOLDER, response_label)
+        )
+        num_inputs = len(input_information)
+        prompt_parts = [input_prompt, cls._SHARED_PROMPT]
+        # the criteria are part of the prompt template rather than template kwargs, so braces must be escaped
+        prompt_parts.extend(
+            cls._CRITERIA_PROMPT.format(
+                name=_escape_braces(eval.name),
+                criteria=_escape_braces(_get_batched_eval_criteria(eval, num_inputs)),
+            )
+            for eval in evals
+        )
+
+        prompt_parts.append(cls._OUTPUT_FORMAT)
+        if reasoning_effort != ReasoningEffort.NONE:
+            prompt_parts.append(cls._OUTPUT_FORMAT_EXPLANATION)
+        prompt_parts.append(cls._OUTPUT_FORMAT_RATING)
+
+        return cls(
+            prompt_template="".join(prompt_parts),
+            eval_names=[eval.name for eval in evals],
+            include_message_context=False,
+            # the ratings are scored by the expected value of their token logprobs, like single eval ratings
+            use_logprobs=True,
+            max_answer_tokens=BATCHED_EVAL_MAX_ANSWER_TOKENS * len(evals),
             **kwargs,
         )
+
+    def get_max_output_tokens(
+        self, max_explanation_words: int = 0, model_capabilities: ModelCapabilities | None = None
+    ) -> int:
+        # each eval gets its own explanation
+        return super().get_max_output_tokens(max_explanation_words * len(self.eval_names), model_capabilities)
+
+    def get_expected_output_tokens(self, max_explanation_words: int = 0) -> int:
+        explanation_tokens = math.ceil(max_explanation_words * len(self.eval_names) / settings.AVG_WORDS_PER_TOKEN)
+        return min(
+            self.get_max_output_tokens(max_explanation_words),
+            explanation_tokens + EXPECTED_ANSWER_TOKENS * len(self.eval_names),
+        )
+
+    def get_response_format_model(self, include_explanation: bool) -> type[BaseModel]:
+        """Returns the structured output model of the response: one rating object per eval name."""
+        return _construct_batched_response_format(tuple(self.eval_names), include_explanation)
+
+
+class _EvalRating(BaseModel):
+    rating: int = Field(ge=1, le=5)
+
+
+class _EvalRatingWithExplanation(BaseModel):
+    explanation: str
+    rating: int = Field(ge=1, le=5)
+
+
+@functools.lru_cache(maxsize=64)
+def _construct_batched_response_format(eval_names: tuple[str, ...], include_explanation: bool) -> type[BaseModel]:
+    rating_model = _EvalRatingWithExplanation if include_explanation else _EvalRating
+    # eval names are not necessarily valid identifiers, so they are used as aliases
+    fields = {f"eval_{idx}": (rating_model, Field(..., alias=name)) for idx, name in enumerate(eval_names)}
+    return create_model("BatchedSemanticEvaluation", **fields)  # type: ignore
+
+
+def _get_batched_eval_criteria(eval: Eval, num_batch_inputs: int) -> str:
+    """Returns the criteria of an eval in a batched prompt, preceded by the inputs it uses if the batch has others,
+    and by the labels its criteria use for the inputs if they differ from BATCHED_EVAL_INPUT_LABELS.
+    """
+    eval_inputs = [
+        (label, identifier)
+        for label, identifier in zip(
+            BATCHED_EVAL_INPUT_LABELS,
+            (eval.query_identifier, eval.context_identifier, eval.response_identifier),
+            strict=True,
+        )
+        if identifier is not None
+    ]
+
+    notes = []
+    if eval_inputs and len(eval_inputs) < num_batch_inputs:
+        notes.append(f"Only consider {_join_words([f'the {label}' for label, _ in eval_inputs])} for these criteria.")
+    aliases = [f'"{identifier}" refers to the {label}' for label, identifier in eval_inputs if identifier != label]
+    if aliases:
+        notes.append(f"In these criteria, {_join_words(aliases)}.")
+
+    return "\n".join([*notes, eval.criteria])
+
+
+def _join_words(words: list[str]) -> str:
+    return words[0] if len(words) == 1 else f"{', '.join(words[:-1])} and {words[-1]}"
+
+
+def _escape_braces(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
@@ -0,0 +1,37 @@
+from typing import Any, TypeVar
+
+from tlm.config.presets import PromptLayout
+from tlm.types import CompletionTemplate
+from tlm.utils.cache_utils import LRUCache, make_cache_key
+from tlm.utils.prompt_layout_utils import apply_prompt_layout
+
+TEMPLATE_CACHE_SIZE = 512
+
+T = TypeVar("T", bound=CompletionTemplate)
+
+_template_cache: LRUCache[Any, CompletionTemplate] = LRUCache(max_size=TEMPLATE_CACHE_SIZE)
+
+
+def get_cached_template(
+    template_cls: type[T], prompt_layout: PromptLayout = PromptLayout.DEFAULT, **create_kwargs: Any
+) -> T:
+    """Returns `template_cls.create(**create_kwargs)` with its prompt reordered for the prompt layout, memoized on the
+    template class, prompt layout and create arguments (e.g. reasoning effort, eval, constrain outputs).
+
+    Templates are treated as immutable once created, so the same instance is shared across requests.
+    """
+    key = (template_cls, prompt_layout, make_cache_key(create_kwargs))
+    return _template_cache.get_or_create(  # type: ignore[return-value]
+        key, lambda: _create_template(template_cls, prompt_layout, create_kwargs)
+    )
+
+
+def _create_template(template_cls: type[T], prompt_layout: PromptLayout, create_kwargs: dict[str, Any]) -> T:
+    template = template_cls.create(**create_kwargs)  # type: ignore[attr-defined]
+    if prompt_layout != PromptLayout.DEFAULT and template.prompt_template is not None:
+        template.prompt_template = apply_prompt_layout(template.prompt_template, prompt_layout)
+    return template
+
+
+def clear_template_cache() -> None:
+    _template_cache.clear()
@@ -1,5 +1,6 @@
 from .completion import Completion
 from .completion_template import CompletionTemplate
+from .logprobs import TokenLogprobs
 from .base import (
     InferenceType,
     ExtractedResponseField,
@@ -11,13 +12,16 @@ from .base import (
     RegexPattern,
     AnswerChoiceToken,
     CompletionUsage,
+    ModelPricing,
     CompletionFailure,
     SOReflectionScoreConfigType,
+    PlannedCompletion,
 )
 
 __all__ = [
     "Completion",
     "CompletionTemplate",
+    "TokenLogprobs",
     "InferenceType",
     "ExtractedResponseField",
     "SimilarityMeasure",
@@ -27,7 +31,9 @@ __all__ = [
     "RegexPattern",
     "AnswerChoiceToken",
     "CompletionUsage",
+    "ModelPricing",
     "CompletionFailure",
     "CompletionParams",
     "SOReflectionScoreConfigType",
+    "PlannedCompletion",
 ]
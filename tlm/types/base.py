@@ -24,7 +24,7 @@ class SimilarityMeasure(str, Enum):
     """Strategies for scoring the similarity of two generated responses.
 
     Values:
-        `JACCARD`, `EMBEDDING_SMALL`, `EMBEDDING_LARGE`, `CODE`, `STATEMENT`
+        `JACCARD`, `EMBEDDING_SMALL`, `EMBEDDING_LARGE`, `CODE`, `STATEMENT`, `STRUCTURED`
     """
 
     JACCARD = "jaccard"  # formerly STRING
@@ -32,6 +32,7 @@ class SimilarityMeasure(str, Enum):
     EMBEDDING_LARGE = "embedding_large"
     CODE = "code"
     STATEMENT = "statement"  # formerly DISCREPANCY
+    STRUCTURED = "structured"  # leaf-by-leaf comparison of JSON responses
 
     @classmethod
     def for_workflow(cls, workflow_type: WorkflowType) -> "SimilarityMeasure":
@@ -44,7 +45,7 @@ class SimilarityMeasure(str, Enum):
         elif workflow_type == WorkflowType.RAG:
             return cls.CODE
         elif workflow_type == WorkflowType.STRUCTURED_OUTPUT_SCORING:
-            return cls.JACCARD
+            return cls.STRUCTURED
 
         return cls.STATEMENT  # default
 
@@ -54,6 +55,7 @@ class CompletionFailureType(Enum):
     TIMEOUT = "timeout"
     RUNTIME_ERROR = "runtime_error"
     PARSE = "parse"
+    INPUT_TOO_LONG = "input_too_long"
 
 
 class FieldMetadata(BaseModel):
@@ -94,6 +96,20 @@ class CompletionUsage(BaseModel):
     prompt_tokens: int
     completion_tokens: int
     total_tokens: int
+    # prompt tokens read from the provider's prompt (prefix) cache, None if the provider did not report it
+    cached_prompt_tokens: int | None = None
+
+
+class ModelPricing(BaseModel):
+    """Price of a model, used to compute the dollar cost of a request's token usage.
+
+    Attributes:
+        input_cost_per_million_tokens: Cost (USD) per million input (prompt) tokens.
+        output_cost_per_million_tokens: Cost (USD) per million output (completion) tokens.
+    """
+
+    input_cost_per_million_tokens: float
+    output_cost_per_million_tokens: float
 
 
 class CompletionFailure(BaseModel):
@@ -107,3 +123,19 @@ CompletionParams = Dict[str, Any]
 class SOReflectionScoreConfigType(str, Enum):
     PER_FIELD = "per_field"
     INCORRECT_FIELDS = "incorrect_fields"
+
+
+class PlannedCompletion(BaseModel):
+    """An LLM call that a pipeline component would make, used to estimate the cost of a request without running it.
+
+    Attributes:
+        model: The model the completion would be generated with.
+        messages: The formatted input messages of a single call.
+        expected_output_tokens: The expected number of output tokens of a single call.
+        count: The number of identical calls.
+    """
+
+    model: str
+    messages: list[dict[str, str]]
+    expected_output_tokens: int
+    count: int = 1
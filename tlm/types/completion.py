@@ -1,16 +1,19 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator
 from typing import Any, Dict
-from litellm.types.utils import ChoiceLogprobs
 from litellm.files.main import ModelResponse
 
-from tlm.utils.openai_utils import extract_message_content
+from tlm.utils.json_utils import parse_json
+from tlm.utils.openai_utils import CHAT_COMPLETION, extract_message_content
 from .base import CompletionUsage, ExtractedResponseField, FieldMetadata
 from .completion_template import CompletionTemplate
+from .logprobs import TokenLogprobs
 
 
 class Completion(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     message: str
-    logprobs: ChoiceLogprobs | None = None
+    logprobs: TokenLogprobs | None = None
     perplexity: float | None = None
     usage: CompletionUsage | None = None
     explanation: str | None = None
@@ -19,6 +22,16 @@ class Completion(BaseModel):
     original_response: Dict[str, Any] | ModelResponse
     template: CompletionTemplate | None
 
+    _parsed_json: tuple[str, Any] | None = PrivateAttr(default=None)
+
+    @field_validator("logprobs", mode="before")
+    @classmethod
+    def to_token_logprobs(cls, v: Any) -> TokenLogprobs | None:
+        if v is None or isinstance(v, TokenLogprobs):
+            return v
+
+        return TokenLogprobs.from_provider(v)
+
     @field_validator("message", "explanation", mode="after")
     @classmethod
     def strip_whitespace(cls, v: str | None) -> str | None:
@@ -49,6 +62,24 @@ class Completion(BaseModel):
         completion.add_response_field(ExtractedResponseField.ANSWER, message)
         return completion
 
+    @property
+    def message_content(self) -> str:
+        """The message content of the original chat completion response (the completion message otherwise)."""
+        if isinstance(self.original_response, Dict) and CHAT_COMPLETION in self.original_response:
+            return extract_message_content(self.original_response)
+        return self.message
+
+    def get_parsed_json(self) -> Any | None:
+        """Returns the message content parsed as a structured output (see parse_json), or None if it is not one.
+
+        Parsed on first use and cached on the completion, so every consumer of a structured output response reuses
+        the same object. It must not be mutated.
+        """
+        message_content = self.message_content
+        if self._parsed_json is None or self._parsed_json[0] is not message_content:
+            self._parsed_json = (message_content, parse_json(message_content))
+        return self._parsed_json[1]
+
     def add_response_field(self, field: ExtractedResponseField, value: Any):
         stripped_value = value.strip() if isinstance(value, str) else value
 
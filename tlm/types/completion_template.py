@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import Any, Callable
-from litellm.litellm_core_utils.get_supported_openai_params import get_supported_openai_params
+import math
 
 from .base import (
     ExtractedResponseField,
@@ -10,13 +10,18 @@ from .base import (
     SOReflectionScoreConfigType,
 )
 
-from tlm.config.models import MODELS_WITH_LOGPROBS
-from tlm.config.provider import ModelProvider
+from tlm.config.capabilities import ModelCapabilities
 from tlm.config.defaults import get_settings
+from tlm.utils.label_matcher_utils import LabelMatcher, get_label_matcher
 
 
 settings = get_settings()
 
+# rough number of tokens in the answer / score part of a completion (excluding the explanation), used for planning
+EXPECTED_ANSWER_TOKENS = 50
+# explanation word limits are only instructions, so the token budget for an explanation leaves room to exceed them
+EXPLANATION_TOKEN_BUDGET_FACTOR = 2.0
+
 
 class CompletionTemplate(BaseModel):
     prompt_template: str | None = Field(
@@ -64,12 +69,28 @@ class CompletionTemplate(BaseModel):
         default=False,
         description="True indicates that the answer should be extracted from the 'answer' field of the structured output response",
     )
+    max_answer_tokens: int | None = Field(
+        default=None,
+        description=(
+            "Output-token budget for the answer / score part of the completion, to which the budget of the explanation "
+            "(if any) is added. None uses settings.MAX_TOKENS for the whole completion"
+        ),
+    )
+    stop_sequence: str | None = Field(
+        default=None,
+        description=(
+            "Sequence that ends the completion (e.g. the closing tag of the final output field). Generation stops "
+            "there and the sequence is added back to the completion message"
+        ),
+    )
+
+    _label_matcher: LabelMatcher | None = PrivateAttr(default=None)
 
     @classmethod
     def construct_response_format(cls, response_json: str) -> type[BaseModel] | None:
         return None
 
-    def get_completion_param_overrides(self, model_provider: ModelProvider) -> CompletionParams:
+    def get_completion_param_overrides(self, model_capabilities: ModelCapabilities) -> CompletionParams:
         overrides: CompletionParams = {}
         if self.temperature is not None:
             overrides["temperature"] = self.temperature
@@ -77,43 +98,76 @@ class CompletionTemplate(BaseModel):
             overrides["logprobs"] = None
             overrides["top_logprobs"] = None
         elif self.use_logprobs is True:
-            logprobs_supported = model_provider.model in MODELS_WITH_LOGPROBS
             top_logprobs_override = None
 
-            if logprobs_supported:
+            if model_capabilities.supports_logprobs:
                 overrides["logprobs"] = True
-                model_supported_params = get_supported_openai_params(
-                    model=model_provider.model, custom_llm_provider=model_provider.provider
-                )
-                if model_supported_params and "top_logprobs" in model_supported_params:
+                if model_capabilities.supports_top_logprobs:
                     top_logprobs_override = settings.TOP_LOGPROBS
             else:
                 overrides["logprobs"] = False
 
             overrides["top_logprobs"] = top_logprobs_override
 
+        if self.stop_sequence is not None and model_capabilities.supports_stop_sequences:
+            overrides["stop"] = [self.stop_sequence]
+
         return overrides
 
+    def get_label_matcher(self) -> LabelMatcher | None:
+        """Returns the matcher for constrain_outputs, compiled on first use and cached on the template."""
+        if not self.constrain_outputs:
+            return None
+        if self._label_matcher is None or self._label_matcher.labels != tuple(self.constrain_outputs):
+            self._label_matcher = get_label_matcher(tuple(self.constrain_outputs))
+        return self._label_matcher
+
+    def get_max_output_tokens(
+        self, max_explanation_words: int = 0, model_capabilities: ModelCapabilities | None = None
+    ) -> int:
+        """Returns the max_tokens of a completion: the answer budget plus the explanation budget for the reasoning
+        effort (max_explanation_words), capped at settings.MAX_TOKENS.
+
+        Reasoning models spend output tokens on hidden reasoning as well, so they always get settings.MAX_TOKENS.
+        """
+        if self.max_answer_tokens is None or (model_capabilities is not None and model_capabilities.supports_reasoning):
+            return settings.MAX_TOKENS
+
+        explanation_tokens = math.ceil(
+            max_explanation_words / settings.AVG_WORDS_PER_TOKEN * EXPLANATION_TOKEN_BUDGET_FACTOR
+        )
+        return min(settings.MAX_TOKENS, self.max_answer_tokens + explanation_tokens)
+
+    def get_expected_output_tokens(self, max_explanation_words: int = 0) -> int:
+        """Estimates the number of output tokens of a completion, assuming the explanation uses its full word budget."""
+        explanation_tokens = math.ceil(max_explanation_words / settings.AVG_WORDS_PER_TOKEN)
+        return min(self.get_max_output_tokens(max_explanation_words), explanation_tokens + EXPECTED_ANSWER_TOKENS)
+
     def format_messages(
         self,
         messages: list[dict[str, str]] | None = None,
         **template_kwargs: Any,
     ) -> list[dict[str, str]]:
+        """Returns a new message list for the completion call.
+
+        The returned list is new, but the message dicts from `messages` are shared rather than copied,
+        so callers must not mutate them in place.
+        """
         if messages is None:
             messages = []
-        else:
-            messages = messages.copy()
 
         if self.prompt_template is None:
-            return messages
+            return list(messages)
 
         if self.include_message_context:
             # remove all trailing user messages
-            while len(messages) > 0 and messages[-1]["role"] == "user":
-                messages.pop(-1)
+            prefix_length = len(messages)
+            while prefix_length > 0 and messages[prefix_length - 1]["role"] == "user":
+                prefix_length -= 1
+            formatted_messages = messages[:prefix_length]
         else:
-            messages = []
+            formatted_messages = []
 
         formatted_prompt = self.prompt_template.format(**template_kwargs)
-        messages.append({"role": "user", "content": formatted_prompt})
-        return messages
+        formatted_messages.append({"role": "user", "content": formatted_prompt})
+        return formatted_messages
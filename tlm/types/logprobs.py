@@ -0,0 +1,109 @@
+from functools import cached_property
+from itertools import pairwise
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+
+class TokenLogprobs:
+    """Columnar token logprobs of a completion.
+
+    Provider logprobs hold one object per token plus one per top-k alternative. They are converted once into:
+    - text: the concatenated tokens, with offsets[i]:offsets[i + 1] the span of token i (offsets has T + 1 entries,
+      a prefix sum of the token lengths)
+    - logprobs: (T,) float32 logprob of each generated token
+    - top_tokens / top_logprobs: (T, k) top-k alternatives of each token, padded with "" / -inf
+    - num_top_logprobs: (T,) number of top-k alternatives returned for each token
+
+    so that span confidences and token lookups run as vectorized NumPy operations.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        offsets: npt.NDArray[np.int64],
+        logprobs: npt.NDArray[np.float32],
+        top_tokens: npt.NDArray[np.object_],
+        top_logprobs: npt.NDArray[np.float32],
+        num_top_logprobs: npt.NDArray[np.int64],
+    ):
+        self.text = text
+        self.offsets = offsets
+        self.logprobs = logprobs
+        self.top_tokens = top_tokens
+        self.top_logprobs = top_logprobs
+        self.num_top_logprobs = num_top_logprobs
+
+    @classmethod
+    def from_provider(cls, choice_logprobs: Any) -> "TokenLogprobs | None":
+        """Converts the logprobs of a provider response choice (a ChoiceLogprobs object or its dict form).
+
+        Returns None if the choice has no token logprobs.
+        """
+        content = choice_logprobs.get("content") if isinstance(choice_logprobs, dict) else choice_logprobs.content
+        if content is None:
+            return None
+
+        num_tokens = len(content)
+        tokens: list[str] = []
+        logprobs = np.empty(num_tokens, dtype=np.float32)
+        token_top_logprobs: list[list[Any]] = []
+        for idx, token_logprob in enumerate(content):
+            if isinstance(token_logprob, dict):
+                tokens.append(token_logprob["token"])
+                logprobs[idx] = token_logprob["logprob"]
+                token_top_logprobs.append(token_logprob.get("top_logprobs") or [])
+            else:
+                tokens.append(token_logprob.token)
+                logprobs[idx] = token_logprob.logprob
+                token_top_logprobs.append(token_logprob.top_logprobs or [])
+
+        num_top_logprobs = np.fromiter((len(top) for top in token_top_logprobs), dtype=np.int64, count=num_tokens)
+        k = int(num_top_logprobs.max()) if num_tokens else 0
+        top_tokens = np.full((num_tokens, k), "", dtype=object)
+        top_logprobs = np.full((num_tokens, k), -np.inf, dtype=np.float32)
+        for idx, top in enumerate(token_top_logprobs):
+            for rank, top_logprob in enumerate(top):
+                if isinstance(top_logprob, dict):
+                    top_tokens[idx, rank] = top_logprob["token"]
+                    top_logprobs[idx, rank] = top_logprob["logprob"]
+                else:
+                    top_tokens[idx, rank] = top_logprob.token
+                    top_logprobs[idx, rank] = top_logprob.logprob
+
+        offsets = np.zeros(num_tokens + 1, dtype=np.int64)
+        np.cumsum(np.fromiter((len(token) for token in tokens), dtype=np.int64, count=num_tokens), out=offsets[1:])
+
+        return cls(
+            text="".join(tokens),
+            offsets=offsets,
+            logprobs=logprobs,
+            top_tokens=top_tokens,
+            top_logprobs=top_logprobs,
+            num_top_logprobs=num_top_logprobs,
+        )
+
+    def __len__(self) -> int:
+        return len(self.logprobs)
+
+    @cached_property
+    def tokens(self) -> list[str]:
+        offsets = self.offsets.tolist()
+        return [self.text[start:end] for start, end in pairwise(offsets)]
+
+    def find_token_index(self, string_index: int) -> int:
+        """Returns the index of the token containing the character at string_index of the text, by binary search over
+        the token offsets. Returns -1 if string_index is out of bounds.
+        """
+        if string_index >= len(self.text):
+            return -1
+        return max(int(np.searchsorted(self.offsets, string_index, side="right")) - 1, 0)
+
+    @property
+    def has_top_logprobs(self) -> bool:
+        """Whether top logprobs were returned for every token."""
+        return len(self) > 0 and bool((self.num_top_logprobs > 0).all())
+
+    def __repr__(self) -> str:
+        return f"TokenLogprobs(num_tokens={len(self)}, k={self.top_logprobs.shape[1]}, text={self.text!r})"
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any, Generic, TypeVar
+
+from pydantic import BaseModel
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe, size-bounded cache that evicts the least recently used entry once max_size is exceeded.
+
+    If ttl_seconds is set, entries also expire that many seconds after they were set.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float | None = None):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        if ttl_seconds is not None and ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: K, value: V) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_create(self, key: K, factory: Callable[[], V]) -> V:
+        """Returns the cached value for key, creating (and caching) it with factory on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def get_stats(self) -> dict[str, Any]:
+        """Returns the number of entries and the lookup hits, misses and hit rate (None before any lookup)."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+
+def make_cache_key(value: Any) -> Hashable:
+    """Converts a (possibly nested) value into a hashable cache key.
+
+    Pydantic models are keyed on their type and JSON dump, lists become tuples and dicts become sorted tuples of items.
+    """
+    if isinstance(value, BaseModel):
+        return (type(value), value.model_dump_json())
+    if isinstance(value, dict):
+        return tuple(sorted((key, make_cache_key(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(make_cache_key(item) for item in value)
+    return value
+
+
+def hash_cache_key(value: Any) -> str:
+    """Returns a stable SHA-256 digest of a JSON-serializable value, for keying caches on large inputs (e.g. messages)."""
+    serialized = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
@@ -1,20 +1,18 @@
 import logging
-import copy
 import json
 import string
+import time
 from typing import Any, Dict
 import re
 from pydantic import BaseModel
-from openai.lib._parsing._completions import type_to_response_format_param
 
 import litellm
 import litellm.exceptions
 from litellm import Choices, acompletion
 from litellm.files.main import ModelResponse
-from litellm.types.utils import ChoiceLogprobs
 
 from tlm.config.defaults import get_settings
-from tlm.config.provider import ModelProvider
+from tlm.config.capabilities import ModelCapabilities, get_model_capabilities
 from tlm.types import (
     Completion,
     CompletionFailure,
@@ -24,15 +22,20 @@ from tlm.types import (
     ExtractedResponseField,
     CompletionTemplate,
     SOReflectionScoreConfigType,
+    TokenLogprobs,
 )
-from tlm.utils.openai_utils import extract_structured_output_field, extract_message_content
+from tlm.utils.json_utils import get_json_field
 from tlm.utils.constrain_outputs_utils import constrain_output
+from tlm.utils.logging_utils import log_sampled_completion, should_sample_completion_log
+from tlm.utils.response_format_utils import get_response_format_param
+from tlm.utils.usage_utils import get_cached_prompt_tokens, record_completion_usage
 from tlm.utils.parse_utils import get_parsed_answer_tokens_confidence
 from tlm.utils.scoring.per_field_scoring_utils import (
     extract_per_field_reflection_metadata,
     extract_incorrect_fields_reflection_metadata,
 )
 from tlm.utils.math_utils import harmonic_mean
+from tlm.utils.token_budget_utils import exceeds_input_token_limit
 
 litellm.suppress_debug_info = True
 litellm.set_verbose = False
@@ -60,21 +63,50 @@ async def generate_completion(
         response_format_model,
     )
 
-    completion = await _generate_completion(litellm_params, template, reference_answer)
+    if await exceeds_input_token_limit(litellm_params["messages"], _get_model_capabilities(completion_params)):
+        # the call would fail on the model's context window, so it is not sent
+        logger.warning(
+            "[%s] prompt exceeds the input token limit of %s", template.__class__.__name__, litellm_params["model"]
+        )
+        return CompletionFailure(
+            type=CompletionFailureType.INPUT_TOO_LONG,
+            error=f"prompt exceeds the input token limit of {litellm_params['model']}",
+        )
+
+    sample_log = should_sample_completion_log()
+    start_time = time.perf_counter() if sample_log else 0.0
 
+    completion = await _generate_completion(litellm_params, template, reference_answer)
     if isinstance(completion, Completion):
-        log_msg = f"""Generated {template.__class__.__name__} completion for model {litellm_params["model"]} with messages:
-    {json.dumps(litellm_params["messages"], indent=2)}
+        # recorded under the model name the user requested (e.g. not its Bedrock inference profile ID), which is how
+        # price tables are keyed
+        record_completion_usage(completion_params.get("model") or settings.DEFAULT_MODEL, completion.usage)
+
+    if sample_log:
+        log_sampled_completion(
+            template.__class__.__name__, litellm_params, completion, time.perf_counter() - start_time
+        )
+
+    if isinstance(completion, Completion) and logger.isEnabledFor(logging.INFO):
+        logger.info(
+            """Generated %s completion for model %s with messages:
+    %s
 
     Content:
-    {completion.message}
+    %s
     Explanation:
-    {completion.explanation}
+    %s
     Response fields:
-    {json.dumps(completion.response_fields, indent=2)}
+    %s
     ===============================================
-    """
-        logger.info(log_msg)
+    """,
+            template.__class__.__name__,
+            litellm_params["model"],
+            json.dumps(litellm_params["messages"], indent=2),
+            completion.message,
+            completion.explanation,
+            json.dumps(completion.response_fields, indent=2),
+        )
 
     return completion
 
@@ -86,37 +118,44 @@ def _build_litellm_params(
     temperature: float | None = None,
     response_format_model: type[BaseModel] | None = None,
 ) -> CompletionParams:
-    litellm_params = copy.deepcopy(completion_params)
+    # shallow copy: every key that differs from the input is overridden below, so nested values (e.g. the
+    # conversation history) can safely be shared with completion_params instead of copied for every call
+    litellm_params = dict(completion_params)
 
-    input_messages: list[dict[str, str]] = litellm_params.get("messages", [])
+    input_messages: list[dict[str, str]] = completion_params.get("messages", [])
     litellm_params["messages"] = template.format_messages(messages=input_messages, **template_kwargs)
 
     model = completion_params.get("model")
-
-    model_provider = ModelProvider(model=model) if model else settings.default_model_provider
-    litellm_params["model"] = model_provider.model
+    model_capabilities = _get_model_capabilities(completion_params)
+    litellm_params["model"] = model_capabilities.model
 
     if "max_tokens" not in litellm_params:
-        litellm_params["max_tokens"] = settings.MAX_TOKENS
+        litellm_params["max_tokens"] = template.get_max_output_tokens(
+            template_kwargs.get("max_explanation_words", 0), model_capabilities
+        )
 
     if temperature:
         litellm_params["temperature"] = temperature
 
-    overrides = template.get_completion_param_overrides(model_provider)
+    overrides = template.get_completion_param_overrides(model_capabilities)
     litellm_params.update(overrides)
 
     if response_format_model:
-        litellm_params["response_format"] = type_to_response_format_param(response_format_model)
-
-    model_provider_params = model_provider.model_dump(exclude_unset=True, exclude_none=True)
-    model_provider_params.pop("model", None)
-    model_provider_params.pop("provider", None)
+        litellm_params["response_format"] = get_response_format_param(response_format_model)
 
-    litellm_params.update(model_provider_params)
+    if not model and settings.DEFAULT_API_KEY:
+        litellm_params["api_key"] = settings.DEFAULT_API_KEY
 
     return litellm_params
 
 
+def _get_model_capabilities(completion_params: CompletionParams) -> ModelCapabilities:
+    model = completion_params.get("model")
+    if model:
+        return get_model_capabilities(model, api_base=completion_params.get("api_base"))
+    return get_model_capabilities(settings.DEFAULT_MODEL, settings.DEFAULT_PROVIDER)
+
+
 async def _generate_completion(
     litellm_params: CompletionParams,
     template: CompletionTemplate | None,
@@ -132,27 +171,28 @@ async def _generate_completion(
         else:
             failure_type = CompletionFailureType.RUNTIME_ERROR
 
-        logger.error(
-            f"[{template.__class__.__name__}] error generating completion with LiteLLM: {e}\nusing litellm params: \n{litellm_params}\n{'=' * 100}"
-        )
+        logger.error("[%s] error generating completion with LiteLLM: %s", template.__class__.__name__, e)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("using litellm params: \n%s\n%s", litellm_params, "=" * 100)
         return CompletionFailure(type=failure_type, error=str(e))
 
     if isinstance(response, ModelResponse):
         assert isinstance(response.choices[0], Choices)
         content = response.choices[0].message.content or ""
+        finish_reason = response.choices[0].finish_reason
         logprobs = None
 
-        if litellm_params.get("logprobs") and hasattr(response.choices[0], "logprobs"):
-            # Convert ChoiceLogprobs to dict to avoid Pydantic validation issues
-            choice_logprobs = response.choices[0].logprobs
-            logprobs = ChoiceLogprobs.model_validate(
-                choice_logprobs.model_dump()
-                if choice_logprobs and hasattr(choice_logprobs, "model_dump")
-                else choice_logprobs
-            )
+        if litellm_params.get("logprobs") and (choice_logprobs := getattr(response.choices[0], "logprobs", None)):
+            # converted once into columnar arrays, rather than validating a Pydantic object per token and alternative
+            logprobs = TokenLogprobs.from_provider(choice_logprobs)
+
+            if logprobs is not None and logprobs.text:
+                content = logprobs.text
 
-            if raw_message_content := _get_raw_message_content(logprobs):
-                content = raw_message_content
+        if litellm_params.get("stop") and template and template.stop_sequence and finish_reason == "stop":
+            # the stop sequence (e.g. a closing tag) is not part of the generated content, but the parse patterns expect it
+            if not content.rstrip().endswith(template.stop_sequence):
+                content += template.stop_sequence
 
         explanation = (
             response.choices[0].message.reasoning_content
@@ -169,6 +209,7 @@ async def _generate_completion(
                 prompt_tokens=usage.prompt_tokens if usage else -1,
                 completion_tokens=usage.completion_tokens if usage else -1,
                 total_tokens=usage.total_tokens if usage else -1,
+                cached_prompt_tokens=get_cached_prompt_tokens(usage),
             ),
             original_response=response,
             template=template,
@@ -183,12 +224,6 @@ async def _generate_completion(
     )
 
 
-def _get_raw_message_content(logprobs: ChoiceLogprobs) -> str | None:
-    if logprobs is None or logprobs.content is None:
-        return None
-    return "".join([message_token.token for message_token in logprobs.content])
-
-
 def _parse_completion(completion: Completion, reference_answer: str | None = None) -> None:
     """Update the completion with parsed response fields"""
 
@@ -222,9 +257,14 @@ def _parse_completion(completion: Completion, reference_answer: str | None = Non
                 break
 
     if completion.template.constrain_outputs:
-        constrain_output(completion, completion.message, completion.template.constrain_outputs)
+        constrain_output(
+            completion,
+            completion.message,
+            completion.template.constrain_outputs,
+            label_matcher=completion.template.get_label_matcher(),
+        )
 
-    if answer_start_idx and answer_end_idx and completion.logprobs:
+    if answer_start_idx and answer_end_idx and completion.logprobs is not None:
         answer_end_idx = _get_trimmed_index(completion.message, answer_start_idx, answer_end_idx)
         generic_answer_tokens_confidence = get_parsed_answer_tokens_confidence(
             completion,
@@ -234,41 +274,32 @@ def _parse_completion(completion: Completion, reference_answer: str | None = Non
         completion.perplexity = generic_answer_tokens_confidence
 
     if completion.template.extract_answer:
-        message_content = (
-            extract_message_content(completion.original_response)
-            if isinstance(completion.original_response, Dict)
-            else completion.message
-        )
-        answer = extract_structured_output_field(message_content, "answer")
+        message_content = completion.message_content
+        message_json = completion.get_parsed_json()
+        answer = get_json_field(message_json, "answer")
         completion.add_response_field(ExtractedResponseField.ANSWER, answer or message_content)
 
-        explanation = extract_structured_output_field(message_content, "explanation")
+        explanation = get_json_field(message_json, "explanation")
         completion.add_response_field(ExtractedResponseField.EXPLANATION, explanation)
 
     if completion.template.so_reflection_score_config_type == SOReflectionScoreConfigType.PER_FIELD:
-        if isinstance(completion.original_response, Dict):
-            message_content = extract_message_content(completion.original_response)
-        else:
-            message_content = completion.message
-
         assert completion.template.per_field_score_key is not None
         assert completion.template.score_mapper is not None
         per_field_metadata = extract_per_field_reflection_metadata(
-            message_content, completion.template.per_field_score_key, completion.template.score_mapper
+            _get_parsed_json_object(completion),
+            completion.template.per_field_score_key,
+            completion.template.score_mapper,
         )
         completion.per_field_metadata = per_field_metadata
         harmonic_mean_score = harmonic_mean([metadata.score for metadata in per_field_metadata.values()])
         completion.add_response_field(ExtractedResponseField.MAPPED_SCORE, harmonic_mean_score)
 
     elif completion.template.so_reflection_score_config_type == SOReflectionScoreConfigType.INCORRECT_FIELDS:
-        if isinstance(completion.original_response, Dict):
-            message_content = extract_message_content(completion.original_response)
-        else:
-            message_content = completion.message
+        message_json = _get_parsed_json_object(completion)
 
         assert reference_answer is not None
         per_field_metadata = extract_incorrect_fields_reflection_metadata(
-            message_content,
+            message_json,
             reference_answer,
         )
         completion.per_field_metadata = per_field_metadata
@@ -276,7 +307,7 @@ def _parse_completion(completion: Completion, reference_answer: str | None = Non
         assert score_mapper is not None
 
         assert completion.template.so_overall_score_key_name is not None
-        unmapped_overall_score = json.loads(message_content)[completion.template.so_overall_score_key_name]
+        unmapped_overall_score = message_json[completion.template.so_overall_score_key_name]
 
         completion.add_response_field(
             ExtractedResponseField.MAPPED_SCORE,
@@ -284,6 +315,13 @@ def _parse_completion(completion: Completion, reference_answer: str | None = Non
         )
 
 
+def _get_parsed_json_object(completion: Completion) -> dict[str, Any]:
+    message_json = completion.get_parsed_json()
+    if not isinstance(message_json, dict):
+        raise ValueError(f"Expected a JSON object, got: {completion.message_content[:100]}")
+    return message_json
+
+
 def _get_trimmed_index(message: str, start_idx: int, end_idx: int) -> int:
     """Returns an adjusted end index that excludes any trailing punctuation and whitespace.
 
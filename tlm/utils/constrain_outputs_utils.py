@@ -1,14 +1,14 @@
-from difflib import SequenceMatcher
-import re
 import warnings
 
 from tlm.types import Completion, ExtractedResponseField
+from tlm.utils.label_matcher_utils import LabelMatcher, get_label_matcher
 
 
 def constrain_output(
     completion: Completion,
     original_message: str,
     constrain_outputs: list[str],
+    label_matcher: LabelMatcher | None = None,
 ) -> None:
     """Match the original response to one of the constrained output options.
     Extract the provided output values using regex patterns.
@@ -22,22 +22,20 @@ def constrain_output(
     ------
     original_message: LLM response
     constrain_outputs: List of possible output options
+    label_matcher: Compiled matcher for `constrain_outputs` (e.g. the one cached on the completion template),
+        looked up from the shared cache if not provided
     """
-    escaped_constrain_outputs = [re.escape(output) for output in constrain_outputs]
-    constrain_outputs_pattern = "(" + "|".join(escaped_constrain_outputs) + ")"
+    if label_matcher is None:
+        label_matcher = get_label_matcher(tuple(constrain_outputs))
 
     # Parse category if LLM response is properly formatted
-    exact_matches = re.findall(constrain_outputs_pattern, original_message, re.IGNORECASE)
-    if len(exact_matches) > 0:
-        # Find the corresponding original case-sensitive value from CONFIG.constrain_outputs
-        matched_value = next(output for output in constrain_outputs if output.lower() == exact_matches[-1].lower())
-
+    matched_value = label_matcher.find_last_exact_match(original_message)
+    if matched_value is not None:
         completion.add_response_field(ExtractedResponseField.ANSWER, matched_value)
         return
 
     # If there are no exact matches to a specific category, return the closest category based on string similarity.
-    best_match = max(constrain_outputs, key=lambda x: SequenceMatcher(None, original_message, x).ratio())
-    similarity_score = SequenceMatcher(None, original_message, best_match).ratio()
+    best_match, similarity_score = label_matcher.find_closest_match(original_message)
 
     # The 0.7 threshold is arbitrary and we can tune it later if needed based on the logs.
     if similarity_score < 0.7:
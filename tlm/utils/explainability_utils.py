@@ -1,11 +1,19 @@
+from typing import Any
+
 import numpy as np
 import numpy.typing as npt
 
 from tlm.types import Completion, ExtractedResponseField
 from tlm.config.defaults import get_settings
+from tlm.config.presets import REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS, ReasoningEffort
+from tlm.templates.explanation_completion_template import ExplanationCompletionTemplate
+from tlm.templates.template_cache import get_cached_template
+from tlm.utils.completion_utils import generate_completion
+from tlm.utils.openai_utils import CHAT_COMPLETION, extract_message_content
 
 defaults = get_settings()
 
+LABEL_DISTRIBUTION_EXPLANATION_TEMPLATE = "This response is untrustworthy because the model assigned substantial probability to other answers. Probability of each answer: {label_probabilities}"
 OBSERVED_CONSISTENCY_EXPLANATION_TEMPLATE = "This response is untrustworthy due to lack of consistency in possible responses from the model. Here's one inconsistent alternate response that the model considered (which may not be accurate either): \n{observed_consistency_completion}"
 
 
@@ -17,7 +25,13 @@ def get_explainability_message(
     consistency_scores_flat: npt.NDArray[np.float64],
     best_answer_idx: int,
     best_answer: str,
+    label_distribution: dict[str, float] | None = None,
+    best_answer_reflections_only: bool = False,
 ) -> str:
+    """Returns the explanation of a trustworthiness score. With best_answer_reflections_only, only the self
+    reflections of the best answer count towards whether they explain the score (e.g. when the score is the best
+    candidate's among several scored responses).
+    """
     explainability_message = ""
 
     if average_trustworthiness_score is None:
@@ -27,16 +41,20 @@ def get_explainability_message(
         not np.isnan(average_trustworthiness_score)
         and average_trustworthiness_score < defaults.EXPLAINABILITY_THRESHOLD
     ):
-        self_reflection_completions_flat = [
-            completion for sublist in self_reflection_completions for completion in sublist
-        ]
-        average_self_reflection_score = np.mean(
-            [
-                float(mapped_score)
-                for completion in self_reflection_completions_flat
-                if (mapped_score := completion.response_fields.get(ExtractedResponseField.MAPPED_SCORE)) is not None
+        if best_answer_reflections_only:
+            scored_reflection_completions = (
+                self_reflection_completions[best_answer_idx] if self_reflection_completions else []
+            )
+        else:
+            scored_reflection_completions = [
+                completion for sublist in self_reflection_completions for completion in sublist
             ]
-        )
+        self_reflection_scores = [
+            float(mapped_score)
+            for completion in scored_reflection_completions
+            if (mapped_score := completion.response_fields.get(ExtractedResponseField.MAPPED_SCORE)) is not None
+        ]
+        average_self_reflection_score = np.mean(self_reflection_scores) if self_reflection_scores else np.nan
         if (
             not np.isnan(average_self_reflection_score)
             and average_self_reflection_score < defaults.SELF_REFLECTION_EXPLAINABILITY_THRESHOLD
@@ -63,6 +81,9 @@ def get_explainability_message(
                 explainability_message += observed_consistency_explanation
                 explainability_message += _add_punctuation_if_necessary(explainability_message) + "\n"
 
+        if label_distribution:
+            explainability_message += _get_label_distribution_explanation(label_distribution) + "\n"
+
         if (
             len(explainability_message) < 5
         ):  # the explainability score is low but neither self_reflection or observed_consistency contribute to this issue or we parsed out all relevant text (there are less than 5 characters left).
@@ -75,6 +96,46 @@ def get_explainability_message(
     return cleaned_explainability_message
 
 
+def needs_explanation(trustworthiness_score: float | None) -> bool:
+    """Returns True if the trustworthiness score is below the explainability threshold."""
+    return (
+        trustworthiness_score is not None
+        and not np.isnan(trustworthiness_score)
+        and trustworthiness_score < defaults.EXPLAINABILITY_THRESHOLD
+    )
+
+
+async def generate_explanation(prompt: str, response: str, reasoning_effort: ReasoningEffort) -> str | None:
+    """Makes one targeted LLM call explaining why the response to the prompt may be untrustworthy.
+
+    Returns None if the completion failed.
+    """
+    if reasoning_effort == ReasoningEffort.NONE:
+        reasoning_effort = ReasoningEffort.LOW
+
+    completion = await generate_completion(
+        get_cached_template(ExplanationCompletionTemplate),
+        template_kwargs={
+            "question": prompt,
+            "answer": response,
+            "max_explanation_words": REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS[reasoning_effort],
+        },
+    )
+    if not isinstance(completion, Completion):
+        return None
+
+    return completion.response_fields.get(ExtractedResponseField.EXPLANATION) or completion.message
+
+
+def get_response_text(response: str | Any) -> str:
+    """Returns the text of a response returned by TLM (a string, chat completion or chat completion dict)."""
+    if isinstance(response, str):
+        return response
+    if isinstance(response, dict) and CHAT_COMPLETION in response:
+        return extract_message_content(response)
+    return response["choices"][0]["message"]["content"] or ""
+
+
 def _get_lowest_scoring_reflection_explanation(
     self_reflection_completions: list[Completion],
 ) -> str | None:
@@ -102,6 +163,14 @@ def _add_punctuation_if_necessary(message: str) -> str:
         return ". "
 
 
+def _get_label_distribution_explanation(label_distribution: dict[str, float]) -> str:
+    label_probabilities = ", ".join(
+        f"{label}: {probability:.2f}"
+        for label, probability in sorted(label_distribution.items(), key=lambda item: item[1], reverse=True)
+    )
+    return LABEL_DISTRIBUTION_EXPLANATION_TEMPLATE.format(label_probabilities=label_probabilities)
+
+
 def _get_observed_consistency_explanation(
     observed_consistency_completions: list[Completion],
     consistency_scores: npt.NDArray[np.float64],
@@ -0,0 +1,52 @@
+import ast
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+
+def parse_json(text: str) -> Any | None:
+    """Parses a structured output response: as JSON (with orjson if installed), then as a Python literal since some
+    LLMs return dict reprs. Returns None if the text is neither.
+
+    Each call returns a new object. Completions cache their parsed message content (see Completion.get_parsed_json).
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+
+    try:
+        # also accepts NaN / Infinity, which orjson rejects
+        return json.loads(text)
+    except (ValueError, RecursionError):
+        pass
+
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, TypeError, SyntaxError, RecursionError, MemoryError):
+        # TypeError: unhashable dict keys or set elements, e.g. "{[1]: 2}"
+        return None
+
+
+def parse_json_object(text: str) -> dict[str, Any]:
+    """Parses a structured output response that must be a JSON object (see parse_json).
+
+    Raises ValueError if the text is not a JSON object.
+    """
+    parsed = parse_json(text)
+    if not isinstance(parsed, dict):
+        raise ValueError(f"Expected a JSON object, got: {text[:100]}")
+    return parsed
+
+
+def get_json_field(parsed: Any, field: str) -> str | None:
+    """Returns the string value of a top-level field of a parsed structured output, or None if it has no such field."""
+    try:
+        return str(parsed[field])
+    except (KeyError, TypeError, IndexError):
+        return None
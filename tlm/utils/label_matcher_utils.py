@@ -0,0 +1,123 @@
+import functools
+import heapq
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Any
+
+# number of characters per n-gram in the fuzzy matching index
+NGRAM_SIZE = 3
+# max number of labels (those sharing the most n-grams with the text) compared with SequenceMatcher in a fuzzy lookup.
+# Label sets up to this size are compared in full.
+MAX_FUZZY_CANDIDATES = 64
+LABEL_MATCHER_CACHE_SIZE = 64
+
+_LABEL_END = ""
+
+
+class LabelMatcher:
+    """Matches LLM outputs against a fixed set of labels (the constrain_outputs of a template).
+
+    Compiled once per label set:
+    - a character trie of the lowercased labels, used to find exact (case-insensitive) mentions of labels in one pass
+      over the text
+    - an n-gram index of the labels, used to pick the candidates for the fuzzy nearest-label lookup, so that large
+      taxonomies are not compared label by label with SequenceMatcher
+    """
+
+    def __init__(self, labels: tuple[str, ...]):
+        self.labels = labels
+
+        self._trie: dict[str, Any] = {}
+        for idx, label in enumerate(labels):
+            if not label:
+                continue
+            node = self._trie
+            for char in label.lower():
+                node = node.setdefault(char, {})
+            # the first label with a given lowercased value wins, like the first alternative of a regex
+            node.setdefault(_LABEL_END, idx)
+
+        self._label_ngrams = [_get_ngrams(label) for label in labels]
+        self._ngram_index: dict[str, list[int]] = {}
+        for idx, ngrams in enumerate(self._label_ngrams):
+            for ngram in ngrams:
+                self._ngram_index.setdefault(ngram, []).append(idx)
+
+    def find_last_exact_match(self, text: str) -> str | None:
+        """Returns the label of the last case-insensitive mention of a label in the text, or None if no label is
+        mentioned.
+
+        Mentions are found left to right without overlap and, when several labels match at the same position, the one
+        listed first wins (the same matches as re.findall over an alternation of the labels).
+        """
+        lowered_text = text.lower()
+        last_match_idx = None
+        position = 0
+        while position < len(lowered_text):
+            node = self._trie
+            match_idx = None
+            for char_idx in range(position, len(lowered_text)):
+                node = node.get(lowered_text[char_idx])
+                if node is None:
+                    break
+                label_idx = node.get(_LABEL_END)
+                if label_idx is not None and (match_idx is None or label_idx < match_idx):
+                    match_idx = label_idx
+
+            if match_idx is None:
+                position += 1
+            else:
+                last_match_idx = match_idx
+                position += len(self.labels[match_idx].lower())
+
+        return None if last_match_idx is None else self.labels[last_match_idx]
+
+    def find_closest_match(self, text: str) -> tuple[str, float]:
+        """Returns the label most similar to the text (by SequenceMatcher ratio, ties going to the label listed first)
+        and its similarity score.
+
+        Only the MAX_FUZZY_CANDIDATES labels sharing the most n-grams with the text are compared.
+        """
+        best_idx = len(self.labels) - 1
+        best_ratio = -1.0
+        for idx in self._get_fuzzy_candidates(text):
+            matcher = SequenceMatcher(None, text, self.labels[idx])
+            # skip labels whose upper bounds on the ratio cannot beat the best match so far
+            if matcher.real_quick_ratio() <= best_ratio or matcher.quick_ratio() <= best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio > best_ratio:
+                best_idx, best_ratio = idx, ratio
+
+        return self.labels[best_idx], max(best_ratio, 0.0)
+
+    def _get_fuzzy_candidates(self, text: str) -> list[int]:
+        """Returns the indices of the labels to compare with the text, in label order."""
+        if len(self.labels) <= MAX_FUZZY_CANDIDATES:
+            return list(range(len(self.labels)))
+
+        text_ngrams = _get_ngrams(text)
+        shared_ngram_counts: Counter[int] = Counter()
+        for ngram in text_ngrams:
+            shared_ngram_counts.update(self._ngram_index.get(ngram, ()))
+
+        # Dice coefficient of the n-gram sets, which approximates the SequenceMatcher ratio
+        candidates = heapq.nlargest(
+            MAX_FUZZY_CANDIDATES,
+            shared_ngram_counts,
+            key=lambda idx: shared_ngram_counts[idx] / (len(text_ngrams) + len(self._label_ngrams[idx])),
+        )
+        return sorted(candidates)
+
+
+@functools.lru_cache(maxsize=LABEL_MATCHER_CACHE_SIZE)
+def get_label_matcher(labels: tuple[str, ...]) -> LabelMatcher:
+    """Returns the LabelMatcher for a label set, compiled once and shared between templates."""
+    return LabelMatcher(labels)
+
+
+def _get_ngrams(text: str) -> set[str]:
+    lowered_text = text.lower()
+    if len(lowered_text) <= NGRAM_SIZE:
+        return {lowered_text} if lowered_text else set()
+    return {lowered_text[idx : idx + NGRAM_SIZE] for idx in range(len(lowered_text) - NGRAM_SIZE + 1)}
@@ -0,0 +1,77 @@
+import json
+import logging
+import random
+from typing import Any
+
+from tlm.config.defaults import get_settings
+from tlm.types import Completion, CompletionFailure, CompletionParams
+
+settings = get_settings()
+
+SAMPLED_LOGGER_NAME = "tlm.sampled"
+TRUNCATION_SUFFIX = "...[truncated]"
+
+sampled_logger = logging.getLogger(SAMPLED_LOGGER_NAME)
+
+
+def should_sample_completion_log() -> bool:
+    """Returns True if the current LLM call should be emitted as a sampled structured log record.
+
+    Sampling is disabled unless `SAMPLED_LOG_RATE` is set, and the `tlm.sampled` logger is enabled for INFO.
+    """
+    sample_rate = settings.SAMPLED_LOG_RATE
+    if sample_rate <= 0 or not sampled_logger.isEnabledFor(logging.INFO):
+        return False
+
+    return sample_rate >= 1 or random.random() < sample_rate
+
+
+def truncate_payload(value: Any, max_chars: int) -> Any:
+    """Recursively truncates all strings in a JSON-like payload to at most max_chars characters."""
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value
+        return value[:max_chars] + TRUNCATION_SUFFIX
+    if isinstance(value, dict):
+        return {key: truncate_payload(item, max_chars) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [truncate_payload(item, max_chars) for item in value]
+    return value
+
+
+def log_sampled_completion(
+    template_name: str,
+    litellm_params: CompletionParams,
+    completion: Completion | CompletionFailure,
+    latency_seconds: float,
+) -> None:
+    """Emits a single structured (JSON) log record describing an LLM call, with all payloads truncated.
+
+    The record is attached to the log record as `tlm_record` (for structured log handlers) and is also
+    serialized as the log message.
+    """
+    max_chars = settings.SAMPLED_LOG_MAX_PAYLOAD_CHARS
+    messages = litellm_params.get("messages", [])
+
+    record: dict[str, Any] = {
+        "event": "tlm_completion",
+        "template": template_name,
+        "model": litellm_params.get("model"),
+        "num_messages": len(messages),
+        "messages": truncate_payload(messages, max_chars),
+        "latency_ms": round(latency_seconds * 1000, 1),
+    }
+
+    if isinstance(completion, Completion):
+        record["status"] = "success"
+        record["message"] = truncate_payload(completion.message, max_chars)
+        record["explanation"] = truncate_payload(completion.explanation, max_chars)
+        record["response_fields"] = truncate_payload(completion.response_fields, max_chars)
+        record["perplexity"] = completion.perplexity
+        record["usage"] = completion.usage.model_dump() if completion.usage else None
+    else:
+        record["status"] = "failure"
+        record["failure_type"] = completion.type.value if completion.type else None
+        record["error"] = truncate_payload(completion.error, max_chars)
+
+    sampled_logger.info(json.dumps(record, default=str), extra={"tlm_record": record})
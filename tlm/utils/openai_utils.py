@@ -2,10 +2,12 @@ import contextlib
 from typing import AsyncGenerator, List, Literal, Dict, Any, cast
 import logging
 import httpx
-import ast
-import json
 from openai import AsyncOpenAI
 
+from tlm.types.base import CompletionUsage
+from tlm.utils.json_utils import get_json_field, parse_json
+from tlm.utils.usage_utils import record_completion_usage
+
 DEFAULT_COMPLETION_RETRY_ATTEMPTS = 2
 DEFAULT_EMBEDDING_TIMEOUT = 5.0
 
@@ -38,6 +40,15 @@ async def get_text_embedding(
         model=model,
         timeout=DEFAULT_EMBEDDING_TIMEOUT,
     )
+    if embedding.usage is not None:
+        record_completion_usage(
+            model,
+            CompletionUsage(
+                prompt_tokens=embedding.usage.prompt_tokens,
+                completion_tokens=0,
+                total_tokens=embedding.usage.total_tokens,
+            ),
+        )
     return embedding.data[0].embedding
 
 
@@ -46,14 +57,4 @@ def extract_message_content(completion: Dict[str, Any]) -> str:
 
 
 def extract_structured_output_field(message_content: str, field: str) -> str | None:
-    try:
-        return str(ast.literal_eval(message_content)[field])
-    except Exception:
-        pass
-
-    try:
-        return str(json.loads(message_content)[field])
-    except Exception:
-        pass
-
-    return None
+    return get_json_field(parse_json(message_content), field)
@@ -1,16 +1,16 @@
+import functools
 import logging
-import math
 import string
-from typing import Dict, List
 
 import numpy as np
-from litellm.types.utils import ChatCompletionTokenLogprob
 
 from tlm.utils.math_utils import _logprob_to_probability
-from tlm.types import CompletionFailure, Completion
+from tlm.types import CompletionFailure, Completion, TokenLogprobs
 
 logger = logging.getLogger(__name__)
 
+NORMALIZED_TOKEN_CACHE_SIZE = 16384
+
 
 def compute_score_expected_value(completion: Completion | CompletionFailure, raw_score: str) -> float | None:
     """
@@ -30,47 +30,47 @@ def compute_score_expected_value(completion: Completion | CompletionFailure, raw
         return np.nan
 
     try:
-        completion_logprobs = completion.logprobs
-        assert completion_logprobs is not None
-        assert completion_logprobs.content is not None
+        token_logprobs = completion.logprobs
+        assert token_logprobs is not None
 
-        generated_logprobs = completion_logprobs.content
         # First, locate the token that we care for logprobs, i.e., the token matching the score
-        score_logprobs = None
-        for token_logprobs in generated_logprobs:
-            if token_logprobs.token == raw_score:
-                score_logprobs = token_logprobs
-                break
-
-        if score_logprobs is None:
+        tokens = token_logprobs.tokens
+        if raw_score not in tokens:
             return None
+        score_token_idx = tokens.index(raw_score)
 
         # Then, calculate the score based on the logprobs
-        token_linear_probability: Dict[int, float] = {1: 1e-3, 2: 1e-3, 3: 1e-3, 4: 1e-3, 5: 1e-3}
+        return compute_token_score_expected_value(token_logprobs, score_token_idx)
+    except Exception as e:
+        logger.exception("Failed to calculate weighted_summed_score for completion: %s: %s", completion, e)
+        return None
 
-        for token_logprob in score_logprobs.top_logprobs:
-            logprob = token_logprob.logprob
 
-            # Filter out non-decimal token or tokens outside the 1-5 range
-            if not token_logprob.token.isdecimal() or not (1 <= int(token_logprob.token) <= 5):
-                continue
+def compute_token_score_expected_value(
+    token_logprobs: TokenLogprobs, score_token_idx: int, strip_whitespace: bool = False
+) -> float:
+    """Calculates the expected value of a 1-5 score (see compute_score_expected_value) from the top logprobs of the
+    token at score_token_idx.
 
-            # Calculate the linear probability
-            linear_prob = math.exp(logprob)
-            token_score = int(token_logprob.token)
-            token_linear_probability[token_score] += linear_prob
+    With strip_whitespace, top tokens with surrounding whitespace (e.g. " 4", as JSON ratings may be tokenized with a
+    leading space) also count towards their score.
+    """
+    top_tokens = token_logprobs.top_tokens[score_token_idx]
+    top_probabilities = np.exp(token_logprobs.top_logprobs[score_token_idx].astype(np.float64))
 
-        sum_of_weighted_scores = 0.0
-        for score, prob in token_linear_probability.items():
-            sum_of_weighted_scores += (score - 1) * prob
+    # Filter out non-decimal tokens or tokens outside the 1-5 range
+    score_tokens = [token.strip() for token in top_tokens] if strip_whitespace else top_tokens
+    token_scores = np.array(
+        [int(token) if token.isdecimal() and 1 <= int(token) <= 5 else 0 for token in score_tokens], dtype=np.int64
+    )
+    valid = token_scores > 0
 
-        # Scale the sum of linear probability to 1
-        sum_linear_probability = sum(token_linear_probability.values())
-        weighted_summed_score = (sum_of_weighted_scores / sum_linear_probability) / 4.0
-        return weighted_summed_score
-    except Exception as e:
-        logger.exception("Failed to calculate weighted_summed_score for completion: %s: %s", completion, e)
-        return None
+    token_linear_probability = np.full(5, 1e-3)
+    np.add.at(token_linear_probability, token_scores[valid] - 1, top_probabilities[valid])
+
+    # Scale the sum of linear probability to 1
+    sum_of_weighted_scores = float(np.dot(np.arange(5), token_linear_probability))
+    return (sum_of_weighted_scores / float(token_linear_probability.sum())) / 4.0
 
 
 def get_choice_token_confidence(completion: Completion) -> float | None:
@@ -80,27 +80,32 @@ def get_choice_token_confidence(completion: Completion) -> float | None:
     if completion.template is None or completion.template.answer_choice_tokens is None:
         return None
 
-    completion_logprobs = completion.logprobs
+    token_logprobs = completion.logprobs
 
-    if completion_logprobs is None or completion_logprobs.content is None:
+    if token_logprobs is None:
         return None
 
     # define translator to remove punctuation from string
     translator = str.maketrans("", "", string.punctuation)
+    answer_choice_tokens = completion.template.answer_choice_tokens
+    answer_choices = [answer_choice_token.token.lower() for answer_choice_token in answer_choice_tokens]
 
-    # search in reverse order as the answer is most likely to be at the end
+    # the answer is most likely to be at the end, so the last token matching an answer choice is used
     # TODO: implement better logic instead of hardcoding all the tokens
-    for token_logprob in reversed(completion_logprobs.content):
-        preprocessed_token = token_logprob.token.strip().lower().translate(translator)
-        for answer_choice_token in completion.template.answer_choice_tokens:
-            if preprocessed_token == answer_choice_token.token.lower():
-                token_confidence = _logprob_to_probability(token_logprob.logprob)
-                if answer_choice_token.positive:
-                    return token_confidence
-                else:
-                    return 1 - token_confidence
-
-    return 0.5  # default score if token is not present in logprobs
+    preprocessed_tokens = np.array(
+        [token.strip().lower().translate(translator) for token in token_logprobs.tokens], dtype=object
+    )
+    matching_token_idxs = np.flatnonzero(np.isin(preprocessed_tokens, answer_choices))
+    if matching_token_idxs.size == 0:
+        return 0.5  # default score if token is not present in logprobs
+
+    token_idx = matching_token_idxs[-1]
+    answer_choice_token = answer_choice_tokens[answer_choices.index(preprocessed_tokens[token_idx])]
+    token_confidence = float(_logprob_to_probability(float(token_logprobs.logprobs[token_idx])))
+    if answer_choice_token.positive:
+        return token_confidence
+    else:
+        return 1 - token_confidence
 
 
 def get_parsed_answer_tokens_confidence(
@@ -108,19 +113,13 @@ def get_parsed_answer_tokens_confidence(
     parsed_answer_start_idx: int,
     parsed_answer_end_idx: int,
 ) -> float | None:
-    completion_logprobs = completion.logprobs
-    assert completion_logprobs is not None
-    assert completion_logprobs.content is not None
-
-    per_position_completion_list = [
-        completion for completion in completion_logprobs.content
-    ]  # get top logprobs for each token
-    if all(
-        completion.top_logprobs for completion in per_position_completion_list
-    ):  # if all top logprobs are returned correctly
+    token_logprobs = completion.logprobs
+    assert token_logprobs is not None
+
+    if token_logprobs.has_top_logprobs:  # if all top logprobs are returned correctly
         answer_token_confidence = _get_probability_of_generic_answer_tokens(
             completion.message,
-            per_position_completion_list,
+            token_logprobs,
             parsed_answer_start_idx,
             parsed_answer_end_idx,
         )
@@ -130,39 +129,45 @@ def get_parsed_answer_tokens_confidence(
 
 def _get_probability_of_generic_answer_tokens(
     message: str,
-    per_position_completion_list: List[ChatCompletionTokenLogprob],
+    token_logprobs: TokenLogprobs,
     parsed_answer_start_idx: int,
     parsed_answer_end_idx: int,
 ) -> float | None:
     if not message:  # if message is empty, then logprobs are not present
         return None
-    tokens = [completion.token for completion in per_position_completion_list]
-    top_logprobs_at_start_token_index = _find_token_index(tokens, parsed_answer_start_idx)
-    top_logprobs_at_end_token_index = _find_token_index(tokens, parsed_answer_end_idx - 1)
+    tokens = token_logprobs.tokens
+    top_logprobs_at_start_token_index = token_logprobs.find_token_index(parsed_answer_start_idx)
+    top_logprobs_at_end_token_index = token_logprobs.find_token_index(parsed_answer_end_idx - 1)
 
     # Calculate mean probability across all tokens from start to end index
-    probabilities = []
-    for i in range(top_logprobs_at_start_token_index, top_logprobs_at_end_token_index + 1):
-        probability = _logprob_to_probability(per_position_completion_list[i].logprob)
-        normalized_token = _get_normalized_token(per_position_completion_list[i].token)
-        if per_position_completion_list[i].top_logprobs:
-            for top_logprob in per_position_completion_list[i].top_logprobs:
-                if (
-                    _get_normalized_token(top_logprob.token) == normalized_token
-                    and top_logprob.token != per_position_completion_list[i].token
-                ):
-                    # also sum the logprobs if normalized tokens are the same
-                    # for example, these would all be the same: "yes.", "Yes.", "Yes!"
-                    probability += _logprob_to_probability(top_logprob.logprob)
-        probability = min(probability, 1.0)
-        probabilities.append(probability)
-    if probabilities:
-        return sum(probabilities) / len(probabilities)
-
-    return 0.5
-
-
+    span_idxs = np.arange(top_logprobs_at_start_token_index, top_logprobs_at_end_token_index + 1)
+    if span_idxs.size == 0:
+        return 0.5
+
+    span_tokens = np.array([tokens[idx] for idx in span_idxs], dtype=object)
+    normalized_span_tokens = np.array([_get_normalized_token(token) for token in span_tokens], dtype=object)
+    span_top_tokens = token_logprobs.top_tokens[span_idxs]
+    normalized_span_top_tokens = np.array(
+        [[_get_normalized_token(token) for token in row] for row in span_top_tokens], dtype=object
+    ).reshape(span_top_tokens.shape)
+
+    # also sum the logprobs of top tokens if normalized tokens are the same
+    # for example, these would all be the same: "yes.", "Yes.", "Yes!"
+    same_normalized_token = (normalized_span_top_tokens == normalized_span_tokens[:, None]) & (
+        span_top_tokens != span_tokens[:, None]
+    )
+    probabilities = _logprob_to_probability(token_logprobs.logprobs[span_idxs].astype(np.float64)) + np.where(
+        same_normalized_token, _logprob_to_probability(token_logprobs.top_logprobs[span_idxs].astype(np.float64)), 0.0
+    ).sum(axis=1)
+    return float(np.minimum(probabilities, 1.0).mean())
+
+
+@functools.lru_cache(maxsize=NORMALIZED_TOKEN_CACHE_SIZE)
 def _get_normalized_token(token_str: str) -> str:
+    """Returns the lowercased token without leading / trailing whitespace and punctuation.
+
+    Memoized, since the same tokens recur across the top logprob alternatives of every completion.
+    """
     start = 0
     for start in range(len(token_str)):
         if not token_str[start].isspace() and token_str[start] not in string.punctuation:
@@ -174,24 +179,11 @@ def _get_normalized_token(token_str: str) -> str:
     return token_str[start : end + 1].lower()
 
 
-def _find_token_index(tokens: List[str], string_index: int) -> int:
-    """Takes in a tokenized string and returns the index of the token that occurs at string_index of string created from joining the tokenized string together. Returns last index if string_index is out of bounds."""
-    index_count = 0
-    for idx, token in enumerate(tokens):
-        token_length = len(token)
-        if index_count + token_length > string_index:
-            return idx
-        index_count += token_length
-    return -1
-
-
 def compute_mean_message_confidence(completion: Completion) -> float:
     """Returns the mean confidence (probability) of all logprobs in the response message."""
-    completion_logprobs = completion.logprobs
-    assert completion_logprobs is not None
-    assert completion_logprobs.content is not None
+    token_logprobs = completion.logprobs
+    assert token_logprobs is not None
 
-    logprobs = [completion.logprob for completion in completion_logprobs.content]
-    mean_message_confidence = np.mean(_logprob_to_probability(logprobs))
+    mean_message_confidence = np.mean(_logprob_to_probability(token_logprobs.logprobs.astype(np.float64)))
 
     return float(mean_message_confidence)
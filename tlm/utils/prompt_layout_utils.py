@@ -0,0 +1,68 @@
+import functools
+from string import Formatter
+
+from tlm.config.presets import PromptLayout
+from tlm.templates.keywords import (
+    CONTEXT_PLACEHOLDER,
+    PROMPT_PLACEHOLDER,
+    QUERY_PLACEHOLDER,
+    QUESTION_PLACEHOLDER,
+)
+
+PROMPT_LAYOUT_CACHE_SIZE = 256
+
+# inputs that are the same for all calls of a request (e.g. all self reflection and semantic evaluation calls), with
+# the tag of their block at the start of PREFIX_CACHE prompts
+SHARED_INPUT_TAGS: dict[str, str] = {
+    PROMPT_PLACEHOLDER.strip("{}"): "user_request",
+    QUESTION_PLACEHOLDER.strip("{}"): "user_request",
+    QUERY_PLACEHOLDER.strip("{}"): "query",
+    CONTEXT_PLACEHOLDER.strip("{}"): "context",
+}
+
+_SHARED_INPUT_REFERENCE = "[given in <{tag}> at the start of this message]"
+
+
+def apply_prompt_layout(prompt_template: str, prompt_layout: PromptLayout) -> str:
+    """Returns the prompt template laid out for the prompt layout."""
+    if prompt_layout == PromptLayout.PREFIX_CACHE:
+        return get_prefix_cache_prompt_template(prompt_template)
+    return prompt_template
+
+
+@functools.lru_cache(maxsize=PROMPT_LAYOUT_CACHE_SIZE)
+def get_prefix_cache_prompt_template(prompt_template: str) -> str:
+    """Moves the inputs shared by the calls of a request to the start of a prompt template, so that the prompts of all
+    calls of the request (whatever their template) share them as a prefix that providers can cache.
+
+    The shared inputs are given once, in tagged blocks at the start of the prompt, and each of their places in the
+    template refers to its block instead. The rest of the template (instructions, per-call inputs such as the judged
+    response, and output format) is unchanged and keeps its order, so that the template reads and parses the same.
+    Templates without shared inputs are returned unchanged.
+    """
+    parsed_template = list(Formatter().parse(prompt_template))
+    shared_fields = list(dict.fromkeys(field for _, field, _, _ in parsed_template if field in SHARED_INPUT_TAGS))
+    if not shared_fields:
+        return prompt_template
+
+    shared_blocks = [
+        f"<{SHARED_INPUT_TAGS[field]}>\n{{{field}}}\n</{SHARED_INPUT_TAGS[field]}>\n\n" for field in shared_fields
+    ]
+
+    template_parts = []
+    for literal_text, field, format_spec, conversion in parsed_template:
+        template_parts.append(_escape_braces(literal_text))
+        if field is None:
+            continue
+        if field in SHARED_INPUT_TAGS:
+            template_parts.append(_SHARED_INPUT_REFERENCE.format(tag=SHARED_INPUT_TAGS[field]))
+        else:
+            conversion_suffix = f"!{conversion}" if conversion else ""
+            format_suffix = f":{format_spec}" if format_spec else ""
+            template_parts.append(f"{{{field}{conversion_suffix}{format_suffix}}}")
+
+    return "".join(shared_blocks) + "".join(template_parts)
+
+
+def _escape_braces(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
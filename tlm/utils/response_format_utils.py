@@ -1,20 +1,30 @@
 from typing import Any, Dict
 from pydantic import BaseModel, Field, create_model
-import json
+from openai.lib._parsing._completions import type_to_response_format_param
+import functools
 import copy
-import ast
-from tlm.types import CompletionParams
+from tlm.types import CompletionParams, CompletionTemplate
 from tlm.config.defaults import get_settings
+from tlm.utils.cache_utils import LRUCache
+from tlm.utils.json_utils import parse_json_object
 
 settings = get_settings()
 
+RESPONSE_FORMAT_CACHE_SIZE = 256
+
+# models are cached in a 1-tuple, so that a None model (no response format) is also a cache hit
+_response_format_model_cache: LRUCache[Any, tuple[type[BaseModel] | None]] = LRUCache(
+    max_size=RESPONSE_FORMAT_CACHE_SIZE
+)
+
 
 def add_explanation_to_response_format(completion_params: CompletionParams) -> CompletionParams | None:
     if "response_format" not in completion_params:
         return None
 
-    modified_params = copy.deepcopy(completion_params)
-    json_schema = add_explanation_field(modified_params["response_format"])
+    # only the response format is modified in place (by add_explanation_field), the rest can be shared
+    modified_params = dict(completion_params)
+    json_schema = add_explanation_field(copy.deepcopy(completion_params["response_format"]))
     modified_params["response_format"] = json_schema
 
     modified_params["logprobs"] = True
@@ -55,10 +65,38 @@ def add_explanation_field(schema: Dict[str, Any]) -> Dict[str, Any]:
 def construct_per_field_response_format_model(
     reference_answer: str, per_field_score_response_format: type[BaseModel]
 ) -> type[BaseModel]:
-    try:
-        answer_keys = json.loads(reference_answer).keys()
-    except Exception:
-        answer_keys = ast.literal_eval(reference_answer).keys()
+    answer_keys = parse_json_object(reference_answer).keys()
 
     fields = {key: (per_field_score_response_format, Field(...)) for key in answer_keys}
     return create_model(per_field_score_response_format.__name__, **fields)  # type:ignore
+
+
+def get_response_format_model(template_cls: type[CompletionTemplate], response_json: str) -> type[BaseModel] | None:
+    """Returns `template_cls.construct_response_format(response_json)`, memoized on the template class and the
+    top-level keys of the response (the only part of the response the constructed schemas depend on).
+    """
+    if template_cls.construct_response_format.__func__ is CompletionTemplate.construct_response_format.__func__:  # type: ignore[attr-defined]
+        return None
+
+    try:
+        schema_key = _get_top_level_keys(response_json)
+    except ValueError:
+        return template_cls.construct_response_format(response_json)
+
+    (response_format_model,) = _response_format_model_cache.get_or_create(
+        (template_cls, schema_key), lambda: (template_cls.construct_response_format(response_json),)
+    )
+    return response_format_model
+
+
+@functools.lru_cache(maxsize=RESPONSE_FORMAT_CACHE_SIZE)
+def get_response_format_param(response_format_model: type) -> Dict[str, Any]:
+    """Returns the (strict) JSON schema response format for a Pydantic model (or dataclass), memoized on the class.
+
+    The returned dict is shared between calls and must not be mutated.
+    """
+    return type_to_response_format_param(response_format_model)  # type: ignore[return-value]
+
+
+def _get_top_level_keys(response_json: str) -> tuple[str, ...]:
+    return tuple(parse_json_object(response_json).keys())
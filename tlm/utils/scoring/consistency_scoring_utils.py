@@ -11,12 +11,14 @@ from tlm.templates.llm_consistency_completion_templates import (
     CodeConsistencyCompletionTemplate,
     StatementConsistencyCompletionTemplate,
 )
+from tlm.templates.template_cache import get_cached_template
 from tlm.utils.errors import LLMConsistencyInferenceError
 from tlm.utils.math_utils import compute_cosine_similarity, get_median_indices, get_nan_safe_mean
 from tlm.utils.openai_utils import get_openai_client, get_text_embedding
-from tlm.utils.scoring.jaccard_utils import jaccard_similarity
+from tlm.utils.scoring.jaccard_utils import get_structured_output_keys, jaccard_similarity
 from tlm.utils.scoring.llm_consistency_scoring_utils import get_llm_consistency_scores
 from tlm.utils.scoring.indicator_scoring_utils import compute_indicator_scores
+from tlm.utils.scoring.structured_similarity_utils import compute_structured_similarity_scores
 from tlm.types import SimilarityMeasure
 
 REFERENCE_COLUMN_NAME = "reference"
@@ -43,6 +45,32 @@ async def compute_consistency_scores(
     return await _compute_scores_qa(reference_answers, comparison_answers, similarity_measure, structured_outputs)
 
 
+def compute_structured_consistency_scores(
+    reference_answers: list[str],
+    comparison_answers: list[str],
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64], dict[str, npt.NDArray[np.float64]]]:
+    """Generates consistency scores for structured outputs with the STRUCTURED similarity measure.
+
+    Returns array of average scores for each reference answer, flattened array of all scores in row-major order by
+    reference answer, and array of average scores for each reference answer per top-level field of the responses.
+    """
+    scores, field_scores = compute_structured_similarity_scores(reference_answers, comparison_answers)
+    average_field_scores = {}
+    for field, field_score in field_scores.items():
+        # a field may be missing from all comparisons of a reference answer
+        num_scores = np.sum(~np.isnan(field_score), axis=1)
+        average_field_scores[field] = np.where(
+            num_scores > 0, np.nansum(field_score, axis=1) / np.maximum(num_scores, 1), np.nan
+        )
+    return (
+        get_nan_safe_mean(
+            scores.reshape((len(reference_answers), -1)), axis=1, expected_array_length=len(reference_answers)
+        ),
+        scores,
+        average_field_scores,
+    )
+
+
 def compute_consistency_scores_classification(
     reference_answers: list[str],
     comparison_answers: list[str],
@@ -136,6 +164,8 @@ async def _compute_scores_qa(
 ) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
     if similarity_measure == SimilarityMeasure.JACCARD:
         scores = _compute_jaccard_similarity_scores(reference_answers, comparison_answers, structured_outputs)
+    elif similarity_measure == SimilarityMeasure.STRUCTURED:
+        scores, _ = compute_structured_similarity_scores(reference_answers, comparison_answers)
     elif similarity_measure in [SimilarityMeasure.EMBEDDING_SMALL, SimilarityMeasure.EMBEDDING_LARGE]:
         embedding_model = EMBEDDING_MODELS[similarity_measure]
         scores = await _compute_embedding_similarity_scores(reference_answers, comparison_answers, embedding_model)
@@ -165,9 +195,15 @@ def _compute_jaccard_similarity_scores(
     reference_answers: list[str], comparison_answers: list[str], structured_outputs: bool = False
 ) -> npt.NDArray[np.float64]:
     comparison_pairs = _get_comparison_pairs(reference_answers, comparison_answers)
+    # the JSON keys of each reference answer are parsed once, not once per pair
+    structure_keys = (
+        {reference: get_structured_output_keys(reference) for reference in reference_answers}
+        if structured_outputs
+        else {}
+    )
     return np.array(
         [
-            jaccard_similarity(reference, comparison, structured_outputs)
+            jaccard_similarity(reference, comparison, structured_outputs, structure_keys.get(reference))
             for reference, comparison in comparison_pairs.itertuples(index=False)
         ]
     )
@@ -223,7 +259,7 @@ async def _compute_code_similarity_scores(
             non_identical_llm_consistency_scores: npt.NDArray[np.float64] = await get_llm_consistency_scores(
                 np.array(reference_answers)[~is_identical_mask].tolist(),
                 np.array(comparison_answers_subset)[~is_identical_mask].tolist(),
-                CodeConsistencyCompletionTemplate.create(),
+                get_cached_template(CodeConsistencyCompletionTemplate),
             )
             llm_consistency_scores[~is_identical_mask] = non_identical_llm_consistency_scores
 
@@ -251,7 +287,7 @@ async def _compute_statement_similarity_scores(
     discrepancy_scores = await get_llm_consistency_scores(
         reference_answers,
         comparison_answers,
-        StatementConsistencyCompletionTemplate.create(),
+        get_cached_template(StatementConsistencyCompletionTemplate),
     )
 
     try:
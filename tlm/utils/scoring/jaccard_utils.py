@@ -1,7 +1,8 @@
-import ast
 import re
 from typing import Any, List, Set
 
+from tlm.utils.json_utils import parse_json
+
 
 def extract_words(string: str) -> List[str]:
     """Extract words from string, with punctuation removed."""
@@ -12,6 +13,7 @@ def jaccard_similarity(
     answer: str,
     comparison: str,
     structured_outputs: bool = False,
+    structure_keys: Set[str] | None = None,
 ) -> float:
     """Computes jaccard similarity between two strings.
 
@@ -20,13 +22,16 @@ def jaccard_similarity(
     I = length of the intersection
     U = length of the union
     S = length of the JSON keys / "structured" part
+
+    structure_keys are the JSON keys of the answer (see get_structured_output_keys), computed if not given.
     """
 
     answer_words = set(extract_words(answer))
     comparison_words = set(extract_words(comparison))
 
     if structured_outputs:
-        structure_keys = get_structured_output_keys(answer)
+        if structure_keys is None:
+            structure_keys = get_structured_output_keys(answer)
 
         return float(
             max(0, len(answer_words.intersection(comparison_words)) - len(structure_keys))
@@ -37,11 +42,7 @@ def jaccard_similarity(
 
 
 def get_structured_output_keys(answer: str) -> Set[str]:
-    try:
-        answer_dict = ast.literal_eval(answer)
-        return get_all_keys(answer_dict)
-    except Exception:
-        return set()
+    return get_all_keys(parse_json(answer))
 
 
 def get_all_keys(d: Any) -> Set[str]:
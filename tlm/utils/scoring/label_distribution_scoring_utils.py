@@ -0,0 +1,107 @@
+import math
+
+import numpy as np
+import numpy.typing as npt
+
+from tlm.types import Completion, CompletionFailure, ExtractedResponseField
+from tlm.utils.parse_utils import _get_normalized_token
+
+# probability assigned to labels that do not appear in the top logprobs
+LABEL_PROBABILITY_FLOOR = 1e-3
+
+
+def get_label_distribution(
+    completion: Completion | CompletionFailure, constrain_outputs: list[str]
+) -> npt.NDArray[np.float64] | None:
+    """Returns the probability of each label in constrain_outputs, computed from the top logprobs of the first token
+    of the generated label. Returns None if the completion has no top logprobs at the label position.
+
+    Each top logprob token is attributed to the labels that start with it. If a token starts several labels
+    (e.g. "very positive" and "very negative"), the generated label gets the share given by the probability of its
+    remaining tokens and the other labels split the rest evenly.
+    The distribution is not normalized: its sum is the probability mass that fell on the labels.
+    """
+    if isinstance(completion, CompletionFailure) or completion.logprobs is None or len(completion.logprobs) == 0:
+        return None
+
+    answer = completion.response_fields.get(ExtractedResponseField.ANSWER)
+    if answer is None or answer not in constrain_outputs:
+        return None
+
+    token_logprobs = completion.logprobs
+    tokens = token_logprobs.tokens
+    answer_start_idx = token_logprobs.text.lower().rfind(answer.lower())
+    if answer_start_idx < 0:
+        return None
+
+    first_token_idx = token_logprobs.find_token_index(answer_start_idx)
+    last_token_idx = token_logprobs.find_token_index(answer_start_idx + len(answer) - 1)
+    num_top_logprobs = int(token_logprobs.num_top_logprobs[first_token_idx])
+    if num_top_logprobs == 0:
+        return None
+
+    normalized_labels = [_get_normalized_token(label) for label in constrain_outputs]
+    answer_label_idx = constrain_outputs.index(answer)
+    generated_token = _get_normalized_token(tokens[first_token_idx])
+    continuation_probability = math.exp(float(token_logprobs.logprobs[first_token_idx + 1 : last_token_idx + 1].sum()))
+
+    top_logprobs = dict(
+        zip(
+            token_logprobs.top_tokens[first_token_idx, :num_top_logprobs].tolist(),
+            token_logprobs.top_logprobs[first_token_idx, :num_top_logprobs].tolist(),
+            strict=True,
+        )
+    )
+    top_logprobs.setdefault(tokens[first_token_idx], float(token_logprobs.logprobs[first_token_idx]))
+
+    label_probabilities = np.zeros(len(constrain_outputs), dtype=np.float64)
+    for token, logprob in top_logprobs.items():
+        normalized_token = _get_normalized_token(token)
+        if not normalized_token:
+            continue
+        matching_label_idxs = [
+            idx
+            for idx, normalized_label in enumerate(normalized_labels)
+            if normalized_label.startswith(normalized_token)
+        ]
+        if not matching_label_idxs:
+            continue
+
+        probability = math.exp(logprob)
+        if (
+            normalized_token == generated_token
+            and answer_label_idx in matching_label_idxs
+            and len(matching_label_idxs) > 1
+        ):
+            label_probabilities[answer_label_idx] += probability * continuation_probability
+            other_label_idxs = [idx for idx in matching_label_idxs if idx != answer_label_idx]
+            label_probabilities[other_label_idxs] += (
+                probability * (1 - continuation_probability) / len(other_label_idxs)
+            )
+        else:
+            label_probabilities[matching_label_idxs] += probability / len(matching_label_idxs)
+
+    return np.maximum(np.minimum(label_probabilities, 1.0), LABEL_PROBABILITY_FLOOR)
+
+
+def get_calibrated_label_score(label_distribution: npt.NDArray[np.float64], label_idx: int) -> float:
+    """Returns the calibrated probability that the label at label_idx is correct.
+
+    The distribution is normalized over the labels, then shrunk towards the uniform distribution by the probability
+    mass that fell outside the labels (the model was unsure whether to answer with a label at all).
+    """
+    num_labels = len(label_distribution)
+    label_mass = min(float(label_distribution.sum()), 1.0)
+    normalized_probability = float(label_distribution[label_idx] / label_distribution.sum())
+    return label_mass * normalized_probability + (1 - label_mass) / num_labels
+
+
+def match_label(answer: str, constrain_outputs: list[str]) -> int | None:
+    """Returns the index of the label in constrain_outputs that matches the answer (ignoring case and surrounding
+    whitespace / punctuation), or None if no label matches.
+    """
+    normalized_answer = _get_normalized_token(answer)
+    for idx, label in enumerate(constrain_outputs):
+        if _get_normalized_token(label) == normalized_answer:
+            return idx
+    return None
@@ -1,9 +1,16 @@
 import json
 import numpy as np
-from typing import Callable
-import ast
-from tlm.types import FieldMetadata, Completion, SOReflectionScoreConfigType
-from tlm.utils.math_utils import make_score_asymptotic
+from typing import Any, Callable
+from tlm.types import (
+    FieldMetadata,
+    Completion,
+    CompletionFailure,
+    CompletionUsage,
+    ExtractedResponseField,
+    SOReflectionScoreConfigType,
+)
+from tlm.utils.json_utils import parse_json, parse_json_object
+from tlm.utils.math_utils import harmonic_mean, make_score_asymptotic
 from tlm.config.presets import (
     STRUCTURED_OUTPUT_CORRECT_FIELD_SCORE,
     STRUCTURED_OUTPUT_INCORRECT_FIELD_SCORE,
@@ -11,12 +18,10 @@ from tlm.config.presets import (
 
 
 def extract_per_field_reflection_metadata(
-    answer: str,
+    answer_json: dict[str, Any],
     per_field_score_key: str,
     score_mapping: Callable[[str], float],
 ) -> dict[str, FieldMetadata]:
-    answer_json = json.loads(answer)
-
     per_field_metadata = {}
 
     for field_name, field_data in answer_json.items():
@@ -33,18 +38,13 @@ def extract_per_field_reflection_metadata(
 
 
 def extract_incorrect_fields_reflection_metadata(
-    answer: str,
+    answer_json: dict[str, Any],
     reference_answer: str,
 ) -> dict[str, FieldMetadata]:
-    answer_json = json.loads(answer)
-
     incorrect_fields_list = answer_json["incorrect_fields"]
     incorrect_field_names_and_explanations = {item["field_name"]: item["explanation"] for item in incorrect_fields_list}
 
-    try:
-        field_names = json.loads(reference_answer).keys()
-    except Exception:
-        field_names = ast.literal_eval(reference_answer).keys()
+    field_names = parse_json_object(reference_answer).keys()
 
     per_field_metadata = {}
 
@@ -61,22 +61,102 @@ def extract_incorrect_fields_reflection_metadata(
     return per_field_metadata
 
 
+def split_fields_into_chunks(answer: str, chunk_size: int) -> list[str] | None:
+    """Splits a structured output answer into JSON objects of at most chunk_size top-level fields each, in field order.
+
+    Returns None if the answer is not a JSON object with more than chunk_size fields.
+    """
+    answer_json = parse_json(answer)
+    if not isinstance(answer_json, dict) or len(answer_json) <= chunk_size:
+        return None
+
+    fields = list(answer_json.items())
+    return [
+        json.dumps(dict(fields[idx : idx + chunk_size]), ensure_ascii=False, default=str)
+        for idx in range(0, len(fields), chunk_size)
+    ]
+
+
+def merge_field_chunk_completions(
+    chunk_completions: list[Completion | CompletionFailure],
+) -> Completion | CompletionFailure:
+    """Merges the completions of a per-field self reflection template run on chunks of the response fields into a
+    single completion for the template, as if all fields had been judged in one call.
+
+    The per-field metadata of the chunks is combined. The overall score is the harmonic mean of the field scores for
+    per-field templates (the same as an unchunked completion), and of the chunk scores for incorrect-fields templates.
+    Failed chunks are left out, so their fields have no metadata; if all chunks failed, the first failure is returned.
+    """
+    completions = [
+        completion
+        for completion in chunk_completions
+        if isinstance(completion, Completion) and completion.per_field_metadata is not None
+    ]
+    if not completions:
+        return next(
+            (completion for completion in chunk_completions if isinstance(completion, CompletionFailure)),
+            chunk_completions[0],
+        )
+
+    template = completions[0].template
+    per_field_metadata = {
+        field_name: metadata
+        for completion in completions
+        for field_name, metadata in (completion.per_field_metadata or {}).items()
+    }
+    usages = [completion.usage for completion in completions if completion.usage is not None]
+
+    merged_completion = Completion(
+        message="\n".join(completion.message for completion in completions),
+        usage=CompletionUsage(
+            prompt_tokens=sum(usage.prompt_tokens for usage in usages),
+            completion_tokens=sum(usage.completion_tokens for usage in usages),
+            total_tokens=sum(usage.total_tokens for usage in usages),
+            cached_prompt_tokens=sum(usage.cached_prompt_tokens or 0 for usage in usages)
+            if any(usage.cached_prompt_tokens is not None for usage in usages)
+            else None,
+        )
+        if usages
+        else None,
+        per_field_metadata=per_field_metadata,
+        original_response={"chunks": [completion.original_response for completion in completions]},
+        template=template,
+    )
+
+    if template is not None and template.so_reflection_score_config_type == SOReflectionScoreConfigType.PER_FIELD:
+        overall_score = harmonic_mean([metadata.score for metadata in per_field_metadata.values()])
+    else:
+        overall_score = harmonic_mean(
+            [
+                score
+                for completion in completions
+                if (score := completion.response_fields.get(ExtractedResponseField.MAPPED_SCORE)) is not None
+            ]
+        )
+    merged_completion.add_response_field(ExtractedResponseField.MAPPED_SCORE, overall_score)
+
+    return merged_completion
+
+
 def compute_field_metadata(
     completion_metadata: list[dict[str, FieldMetadata]],
     scoring_data: list[Completion] | None = None,
 ) -> dict[str, FieldMetadata]:
     score_data: dict[str, dict[str, list]] = {}
 
-    for metadata_per_field in completion_metadata:
+    for completion_idx, metadata_per_field in enumerate(completion_metadata):
+        is_incorrect_fields_template = (
+            scoring_data is not None
+            and completion_idx < len(scoring_data)
+            and (template := scoring_data[completion_idx].template) is not None
+            and template.so_reflection_score_config_type == SOReflectionScoreConfigType.INCORRECT_FIELDS
+        )
         for field_name, metadata in metadata_per_field.items():
             if field_name not in score_data:
-                score_data[field_name] = {
-                    "scores": [metadata.score],
-                    "explanations": [metadata.explanation],
-                }
-            else:
-                score_data[field_name]["scores"].append(metadata.score)
-                score_data[field_name]["explanations"].append(metadata.explanation)
+                score_data[field_name] = {"scores": [], "explanations": [], "incorrect_fields_templates": []}
+            score_data[field_name]["scores"].append(metadata.score)
+            score_data[field_name]["explanations"].append(metadata.explanation)
+            score_data[field_name]["incorrect_fields_templates"].append(is_incorrect_fields_template)
 
     composite_metadata = {}
     for field_name, data in score_data.items():
@@ -100,13 +180,10 @@ def compute_field_metadata(
         avg_score = float(np.mean(all_scores))
 
         if scoring_data is not None and len(scoring_data) > 0:
-            num_total_templates = len(scoring_data)
-
-            num_incorrect_fields_templates = sum(
-                completion.template is not None
-                and completion.template.so_reflection_score_config_type == SOReflectionScoreConfigType.INCORRECT_FIELDS
-                for completion in scoring_data
-            )
+            # the score range depends on the templates that judged this field, which may not be all of them
+            # (e.g. when a chunk of fields failed in chunked per-field self reflection)
+            num_total_templates = len(data["incorrect_fields_templates"])
+            num_incorrect_fields_templates = sum(data["incorrect_fields_templates"])
 
             num_non_incorrect_fields_templates = num_total_templates - num_incorrect_fields_templates
 
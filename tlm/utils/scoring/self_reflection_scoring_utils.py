@@ -43,6 +43,31 @@ def generate_self_reflection_scores(
     )
 
 
+def self_reflections_agree(
+    self_reflection_completions: Sequence[Completion | CompletionFailure],
+    agreement_margin: float,
+) -> bool:
+    """Returns True if all self reflection scores are within agreement_margin of 0, or all within agreement_margin of 1.
+
+    Failed or unparseable completions never agree.
+    """
+    if not self_reflection_completions:
+        return False
+
+    scores = np.array(
+        [
+            _generate_self_reflection_score(reflection_completion)
+            if isinstance(reflection_completion, Completion)
+            else np.nan
+            for reflection_completion in self_reflection_completions
+        ]
+    )
+    if np.isnan(scores).any():
+        return False
+
+    return bool((scores <= agreement_margin).all() or (scores >= 1 - agreement_margin).all())
+
+
 def _generate_self_reflection_score(
     reflection_completion: Completion | CompletionFailure,
 ) -> float:
@@ -1,8 +1,13 @@
+import json
+import re
+
 import numpy as np
+import numpy.typing as npt
 
+from tlm.templates.score_mapping import score_5_mapping
 from tlm.utils.math_utils import get_nan_safe_mean, make_score_asymptotic
-from tlm.types import Completion, CompletionFailure, ExtractedResponseField, Eval
-from tlm.utils.parse_utils import compute_score_expected_value
+from tlm.types import Completion, CompletionFailure, ExtractedResponseField, Eval, TokenLogprobs
+from tlm.utils.parse_utils import compute_score_expected_value, compute_token_score_expected_value
 
 
 _DEFAULT_EVALS_DICT: list[dict[str, str | None]] = [
@@ -42,6 +47,8 @@ Should an AI Assistant be able to properly answer the User Request, it is consid
     },
 ]
 
+_RATING_VALUE_PATTERN = re.compile(r'"rating"\s*:\s*"?\s*([1-5])\b')
+
 DEFAULT_RAG_EVALS = [Eval(**eval_dict) for eval_dict in _DEFAULT_EVALS_DICT]  # type: ignore
 
 
@@ -55,8 +62,20 @@ def compute_semantic_evaluation_scores(
     If reference answers are not provided, the evaluations did not require the response.
     Returns a list of scores, one for each eval, in the same order as the input.
     """
-    raw_scores = np.vectorize(_get_score_from_semantic_eval_completion)(semantic_evaluation_completions)
+    raw_scores = np.vectorize(get_semantic_evaluation_score)(semantic_evaluation_completions)
+    return aggregate_semantic_evaluation_scores(reference_answers, evals, raw_scores)
 
+
+def aggregate_semantic_evaluation_scores(
+    reference_answers: list[str | None],
+    evals: list[Eval],
+    raw_scores: npt.NDArray[np.float64],
+) -> dict[str, float]:
+    """
+    Averages the raw scores of each eval over the reference answers.
+    raw_scores holds one score per (reference answer, eval) pair, ordered by reference answer then eval (NaN if the
+    score could not be computed).
+    """
     if not reference_answers or len(reference_answers) == 1:
         # can map directly
         scores_array = raw_scores
@@ -71,7 +90,7 @@ def compute_semantic_evaluation_scores(
     return eval_scores
 
 
-def _get_score_from_semantic_eval_completion(
+def get_semantic_evaluation_score(
     completion: Completion | CompletionFailure,
 ) -> float:
     """Generate semantic eval score for a given reference answer and eval."""
@@ -82,7 +101,84 @@ def _get_score_from_semantic_eval_completion(
         if (weighted_score := compute_score_expected_value(completion, raw_score)) is not None:
             return weighted_score
 
-    if mapped_score := completion.response_fields.get(ExtractedResponseField.MAPPED_SCORE):
+    if (mapped_score := completion.response_fields.get(ExtractedResponseField.MAPPED_SCORE)) is not None:
         return mapped_score
 
     return np.nan
+
+
+def get_batched_semantic_evaluation_scores(
+    completion: Completion | CompletionFailure,
+    evals: list[Eval],
+) -> list[float]:
+    """Returns the score of each eval rated by a batched semantic evaluation completion, NaN for the evals whose rating
+    is missing or invalid in the JSON response (or for all evals if the completion failed).
+
+    Like single eval ratings, each rating is scored by the expected value of the top logprobs of its rating token if
+    available, and mapped from the rating otherwise.
+    """
+    if isinstance(completion, CompletionFailure):
+        return [np.nan] * len(evals)
+
+    parsed_response = completion.get_parsed_json()
+    if not isinstance(parsed_response, dict):
+        return [np.nan] * len(evals)
+
+    rating_token_idxs = _find_rating_token_idxs(completion.logprobs, evals)
+    return [
+        _get_score_from_eval_rating(parsed_response.get(eval.name), completion.logprobs, rating_token_idx)
+        for eval, rating_token_idx in zip(evals, rating_token_idxs, strict=True)
+    ]
+
+
+def _find_rating_token_idxs(token_logprobs: TokenLogprobs | None, evals: list[Eval]) -> list[int | None]:
+    """Returns the index of the rating token of each eval in the JSON response, None if it cannot be located or has no
+    top logprobs.
+
+    The rating of an eval is the first "rating" value after the eval's key, before the key of the next eval.
+    """
+    if token_logprobs is None or not token_logprobs.has_top_logprobs:
+        return [None] * len(evals)
+
+    text = token_logprobs.text
+    key_positions = [
+        match.start()
+        if (match := re.search(re.escape(json.dumps(eval.name, ensure_ascii=False)) + r"\s*:", text))
+        else -1
+        for eval in evals
+    ]
+
+    rating_token_idxs: list[int | None] = []
+    for key_position in key_positions:
+        rating_match = (
+            _RATING_VALUE_PATTERN.search(
+                text,
+                key_position,
+                min((position for position in key_positions if position > key_position), default=len(text)),
+            )
+            if key_position >= 0
+            else None
+        )
+        if rating_match is None:
+            rating_token_idxs.append(None)
+            continue
+
+        rating_token_idx = token_logprobs.find_token_index(rating_match.start(1))
+        # the rating digit must be a token of its own for its top logprobs to be the rating probabilities
+        rating_token_idxs.append(
+            rating_token_idx if token_logprobs.tokens[rating_token_idx].strip() == rating_match.group(1) else None
+        )
+    return rating_token_idxs
+
+
+def _get_score_from_eval_rating(
+    eval_rating: object, token_logprobs: TokenLogprobs | None, rating_token_idx: int | None
+) -> float:
+    rating = eval_rating.get("rating") if isinstance(eval_rating, dict) else None
+    if isinstance(rating, str) and rating.strip().isdigit():
+        rating = int(rating.strip())
+    if isinstance(rating, bool) or not isinstance(rating, int) or not 1 <= rating <= 5:
+        return np.nan
+    if token_logprobs is not None and rating_token_idx is not None:
+        return compute_token_score_expected_value(token_logprobs, rating_token_idx, strip_whitespace=True)
+    return score_5_mapping(str(rating))
@@ -0,0 +1,227 @@
+import json
+from collections.abc import Hashable
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from tlm.utils.json_utils import parse_json
+from tlm.utils.scoring.jaccard_utils import extract_words, jaccard_similarity
+
+# numbers within this relative difference of each other are considered equal
+NUMERIC_RELATIVE_TOLERANCE = 1e-2
+
+# kinds of leaf values
+_MISSING = 0
+_NUMBER = 1
+_TEXT = 2
+_ARRAY = 3
+_OTHER = 4
+
+LeafPath = tuple[str, ...]
+
+
+def compute_structured_similarity_scores(
+    reference_answers: list[str], comparison_answers: list[str]
+) -> tuple[npt.NDArray[np.float64], dict[str, npt.NDArray[np.float64]]]:
+    """Computes the similarity of each (reference, comparison) pair of structured output answers, comparing the parsed
+    JSON objects leaf by leaf:
+    - numbers are equal if they are within NUMERIC_RELATIVE_TOLERANCE of each other
+    - strings are compared by the Jaccard similarity of their words
+    - arrays are compared by the Jaccard similarity of their sets of elements
+    - other values (booleans, null) must be equal
+    A leaf that is missing in one of the answers (or of a different kind) has similarity 0.
+
+    All N x M pairs are compared at once per leaf. Pairs where either answer is not a JSON object fall back to the
+    Jaccard similarity of the raw strings.
+
+    Returns the similarity of each pair, flattened in row-major order by reference answer (the mean over the leaves
+    of both answers), and the (N, M) similarity of the pairs for each top-level field (the mean over its leaves).
+    """
+    num_references = len(reference_answers)
+    num_comparisons = len(comparison_answers)
+    answer_leaves = [_get_leaves(parse_json(answer)) for answer in [*reference_answers, *comparison_answers]]
+
+    paths = sorted({path for leaves in answer_leaves if leaves is not None for path in leaves})
+    leaf_similarities = _compute_leaf_similarities(paths, answer_leaves, num_references)
+
+    compared_leaves = ~np.isnan(leaf_similarities)
+    leaf_similarities_or_zero = np.where(compared_leaves, leaf_similarities, 0.0)
+    num_compared_leaves = compared_leaves.sum(axis=0)
+    # two empty objects are identical
+    scores = np.where(
+        num_compared_leaves > 0, leaf_similarities_or_zero.sum(axis=0) / np.maximum(num_compared_leaves, 1), 1.0
+    )
+
+    # paths are sorted, so the leaves of each top-level field are contiguous
+    fields = [path[0] for path in paths]
+    field_starts = [idx for idx, field in enumerate(fields) if idx == 0 or field != fields[idx - 1]]
+    field_scores: dict[str, npt.NDArray[np.float64]] = {}
+    if field_starts:
+        num_compared_field_leaves = np.add.reduceat(compared_leaves.astype(np.int64), field_starts, axis=0)
+        field_similarity_sums = np.add.reduceat(leaf_similarities_or_zero, field_starts, axis=0)
+        field_means = np.where(
+            num_compared_field_leaves > 0, field_similarity_sums / np.maximum(num_compared_field_leaves, 1), np.nan
+        )
+        field_scores = {fields[start]: field_mean for start, field_mean in zip(field_starts, field_means, strict=True)}
+
+    for reference_idx, reference_leaves in enumerate(answer_leaves[:num_references]):
+        for comparison_idx, comparison_leaves in enumerate(answer_leaves[num_references:]):
+            if reference_leaves is None or comparison_leaves is None:
+                scores[reference_idx, comparison_idx] = jaccard_similarity(
+                    reference_answers[reference_idx], comparison_answers[comparison_idx], structured_outputs=True
+                )
+                for field_score in field_scores.values():
+                    field_score[reference_idx, comparison_idx] = np.nan
+
+    return scores.reshape(num_references * num_comparisons), field_scores
+
+
+def _compute_leaf_similarities(
+    paths: list[LeafPath], answer_leaves: list[dict[LeafPath, Any] | None], num_references: int
+) -> npt.NDArray[np.float64]:
+    """Returns the (P, N, M) similarity of each leaf path for each pair of answers, NaN if the path is missing in both
+    answers of the pair.
+    """
+    num_paths = len(paths)
+    num_answers = len(answer_leaves)
+    path_idxs = {path: path_idx for path_idx, path in enumerate(paths)}
+    kinds = np.full((num_paths, num_answers), _MISSING, dtype=np.int8)
+    numbers = np.full((num_paths, num_answers), np.nan, dtype=np.float64)
+    value_ids = np.full((num_paths, num_answers), -1, dtype=np.int64)
+
+    # leaves are collected in flat lists and written to the (P, N + M) arrays at once
+    leaf_path_idxs: list[int] = []
+    leaf_answer_idxs: list[int] = []
+    leaf_kinds: list[int] = []
+    leaf_value_ids: list[int] = []
+    number_path_idxs: list[int] = []
+    number_answer_idxs: list[int] = []
+    number_values: list[float] = []
+    # kind, id and tokens of each distinct leaf value, computed once since most values repeat across answers
+    value_infos: dict[Hashable, tuple[int, int, tuple[Hashable, ...]]] = {}
+    # the words of strings and elements of arrays, as (path index, token) columns of a membership matrix
+    token_columns: dict[tuple[int, Hashable], int] = {}
+    membership_rows: list[int] = []
+    membership_columns: list[int] = []
+    for answer_idx, leaves in enumerate(answer_leaves):
+        for path, value in (leaves or {}).items():
+            path_idx = path_idxs[path]
+            value_key = _get_value_key(value)
+            value_info = value_infos.get(value_key)
+            if value_info is None:
+                kind, tokens = _get_leaf_kind(value)
+                value_info = value_infos[value_key] = (kind, len(value_infos), tuple(tokens or ()))
+            kind, value_id, tokens = value_info
+            leaf_path_idxs.append(path_idx)
+            leaf_answer_idxs.append(answer_idx)
+            leaf_kinds.append(kind)
+            leaf_value_ids.append(value_id)
+            if kind == _NUMBER:
+                number_path_idxs.append(path_idx)
+                number_answer_idxs.append(answer_idx)
+                number_values.append(value)
+            for token in tokens:
+                membership_rows.append(answer_idx)
+                membership_columns.append(token_columns.setdefault((path_idx, token), len(token_columns)))
+
+    kinds[leaf_path_idxs, leaf_answer_idxs] = leaf_kinds
+    value_ids[leaf_path_idxs, leaf_answer_idxs] = leaf_value_ids
+    numbers[number_path_idxs, number_answer_idxs] = number_values
+
+    reference_slice, comparison_slice = slice(0, num_references), slice(num_references, num_answers)
+    reference_kinds = kinds[:, reference_slice, None]
+    comparison_kinds = kinds[:, None, comparison_slice]
+
+    similarities = (value_ids[:, reference_slice, None] == value_ids[:, None, comparison_slice]).astype(np.float64)
+    with np.errstate(invalid="ignore"):
+        numbers_close = np.isclose(
+            numbers[:, reference_slice, None],
+            numbers[:, None, comparison_slice],
+            rtol=NUMERIC_RELATIVE_TOLERANCE,
+            atol=0.0,
+        )
+    similarities = np.where(reference_kinds == _NUMBER, numbers_close, similarities)
+
+    if token_columns:
+        memberships = np.zeros((num_answers, len(token_columns)), dtype=np.float64)
+        memberships[membership_rows, membership_columns] = 1.0
+        column_paths = np.fromiter(
+            (path_idx for path_idx, _ in token_columns), dtype=np.int64, count=len(token_columns)
+        )
+        set_paths, set_similarities = _compute_set_similarities(memberships, column_paths, num_references)
+        similarities[set_paths] = np.where(np.isnan(set_similarities), similarities[set_paths], set_similarities)
+
+    similarities = np.where(reference_kinds == comparison_kinds, similarities, 0.0)
+    return np.where((reference_kinds == _MISSING) & (comparison_kinds == _MISSING), np.nan, similarities)
+
+
+def _compute_set_similarities(
+    memberships: npt.NDArray[np.float64], column_paths: npt.NDArray[np.int64], num_references: int
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.float64]]:
+    """Returns the paths that have token sets and the (P', N, M) Jaccard similarity of the token sets of each pair at
+    those paths, NaN if both sets are empty.
+
+    memberships is the (N + M, V) indicator of the tokens of each answer, and column_paths the path of each token.
+    The intersections of all pairs are computed at once and summed per path.
+    """
+    column_order = np.argsort(column_paths, kind="stable")
+    sorted_paths = column_paths[column_order]
+    path_starts = np.flatnonzero(np.r_[True, sorted_paths[1:] != sorted_paths[:-1]])
+    memberships = memberships[:, column_order]
+
+    reference_memberships = memberships[:num_references]
+    comparison_memberships = memberships[num_references:]
+    intersections = np.add.reduceat(
+        reference_memberships[:, None, :] * comparison_memberships[None, :, :], path_starts, axis=2
+    )
+    reference_sizes = np.add.reduceat(reference_memberships, path_starts, axis=1)
+    comparison_sizes = np.add.reduceat(comparison_memberships, path_starts, axis=1)
+    unions = reference_sizes[:, None, :] + comparison_sizes[None, :, :] - intersections
+    with np.errstate(invalid="ignore", divide="ignore"):
+        set_similarities = np.where(unions > 0, intersections / unions, np.nan)
+
+    return sorted_paths[path_starts], np.moveaxis(set_similarities, 2, 0)
+
+
+def _get_leaf_kind(value: Any) -> tuple[int, set[Hashable] | None]:
+    """Returns the kind of a leaf value and, for strings and arrays, the set of tokens / elements it is compared by."""
+    if isinstance(value, bool) or value is None:
+        return _OTHER, None
+    if isinstance(value, (int, float)):
+        return _NUMBER, None
+    if isinstance(value, str):
+        return _TEXT, set(extract_words(value.lower()))
+    if isinstance(value, (list, tuple)):
+        return _ARRAY, {_get_value_key(element) for element in value}
+    return _OTHER, None
+
+
+def _get_value_key(value: Any) -> Hashable:
+    """Returns a hashable key that is equal for equal JSON values (and differs between types, e.g. 1 and True)."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool) or value is None:
+        return ("literal", value)
+    if isinstance(value, (int, float)):
+        return ("number", value)
+    return ("json", json.dumps(value, sort_keys=True, default=str))
+
+
+def _get_leaves(value: Any) -> dict[LeafPath, Any] | None:
+    """Returns the leaf values of a parsed JSON object keyed by their path of keys, or None if it is not an object.
+
+    Nested objects are flattened; arrays are leaves.
+    """
+    if not isinstance(value, dict):
+        return None
+
+    leaves: dict[LeafPath, Any] = {}
+    stack: list[tuple[LeafPath, Any]] = [((str(key),), child) for key, child in value.items()]
+    while stack:
+        path, child = stack.pop()
+        if isinstance(child, dict) and child:
+            stack.extend(((*path, str(key)), grandchild) for key, grandchild in child.items())
+        else:
+            leaves[path] = child
+    return leaves
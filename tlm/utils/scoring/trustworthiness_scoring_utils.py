@@ -77,12 +77,13 @@ def _generate_total_scores(
 
     total_scores: List[float] = []
 
-    logger.info("Generating trustworthiness scores with scores:")
-    logger.info(f"-- Consistency scores: {consistency_scores}")
-    logger.info(f"-- Indicator scores: {indicator_scores}")
-    logger.info(f"-- Self reflection scores: {self_reflection_scores}")
-    logger.info(f"-- Perplexity scores: {perplexity_scores}")
-    logger.info(f"-- Prompt eval scores: {prompt_eval_scores}")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Generating trustworthiness scores with scores:")
+        logger.info("-- Consistency scores: %s", consistency_scores)
+        logger.info("-- Indicator scores: %s", indicator_scores)
+        logger.info("-- Self reflection scores: %s", self_reflection_scores)
+        logger.info("-- Perplexity scores: %s", perplexity_scores)
+        logger.info("-- Prompt eval scores: %s", prompt_eval_scores)
 
     scores = pd.DataFrame(
         {
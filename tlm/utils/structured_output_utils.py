@@ -1,7 +1,5 @@
-import ast
-import json
-
 from tlm.inference import InferenceResult
+from tlm.utils.json_utils import parse_json
 
 
 def _get_untrustworthy_fields(
@@ -28,18 +26,11 @@ def _get_untrustworthy_fields(
             "`get_untrustworthy_fields()` can only be called scoring structured outputs responses."
         )
 
-    if isinstance(response_text, dict):
-        so_response = response_text
-    else:
-        try:
-            so_response = json.loads(response_text)
-        except Exception:
-            try:
-                so_response = ast.literal_eval(response_text)
-            except Exception:
-                raise ValueError(
-                    "The LLM response must be a valid JSON output (use `response_format` to specify the output format)"
-                )
+    so_response = response_text if isinstance(response_text, dict) else parse_json(response_text)
+    if so_response is None:
+        raise ValueError(
+            "The LLM response must be a valid JSON output (use `response_format` to specify the output format)"
+        )
 
     per_field_score = tlm_metadata["per_field_score"]
     per_score_details = []
@@ -0,0 +1,275 @@
+import asyncio
+import math
+from collections import Counter
+from typing import Any
+
+from pydantic import BaseModel
+
+from tlm.config.base import BaseConfig
+from tlm.config.capabilities import ModelCapabilities, get_model_capabilities
+from tlm.config.defaults import get_settings
+from tlm.config.presets import ContextTrimming
+from tlm.types import CompletionParams
+from tlm.utils.prompt_utils import extract_user_prompt
+from tlm.utils.scoring.jaccard_utils import extract_words
+from tlm.utils.tokenize_utils import (
+    APPROXIMATE_CHARS_PER_TOKEN,
+    aget_token_count,
+    get_token_count,
+    get_token_counts,
+    get_tokenizer_service,
+    has_exact_tokenizer,
+)
+
+settings = get_settings()
+
+# prompt tokens reserved for the instructions that the self reflection / consistency / eval templates add to the inputs
+PROMPT_OVERHEAD_TOKENS = 1024
+# target number of tokens of the context chunks ranked by relevance
+CONTEXT_CHUNK_TOKENS = 256
+
+_PARAGRAPH_SEPARATOR = "\n\n"
+
+
+class InputTrimming(BaseModel):
+    """What was trimmed from the inputs of a request to fit its input token budget.
+
+    Attributes:
+        input_token_budget: Max number of tokens of the conversation, and of the user prompt plus the context.
+        strategy: How the context was trimmed.
+        num_messages_dropped: Number of messages dropped with the oldest conversation turns.
+        context_tokens: Number of tokens of the context before trimming, None if the context was not trimmed.
+        trimmed_context_tokens: Number of tokens of the context after trimming, None if the context was not trimmed.
+        num_context_chunks_dropped: Number of context chunks dropped by relevance-based selection.
+    """
+
+    input_token_budget: int
+    strategy: ContextTrimming
+    num_messages_dropped: int = 0
+    context_tokens: int | None = None
+    trimmed_context_tokens: int | None = None
+    num_context_chunks_dropped: int = 0
+
+    @property
+    def trimmed(self) -> bool:
+        return self.num_messages_dropped > 0 or self.context_tokens is not None
+
+
+def get_input_token_budget(model_capabilities: ModelCapabilities) -> int | None:
+    """Returns the number of tokens available for the inputs of a request (the conversation, or the user prompt plus
+    the context), None if the model's input limit is unknown.
+
+    Every prompt of the pipeline adds template instructions and a response (of up to settings.MAX_TOKENS) to the
+    inputs, and its completion takes up to settings.MAX_TOKENS more, so both are reserved.
+    """
+    if model_capabilities.max_input_tokens is None:
+        return None
+    return max(model_capabilities.max_input_tokens - PROMPT_OVERHEAD_TOKENS - 2 * settings.MAX_TOKENS, 1)
+
+
+def trim_request_inputs(
+    completion_params: CompletionParams, context: str | None, config: BaseConfig
+) -> tuple[CompletionParams, str | None, InputTrimming | None]:
+    """Trims the inputs of a request to the input token budget of its config (see trim_inputs_to_token_budget)."""
+    return trim_inputs_to_token_budget(
+        completion_params,
+        context,
+        model=config.model,
+        strategy=config.context_trimming,
+        input_token_budget=config.input_token_budget,
+        provider=config.provider,
+        api_base=config.api_base,
+    )
+
+
+async def atrim_request_inputs(
+    completion_params: CompletionParams, context: str | None, config: BaseConfig
+) -> tuple[CompletionParams, str | None, InputTrimming | None]:
+    """Trims the inputs of a request (see trim_request_inputs) on a worker thread, so that tokenizing long contexts
+    does not block the event loop.
+    """
+    if config.context_trimming == ContextTrimming.NONE:
+        return completion_params, context, None
+    return await asyncio.to_thread(trim_request_inputs, completion_params, context, config)
+
+
+def trim_inputs_to_token_budget(
+    completion_params: CompletionParams,
+    context: str | None,
+    *,
+    model: str,
+    strategy: ContextTrimming,
+    input_token_budget: int | None = None,
+    provider: str | None = None,
+    api_base: str | None = None,
+) -> tuple[CompletionParams, str | None, InputTrimming | None]:
+    """Trims the conversation and the context of a request so that they fit the input token budget (the given one, or
+    the one derived from the model's input limit), and reports what was trimmed.
+
+    The oldest conversation turns are dropped first; system messages and the latest user message are always kept.
+    The context is trimmed so that the user prompt plus the context fit, by truncation or by relevance-based chunk
+    selection. Returns the inputs unchanged (and no report) if trimming is disabled or the budget is unknown.
+    """
+    if strategy == ContextTrimming.NONE:
+        return completion_params, context, None
+
+    budget = input_token_budget or get_input_token_budget(get_model_capabilities(model, provider, api_base))
+    if budget is None:
+        return completion_params, context, None
+
+    report = InputTrimming(input_token_budget=budget, strategy=strategy)
+
+    messages: list[dict[str, Any]] = completion_params.get("messages", [])
+    trimmed_messages = _drop_oldest_messages(messages, budget, model)
+    if len(trimmed_messages) < len(messages):
+        report.num_messages_dropped = len(messages) - len(trimmed_messages)
+        completion_params = {**completion_params, "messages": trimmed_messages}
+
+    if context is not None:
+        user_prompt = extract_user_prompt(completion_params)
+        user_prompt_tokens = get_token_count(user_prompt, model) if isinstance(user_prompt, str) else 0
+        context_budget = max(budget - user_prompt_tokens, 1)
+        if (
+            not _fits_budget(context, context_budget)
+            and (context_tokens := get_token_count(context, model)) > context_budget
+        ):
+            if strategy == ContextTrimming.RELEVANCE:
+                context, report.num_context_chunks_dropped = select_relevant_context(
+                    context, user_prompt if isinstance(user_prompt, str) else "", context_budget, model
+                )
+            else:
+                context = truncate_to_token_count(context, context_budget, model)
+            report.context_tokens = context_tokens
+            report.trimmed_context_tokens = get_token_count(context, model)
+
+    return completion_params, context, report
+
+
+async def exceeds_input_token_limit(messages: list[dict[str, Any]], model_capabilities: ModelCapabilities) -> bool:
+    """Whether the prompt of a call certainly exceeds the model's input limit, in which case the call would fail.
+
+    Only models with an exact local tokenizer are checked, since an estimated count could reject prompts that fit (the
+    provider reports the prompts of other models that do not fit). Tokens are only counted for prompts that may exceed
+    the limit: a token is at least one byte, so a prompt of at most max_input_tokens bytes always fits.
+    """
+    if model_capabilities.max_input_tokens is None or not has_exact_tokenizer(model_capabilities.model):
+        return False
+
+    prompt = "\n".join(_get_message_text(message) for message in messages)
+    if _fits_budget(prompt, model_capabilities.max_input_tokens):
+        return False
+    return await aget_token_count(prompt, model_capabilities.model) > model_capabilities.max_input_tokens
+
+
+def truncate_to_token_count(text: str, max_tokens: int, model: str) -> str:
+    """Returns the longest prefix of the text with at most max_tokens tokens."""
+    encoder = get_tokenizer_service().get_encoder(model)
+    if encoder is None:
+        return text[: max_tokens * APPROXIMATE_CHARS_PER_TOKEN]
+    return encoder.decode(encoder.encode(text, disallowed_special=())[:max_tokens])
+
+
+def select_relevant_context(context: str, query: str, max_tokens: int, model: str) -> tuple[str, int]:
+    """Returns the chunks of the context most relevant to the query that fit in max_tokens (in their original order),
+    and the number of chunks dropped.
+
+    The context is split into chunks of consecutive paragraphs of about CONTEXT_CHUNK_TOKENS tokens. Chunks are ranked
+    by the IDF-weighted number of query words they contain (ties going to the earlier chunk) and added greedily.
+    """
+    chunks, chunk_tokens = _split_into_chunks(context, model)
+
+    query_words = set(extract_words(query.lower()))
+    chunk_words = [set(extract_words(chunk.lower())) & query_words for chunk in chunks]
+    document_frequencies = Counter(word for words in chunk_words for word in words)
+    relevance = [sum(math.log(1 + len(chunks) / document_frequencies[word]) for word in words) for words in chunk_words]
+
+    separator_tokens = get_token_count(_PARAGRAPH_SEPARATOR, model)
+    selected_idxs: list[int] = []
+    used_tokens = 0
+    for idx in sorted(range(len(chunks)), key=lambda idx: (-relevance[idx], idx)):
+        required_tokens = chunk_tokens[idx] + (separator_tokens if selected_idxs else 0)
+        if used_tokens + required_tokens <= max_tokens:
+            selected_idxs.append(idx)
+            used_tokens += required_tokens
+
+    selected_context = _PARAGRAPH_SEPARATOR.join(chunks[idx] for idx in sorted(selected_idxs))
+    return selected_context, len(chunks) - len(selected_idxs)
+
+
+def _split_into_chunks(context: str, model: str) -> tuple[list[str], list[int]]:
+    """Splits the context into chunks of consecutive paragraphs of up to CONTEXT_CHUNK_TOKENS tokens (longer paragraphs
+    are chunks of their own), and returns the chunks with their token counts.
+    """
+    paragraphs = [paragraph for paragraph in context.split(_PARAGRAPH_SEPARATOR) if paragraph.strip()]
+    paragraph_tokens = get_token_counts(paragraphs, model)
+
+    chunks: list[str] = []
+    chunk_tokens: list[int] = []
+    current_paragraphs: list[str] = []
+    current_tokens = 0
+    for paragraph, num_tokens in zip(paragraphs, paragraph_tokens, strict=True):
+        if current_paragraphs and current_tokens + num_tokens > CONTEXT_CHUNK_TOKENS:
+            chunks.append(_PARAGRAPH_SEPARATOR.join(current_paragraphs))
+            chunk_tokens.append(current_tokens)
+            current_paragraphs, current_tokens = [], 0
+        current_paragraphs.append(paragraph)
+        current_tokens += num_tokens
+
+    if current_paragraphs:
+        chunks.append(_PARAGRAPH_SEPARATOR.join(current_paragraphs))
+        chunk_tokens.append(current_tokens)
+
+    return chunks, chunk_tokens
+
+
+def _drop_oldest_messages(messages: list[dict[str, Any]], max_tokens: int, model: str) -> list[dict[str, Any]]:
+    """Drops the oldest turns of the conversation until it fits in max_tokens, keeping system messages and the latest
+    user message (and any message after it).
+
+    A turn is a user message with the messages up to the next user message (assistant replies, and assistant tool calls
+    with their tool results), and is dropped as a whole: no tool result is left without its tool call, and the
+    conversation still starts with a user message.
+    """
+    texts = [_get_message_text(message) for message in messages]
+    if _fits_budget("".join(texts), max_tokens):
+        return messages
+
+    message_tokens = get_token_counts(texts, model)
+    total_tokens = sum(message_tokens)
+    last_user_idx = max((idx for idx, message in enumerate(messages) if message["role"] == "user"), default=-1)
+    turn_start_idxs = [0] + [idx for idx in range(1, last_user_idx) if messages[idx]["role"] == "user"]
+
+    dropped_idxs: set[int] = set()
+    for turn_start_idx, turn_end_idx in zip(turn_start_idxs, [*turn_start_idxs[1:], last_user_idx], strict=True):
+        if total_tokens <= max_tokens:
+            break
+        for idx in range(turn_start_idx, turn_end_idx):
+            if messages[idx]["role"] not in ("system", "developer"):
+                dropped_idxs.add(idx)
+                total_tokens -= message_tokens[idx]
+
+    return [message for idx, message in enumerate(messages) if idx not in dropped_idxs]
+
+
+def _get_message_text(message: dict[str, Any]) -> str:
+    """Returns the text of a message that counts towards its tokens: its content (or the text parts of a multi-part
+    content) and the names and arguments of its tool calls.
+    """
+    content = message.get("content")
+    if isinstance(content, str):
+        texts = [content]
+    elif isinstance(content, list):
+        texts = [part["text"] for part in content if isinstance(part, dict) and isinstance(part.get("text"), str)]
+    else:
+        texts = []
+
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function") or {}
+        texts.extend(value for value in (function.get("name"), function.get("arguments")) if isinstance(value, str))
+
+    return "\n".join(texts)
+
+
+def _fits_budget(text: str, max_tokens: int) -> bool:
+    """Whether the text certainly fits in max_tokens without counting its tokens (each token is at least one byte)."""
+    return len(text) <= max_tokens and len(text.encode("utf-8")) <= max_tokens
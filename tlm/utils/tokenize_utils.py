@@ -1,14 +1,24 @@
-import functools
+import asyncio
+import math
+import threading
 
 import numpy as np
 import tiktoken
 
 from tlm.config.defaults import get_settings
-from tlm.config.models import DEFAULT_MODEL, ENCODING_MODELS
+from tlm.config.models import APPROXIMATE_ENCODING_MODELS, ENCODING_MODELS
 from tlm.config.presets import REASONING_EFFORT_TO_MAX_EXPLANATION_WORDS, ReasoningEffort
 
 settings = get_settings()
 
+# approximate number of characters per token, for models without a local tokenizer
+APPROXIMATE_CHARS_PER_TOKEN = 4
+# inputs shorter than this are counted inline, since handing them to a worker thread costs more than encoding them
+ASYNC_TOKEN_COUNT_MIN_CHARS = 20_000
+# batches shorter than this are encoded inline, since starting the encoding threads costs more than encoding them
+PARALLEL_TOKEN_COUNT_MIN_CHARS = 20_000
+TOKENIZER_NUM_THREADS = 8
+
 
 def get_max_words_for_observed_consistency_explanation(reasoning_effort: ReasoningEffort) -> int:
     """Explanation for observed consistency is limited to max_words to prevent token overflow which is calculated using length of reference answer.
@@ -48,8 +58,112 @@ def round_max_words(max_words: int) -> int:
         return (max_words // 50) * 50
 
 
-@functools.lru_cache(maxsize=50)
+class TokenizerService:
+    """Counts tokens with the local tiktoken encoding of a model.
+
+    Encoders are resolved once per model and cached. Models without a local tokenizer (e.g. Gemini or DeepSeek models)
+    use a fast approximate count based on the number of characters. Long inputs can be counted on a worker thread, so
+    they do not block the event loop.
+    """
+
+    def __init__(self, num_threads: int = TOKENIZER_NUM_THREADS):
+        self.num_threads = num_threads
+        self._encoders: dict[str, tiktoken.Encoding | None] = {}
+        self._lock = threading.Lock()
+
+    def get_encoder(self, model: str) -> tiktoken.Encoding | None:
+        """Returns the (cached) encoder of the model, or None if the model has no local tokenizer."""
+        encoder = self._encoders.get(model, _UNRESOLVED)
+        if encoder is not _UNRESOLVED:
+            return encoder
+
+        with self._lock:
+            if model not in self._encoders:
+                encoding_name = _get_encoding_name(model)
+                self._encoders[model] = tiktoken.get_encoding(encoding_name) if encoding_name else None
+            return self._encoders[model]
+
+    def count(self, input: str, model: str) -> int:
+        """Returns the number of tokens of the input."""
+        encoder = self.get_encoder(model)
+        if encoder is None:
+            return approximate_token_count(input)
+        return len(encoder.encode(input, disallowed_special=()))
+
+    def count_batch(self, inputs: list[str], model: str) -> list[int]:
+        """Returns the number of tokens of each input, encoding long batches across num_threads threads."""
+        encoder = self.get_encoder(model)
+        if encoder is None:
+            return [approximate_token_count(input) for input in inputs]
+        if sum(len(input) for input in inputs) < PARALLEL_TOKEN_COUNT_MIN_CHARS:
+            return [len(encoder.encode(input, disallowed_special=())) for input in inputs]
+        return [
+            len(tokens) for tokens in encoder.encode_batch(inputs, num_threads=self.num_threads, disallowed_special=())
+        ]
+
+    async def acount(self, input: str, model: str) -> int:
+        """Returns the number of tokens of the input, counting long inputs (and loading the encoder) on a worker
+        thread.
+        """
+        if self._can_count_inline(model, len(input)):
+            return self.count(input, model)
+        return await asyncio.to_thread(self.count, input, model)
+
+    async def acount_batch(self, inputs: list[str], model: str) -> list[int]:
+        """Returns the number of tokens of each input, counting long batches (and loading the encoder) on a worker
+        thread.
+        """
+        if self._can_count_inline(model, sum(len(input) for input in inputs)):
+            return self.count_batch(inputs, model)
+        return await asyncio.to_thread(self.count_batch, inputs, model)
+
+    def _can_count_inline(self, model: str, num_chars: int) -> bool:
+        """Whether counting num_chars characters on the event loop is cheap: the encoder of the model is already loaded
+        (or the model has no local tokenizer) and the input is short.
+        """
+        encoder = self._encoders.get(model, _UNRESOLVED)
+        return encoder is None or (encoder is not _UNRESOLVED and num_chars < ASYNC_TOKEN_COUNT_MIN_CHARS)
+
+
+def approximate_token_count(input: str) -> int:
+    """Approximates the number of tokens of the input from its number of characters."""
+    return math.ceil(len(input) / APPROXIMATE_CHARS_PER_TOKEN)
+
+
+def has_exact_tokenizer(model: str) -> bool:
+    """Whether the model's tokens are counted exactly, rather than estimated with another model's encoding or from the
+    number of characters.
+    """
+    return model not in APPROXIMATE_ENCODING_MODELS and _get_encoding_name(model) is not None
+
+
+def _get_encoding_name(model: str) -> str | None:
+    if model in ENCODING_MODELS:
+        return ENCODING_MODELS[model]
+    try:
+        return tiktoken.encoding_name_for_model(model)
+    except KeyError:
+        return None
+
+
+_UNRESOLVED = object()
+_tokenizer_service = TokenizerService()
+
+
+def get_tokenizer_service() -> TokenizerService:
+    return _tokenizer_service
+
+
 def get_token_count(input: str, model: str) -> int:
     """Gets token count for given input."""
-    enc = tiktoken.get_encoding(ENCODING_MODELS.get(model, ENCODING_MODELS[DEFAULT_MODEL]))
-    return len(enc.encode(input, disallowed_special=()))
+    return _tokenizer_service.count(input, model)
+
+
+def get_token_counts(inputs: list[str], model: str) -> list[int]:
+    """Gets the token count of each input, encoding the batch in parallel."""
+    return _tokenizer_service.count_batch(inputs, model)
+
+
+async def aget_token_count(input: str, model: str) -> int:
+    """Gets token count for given input, without blocking the event loop on long inputs."""
+    return await _tokenizer_service.acount(input, model)
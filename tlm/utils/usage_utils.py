@@ -0,0 +1,171 @@
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from pydantic import BaseModel
+
+# imported from tlm.types.base (not tlm.types) since tlm.types imports tlm.utils.openai_utils, which uses this module
+from tlm.types.base import CompletionUsage, ModelPricing
+
+# component-less calls (e.g. made outside of a pipeline component) are grouped under this name
+UNKNOWN_COMPONENT = "unknown"
+
+
+class UsageTotals(BaseModel):
+    """Token usage summed over a number of LLM / embedding calls."""
+
+    num_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    # prompt tokens served from the provider's prompt (prefix) cache, included in prompt_tokens
+    cached_prompt_tokens: int = 0
+
+    def add(self, other: "UsageTotals") -> None:
+        self.num_calls += other.num_calls
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.total_tokens += other.total_tokens
+        self.cached_prompt_tokens += other.cached_prompt_tokens
+
+    def get_cost(self, pricing: ModelPricing | None) -> float | None:
+        if pricing is None:
+            return None
+        return (
+            self.prompt_tokens * pricing.input_cost_per_million_tokens
+            + self.completion_tokens * pricing.output_cost_per_million_tokens
+        ) / 1_000_000
+
+
+class UsageTracker:
+    """Collects the token usage of every LLM / embedding call, per pipeline component and model."""
+
+    def __init__(self):
+        self.usage: dict[tuple[str, str], UsageTotals] = {}
+        self._lock = threading.Lock()
+
+    def record(self, component: str, model: str, usage: UsageTotals) -> None:
+        with self._lock:
+            self.usage.setdefault((component, model), UsageTotals()).add(usage)
+
+    def merge(self, other: "UsageTracker") -> None:
+        for (component, model), usage in list(other.usage.items()):
+            self.record(component, model, usage)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.usage.clear()
+
+    def summarize(self, price_table: dict[str, ModelPricing] | None = None) -> dict[str, Any]:
+        """Returns the usage per component (and model), per model, and in total.
+
+        If a price table is given, each entry also includes its cost in dollars (None for models missing from it).
+        """
+        with self._lock:
+            usage_items = list(self.usage.items())
+
+        by_component: dict[str, dict[str, dict[str, Any]]] = {}
+        usage_by_model: dict[str, UsageTotals] = {}
+        total = UsageTotals()
+
+        for (component, model), usage in usage_items:
+            by_component.setdefault(component, {})[model] = _usage_to_dict(usage, model, price_table)
+            usage_by_model.setdefault(model, UsageTotals()).add(usage)
+            total.add(usage)
+
+        by_model = {model: _usage_to_dict(usage, model, price_table) for model, usage in usage_by_model.items()}
+        total_dict: dict[str, Any] = total.model_dump()
+        if price_table is not None:
+            model_costs = [model_usage["cost"] for model_usage in by_model.values()]
+            total_dict["cost"] = None if any(cost is None for cost in model_costs) else sum(model_costs)
+
+        return {"total": total_dict, "by_model": by_model, "by_component": by_component}
+
+
+_current_usage_tracker: ContextVar[UsageTracker | None] = ContextVar("tlm_usage_tracker", default=None)
+_current_component: ContextVar[str | None] = ContextVar("tlm_current_component", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[UsageTracker]:
+    """Records the usage of all LLM / embedding calls made in this context (including tasks created in it)."""
+    tracker = UsageTracker()
+    token = _current_usage_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_usage_tracker.reset(token)
+
+
+def set_current_component(component: str) -> None:
+    """Attributes the usage of subsequent calls in the current (task) context to the given component."""
+    _current_component.set(component)
+
+
+@contextmanager
+def attribute_usage_to(component: str) -> Iterator[None]:
+    """Attributes the usage of all calls made in this context to the given component."""
+    token = _current_component.set(component)
+    try:
+        yield
+    finally:
+        _current_component.reset(token)
+
+
+def record_completion_usage(model: str, usage: CompletionUsage | None) -> None:
+    """Records the usage of one completion with the active usage tracker, if any.
+
+    Token counts that the provider did not report (None or negative) are not counted, but the call is.
+    """
+    tracker = _current_usage_tracker.get()
+    if tracker is None:
+        return
+
+    prompt_tokens = max(usage.prompt_tokens, 0) if usage else 0
+    completion_tokens = max(usage.completion_tokens, 0) if usage else 0
+    total_tokens = max(usage.total_tokens, 0) if usage else 0
+    cached_prompt_tokens = max(usage.cached_prompt_tokens or 0, 0) if usage else 0
+    tracker.record(
+        _current_component.get() or UNKNOWN_COMPONENT,
+        model,
+        UsageTotals(
+            num_calls=1,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=total_tokens,
+            cached_prompt_tokens=cached_prompt_tokens,
+        ),
+    )
+
+
+def get_cached_prompt_tokens(provider_usage: Any) -> int | None:
+    """Returns the number of prompt tokens the provider read from its prompt cache, from the usage of a provider
+    response (an object or its dict form), or None if the provider did not report it.
+
+    OpenAI-style usage reports them in prompt_tokens_details.cached_tokens, Anthropic-style usage in
+    cache_read_input_tokens.
+    """
+    if provider_usage is None:
+        return None
+
+    prompt_tokens_details = _get_usage_value(provider_usage, "prompt_tokens_details")
+    cached_tokens = _get_usage_value(prompt_tokens_details, "cached_tokens") if prompt_tokens_details else None
+    if cached_tokens is None:
+        cached_tokens = _get_usage_value(provider_usage, "cache_read_input_tokens")
+
+    return cached_tokens if isinstance(cached_tokens, int) else None
+
+
+def _get_usage_value(usage: Any, key: str) -> Any:
+    if isinstance(usage, dict):
+        return usage.get(key)
+    return getattr(usage, key, None)
+
+
+def _usage_to_dict(usage: UsageTotals, model: str, price_table: dict[str, ModelPricing] | None) -> dict[str, Any]:
+    usage_dict: dict[str, Any] = usage.model_dump()
+    if price_table is not None:
+        usage_dict["cost"] = usage.get_cost(price_table.get(model))
+    return usage_dict